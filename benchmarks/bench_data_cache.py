@@ -0,0 +1,41 @@
+"""
+Бенчмарк чтения файла с транзакциями: "холодное" чтение (Excel-файл, кеш отсутствует) и "теплое" чтение
+(из колоночного кеша).
+Запуск из корня проекта: python -m benchmarks.bench_data_cache
+"""
+
+import shutil
+import tempfile
+import time
+
+from src import data_cache
+from src.utils import PATH_TO_EXCEL, SHEET_NAME, read_data_file
+
+REPEATS = 5  # Количество повторов каждого замера
+
+
+def measure(use_warm_cache: bool) -> float:
+    """Функция замера времени чтения файла (возвращает лучшее время из REPEATS замеров в секундах)."""
+    timings = []
+    for _ in range(REPEATS):
+        if not use_warm_cache:
+            # Сброс кеша перед замером
+            shutil.rmtree(data_cache.get_cache_dir(PATH_TO_EXCEL, SHEET_NAME), ignore_errors=True)
+        start = time.perf_counter()
+        read_data_file()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+if __name__ == "__main__":
+    data_cache.PATH_TO_CACHE_DIR = tempfile.mkdtemp()  # Кеш пишется во временную папку, а не в папку `data`
+    try:
+        cold_time = measure(use_warm_cache=False)
+        read_data_file()  # Прогрев кеша
+        warm_time = measure(use_warm_cache=True)
+    finally:
+        shutil.rmtree(data_cache.PATH_TO_CACHE_DIR, ignore_errors=True)
+
+    print(f"Чтение без кеша (Excel):  {cold_time * 1000:10.2f} мс")
+    print(f"Чтение из кеша:           {warm_time * 1000:10.2f} мс")
+    print(f"Ускорение:                {cold_time / warm_time:10.1f}x")
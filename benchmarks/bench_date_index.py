@@ -0,0 +1,55 @@
+"""
+Бенчмарк выборки транзакций за период: полный просмотр столбца "Дата операции" (Series.between + копия данных)
+и двоичный поиск по отсортированному индексу дат хранилища транзакций (представление без копирования).
+Запуск из корня проекта: python -m benchmarks.bench_date_index [количество строк, по умолчанию 10M]
+"""
+
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable
+
+from benchmarks.synthetic import generate_transactions, parse_rows
+from src.store import TransactionStore
+from src.utils import get_month_range, get_slice_of_data
+
+REPEATS = 5  # Количество повторов каждого замера
+PERIODS = [
+    (datetime(2021, 4, 1), datetime(2021, 4, 10, 20, 30)),  # Начало месяца - дата запроса (страница "Главная")
+    (datetime(2020, 11, 3), datetime(2021, 2, 1)),  # 90 дней (страница "Отчеты")
+]
+
+
+def best_time(function: Callable[..., Any], *args: Any) -> float:
+    """Функция замера времени выполнения (лучшее время из REPEATS замеров в секундах)."""
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def month_by_mask(df: Any, year: str, month: str) -> Any:
+    """Выборка за месяц по вычисленным для каждой строки месяцу и году (прежняя реализация)."""
+    return df[(df["Дата операции"].dt.month == int(month)) & (df["Дата операции"].dt.year == int(year))]
+
+
+if __name__ == "__main__":
+    n_rows = parse_rows(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    df = generate_transactions(n_rows)
+
+    start = time.perf_counter()
+    store = TransactionStore(df)
+    print(f"Строк: {n_rows}. Создание хранилища (сортировка по дате): {time.perf_counter() - start:.2f} с")
+
+    for start_date, end_date in PERIODS:
+        scan_time = best_time(get_slice_of_data, start_date, end_date, df)
+        index_time = best_time(store.get_slice, start_date, end_date)
+        print(f"Период {start_date:%d.%m.%Y} - {end_date:%d.%m.%Y}: полный просмотр {scan_time * 1000:10.2f} мс, "
+              f"индекс {index_time * 1000:8.3f} мс ({scan_time / index_time:.0f}x)")
+
+    scan_time = best_time(month_by_mask, df, "2020", "2")
+    index_time = best_time(store.get_slice, *get_month_range("2020", "2"))
+    print(f"Месяц 02.2020: .dt.month/.dt.year {scan_time * 1000:10.2f} мс, "
+          f"индекс {index_time * 1000:8.3f} мс ({scan_time / index_time:.0f}x)")
@@ -0,0 +1,35 @@
+"""
+Бенчмарк времени импорта модулей проекта (`python -X importtime`): медиана по нескольким запускам
+интерпретатора и модули, загрузка которых заняла больше всего времени.
+Запуск из корня проекта: python -m benchmarks.bench_import_time [модуль, по умолчанию src.views]
+"""
+
+import statistics
+import subprocess
+import sys
+
+N_RUNS = 7
+N_SLOWEST = 10
+
+
+def measure_import(module: str) -> list[tuple[int, str]]:
+    """Функция получения времени импорта (в мкс, с учетом вложенных импортов) всех модулей из вывода -X importtime."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True,
+                            text=True, check=True)
+    times = []
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            times.append((int(parts[1]), parts[2].strip()))
+    return times
+
+
+if __name__ == "__main__":
+    module = sys.argv[1] if len(sys.argv) > 1 else "src.views"
+    runs = [measure_import(module) for _ in range(N_RUNS)]
+    total = statistics.median(dict((name, time) for time, name in run)[module] for run in runs)
+    print(f"Импорт {module}: {total / 1000:.1f} мс (медиана по {N_RUNS} запускам)")
+    print("Самые долгие импорты модулей верхнего уровня:")
+    top_level = {name: time for time, name in runs[-1] if "." not in name and name != module.split(".")[0]}
+    for name, time in sorted(top_level.items(), key=lambda item: -item[1])[:N_SLOWEST]:
+        print(f"  {name:20} {time / 1000:7.1f} мс")
@@ -0,0 +1,56 @@
+"""
+Бенчмарк загрузки новой выгрузки банка: полное чтение Excel-файла (как `read_data_file` без кеша) и добавление
+в хранилище только новых транзакций (`ingest_new_rows`).
+Запуск из корня проекта: python -m benchmarks.bench_ingest [количество строк, по умолчанию 100k]
+                         [количество новых строк, по умолчанию 100]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import openpyxl
+import pandas as pd
+
+from benchmarks.synthetic import generate_transactions, parse_rows
+from src.ingest import ingest_new_rows
+from src.store import TransactionStore
+from src.streaming import normalize_chunks
+from src.utils import DATE_TIME_FORMAT, SHEET_NAME
+
+
+def write_export(df: pd.DataFrame, path: str) -> None:
+    """Функция записи транзакций в Excel-файл в формате выгрузки банка (даты операций - строки)."""
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet(SHEET_NAME)
+    df = df.assign(**{"Дата операции": df["Дата операции"].dt.strftime(DATE_TIME_FORMAT)})
+    sheet.append(list(df.columns))
+    for row in df.astype(object).where(df.notna(), None).itertuples(index=False):
+        sheet.append(list(row))
+    workbook.save(path)
+
+
+if __name__ == "__main__":
+    n_rows = parse_rows(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    n_new_rows = parse_rows(sys.argv[2]) if len(sys.argv) > 2 else 100
+    df = generate_transactions(n_rows + n_new_rows)  # По убыванию даты: новые транзакции - первые n_new_rows строк
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        old_path, new_path = os.path.join(tmp_dir, "old.xlsx"), os.path.join(tmp_dir, "new.xlsx")
+        write_export(df.iloc[n_new_rows:], old_path)
+        write_export(df, new_path)
+
+        start = time.perf_counter()
+        df_excel = pd.read_excel(new_path, sheet_name=SHEET_NAME)
+        TransactionStore(next(normalize_chunks([df_excel])))
+        reload_time = time.perf_counter() - start
+
+        store = TransactionStore(next(normalize_chunks([pd.read_excel(old_path, sheet_name=SHEET_NAME)])))
+        start = time.perf_counter()
+        n_ingested = ingest_new_rows(store, new_path)
+        ingest_time = time.perf_counter() - start
+
+    print(f"Строк в файле: {n_rows + n_new_rows}, новых: {n_ingested}")
+    print(f"Полная загрузка файла: {reload_time:.2f} с, добавление новых транзакций: {ingest_time:.3f} с "
+          f"({reload_time / ingest_time:.0f}x)")
@@ -0,0 +1,45 @@
+"""
+Бенчмарк формирования данных страницы "Главная" для каждого дня месяца: вызов `main_info` для каждой даты
+и один вызов `main_info_batch` для всех дат.
+API-запросы не выполняются (используется файл настроек без тикеров валют и акций).
+Запуск из корня проекта: python -m benchmarks.bench_main_info_batch [количество строк, по умолчанию 1M]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import generate_transactions, parse_rows
+from src.result_cache import ResultCache, set_result_cache
+from src.settings import SettingsLoader, set_settings_loader
+from src.store import TransactionStore, set_transaction_store
+from src.views import main_info, main_info_batch
+
+DATE_TIMES = [f"2021-03-{day:02d} 23:59:59" for day in range(1, 32)]  # Все дни месяца
+
+
+if __name__ == "__main__":
+    n_rows = parse_rows(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    set_transaction_store(TransactionStore(generate_transactions(n_rows)))
+    set_result_cache(ResultCache(max_entries=0))  # Каждый вызов `main_info` рассчитывается заново
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path_to_settings = os.path.join(tmp_dir, "user_settings.json")
+        with open(path_to_settings, "w", encoding="utf-8") as file:
+            json.dump({"user_currencies": [], "user_stocks": []}, file)
+        set_settings_loader(SettingsLoader(path_to_settings))
+
+        main_info(DATE_TIMES[0])  # Отбор ТОП-N транзакций по месяцам (выполняется один раз)
+        start = time.perf_counter()
+        expected = {date_time: json.loads(main_info(date_time)) for date_time in DATE_TIMES}
+        loop_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = json.loads(main_info_batch(DATE_TIMES))
+        batch_time = time.perf_counter() - start
+
+    print(f"Строк: {n_rows}, дат: {len(DATE_TIMES)}. Результаты совпадают: {result == expected}")
+    print(f"main_info для каждой даты: {loop_time * 1000:.1f} мс, main_info_batch: {batch_time * 1000:.1f} мс "
+          f"({loop_time / batch_time:.1f}x)")
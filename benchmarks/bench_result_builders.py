@@ -0,0 +1,115 @@
+"""
+Бенчмарк формирования результатов функций `get_summary_card_data`, `top_5_transactions_by_sum`
+и `get_high_cashback_categories`: построчный перебор DataFrame (iterrows, прежняя реализация)
+и обработка столбцов целиком. Проверяет, что JSON-представления результатов совпадают побайтно.
+Запуск из корня проекта: python -m benchmarks.bench_result_builders [количество групп, по умолчанию 20k]
+"""
+
+import json
+import sys
+import time
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import generate_transactions, parse_rows
+from src.result_cache import ResultCache, set_result_cache
+from src.services import get_high_cashback_categories
+from src.utils import get_summary_card_data, top_5_transactions_by_sum
+
+REPEATS = 5  # Количество повторов каждого замера
+ROWS_PER_GROUP = 5  # Среднее количество транзакций на одну карту (категорию)
+
+
+def best_time(function: Callable[..., Any], *args: Any) -> float:
+    """Функция замера времени выполнения (лучшее время из REPEATS замеров в секундах)."""
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def summary_card_data_iterrows(df: pd.DataFrame) -> list[dict]:
+    """Сводная информация по картам с формированием результата через iterrows (прежняя реализация)."""
+    spent_df = df[df["Сумма платежа"] < 0]
+    cards_sum = spent_df.groupby(by="Номер карты", as_index=False, observed=True)["Сумма операции с округлением"].sum()
+    result = []
+    for index, row in cards_sum.iterrows():
+        result.append(
+            {
+                "last_digits": row["Номер карты"].replace("*", ""),
+                "total_spent": round(row["Сумма операции с округлением"], 2),
+                "cashback": round(row["Сумма операции с округлением"] * 0.01, 2)
+            }
+        )
+    return result
+
+
+def top_5_transactions_iterrows(df: pd.DataFrame) -> list[dict]:
+    """ТОП-5 транзакций с формированием результата через iterrows (прежняя реализация)."""
+    top_by_sum = df[df["Статус"] == "OK"].sort_values(by="Сумма операции с округлением", ascending=False).head(5)
+    result = []
+    for index, row in top_by_sum.iterrows():
+        result.append(
+            {
+                "date": row["Дата операции"].strftime("%d.%m.%Y"),
+                "amount": round(row["Сумма операции с округлением"], 2),
+                "category": row["Категория"],
+                "description": row["Описание"]
+            }
+        )
+    return result
+
+
+def high_cashback_categories_iterrows(df: pd.DataFrame, year: str, month: str) -> str:
+    """Кешбэк по категориям с формированием результата через iterrows (прежняя реализация)."""
+    slice_df = df[(df["Дата операции"].dt.year == int(year)) & (df["Дата операции"].dt.month == int(month))]
+    spent_df = slice_df[(slice_df["Сумма платежа"] < 0) & (slice_df["Категория"] != "Переводы")]
+    category_grouped = spent_df.groupby(by="Категория", as_index=False, observed=True)
+    category_sum = category_grouped["Сумма операции с округлением"].sum()
+    sorted_category_sum = category_sum.sort_values(by="Сумма операции с округлением", ascending=False,
+                                                   ignore_index=True)
+    result = {}
+    for index, row in sorted_category_sum.iterrows():
+        result[row["Категория"]] = round(row["Сумма операции с округлением"] * 0.01, 2)
+    return json.dumps(result, indent=4, ensure_ascii=False)
+
+
+def with_many_groups(df: pd.DataFrame, n_groups: int) -> pd.DataFrame:
+    """Функция замены номеров карт и категорий синтетических транзакций на n_groups различных значений."""
+    rng = np.random.default_rng(7)
+    cards = [f"*{number:05d}" for number in range(n_groups)]
+    categories = [f"Категория {number}" for number in range(n_groups)]
+    return df.assign(
+        **{
+            "Номер карты": pd.Categorical.from_codes(rng.integers(0, n_groups, size=len(df)), categories=cards),
+            "Категория": pd.Categorical.from_codes(rng.integers(0, n_groups, size=len(df)), categories=categories),
+        }
+    )
+
+
+if __name__ == "__main__":
+    n_groups = parse_rows(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    set_result_cache(ResultCache(max_entries=0))  # Замеряется расчет, а не чтение результатов из кеша
+    # Все транзакции - за один месяц, чтобы каждая категория встречалась в выборке кешбэка
+    df = generate_transactions(n_groups * ROWS_PER_GROUP)
+    df = with_many_groups(df, n_groups).assign(**{"Дата операции": pd.Timestamp("2021-03-15 12:00:00")})
+
+    cases = [
+        ("Сводная информация по картам", summary_card_data_iterrows, get_summary_card_data, (df,)),
+        ("ТОП-5 транзакций", top_5_transactions_iterrows, top_5_transactions_by_sum, (df,)),
+        ("Кешбэк по категориям", high_cashback_categories_iterrows, get_high_cashback_categories,
+         (df, "2021", "3")),
+    ]
+    print(f"Строк: {len(df)}, карт и категорий: {n_groups}")
+    for name, old_function, new_function, args in cases:
+        old_result = json.dumps(old_function(*args), ensure_ascii=False, indent=4).encode("utf-8")
+        new_result = json.dumps(new_function(*args), ensure_ascii=False, indent=4).encode("utf-8")
+        assert old_result == new_result, f"{name}: результаты отличаются"
+        old_time = best_time(old_function, *args)
+        new_time = best_time(new_function, *args)
+        print(f"{name}: iterrows {old_time * 1000:9.2f} мс, по столбцам {new_time * 1000:9.2f} мс "
+              f"({old_time / new_time:.1f}x), JSON совпадает побайтно")
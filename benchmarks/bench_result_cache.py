@@ -0,0 +1,54 @@
+"""
+Бенчмарк кеша результатов функций страниц: повторяющиеся запросы страниц "Отчеты" и "Сервисы" с одинаковыми
+аргументами (как при обновлении панелей) без кеша и с кешем, а также после добавления транзакций
+в хранилище (новая версия данных - результаты рассчитываются заново).
+Запуск из корня проекта: python -m benchmarks.bench_result_cache [количество строк, по умолчанию 1M]
+"""
+
+import sys
+import time
+
+from benchmarks.synthetic import generate_transactions, parse_rows
+from src.reports import spending_by_category
+from src.result_cache import ResultCache, get_result_cache, set_result_cache
+from src.services import get_high_cashback_categories
+from src.store import TransactionStore, set_transaction_store
+
+N_REQUESTS = 1_000  # Количество запросов
+MONTHS = [("2021", str(month)) for month in range(1, 13)]  # Месяцы запросов страницы "Сервисы"
+
+
+def run_requests() -> float:
+    """
+    Функция выполнения N_REQUESTS запросов (страницы "Отчеты" и "Сервисы" по очереди, по кругу для всех месяцев).
+    Возвращает среднее время запроса.
+    """
+    report = spending_by_category.__wrapped__  # Без записи результата в файл
+    start = time.perf_counter()
+    for index in range(N_REQUESTS):
+        year, month = MONTHS[index // 2 % len(MONTHS)]
+        if index % 2:
+            get_high_cashback_categories(None, year, month)
+        else:
+            report(None, "Супермаркеты", f"28.{int(month):02d}.{year}")
+    return (time.perf_counter() - start) / N_REQUESTS
+
+
+if __name__ == "__main__":
+    n_rows = parse_rows(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    df = generate_transactions(n_rows)
+    store = TransactionStore(df)
+    set_transaction_store(store)
+
+    set_result_cache(ResultCache(max_entries=0))
+    no_cache_time = run_requests()
+    set_result_cache(ResultCache())
+    cache_time = run_requests()
+    store.append(df.iloc[[0]])  # Новая версия данных
+    after_append_time = run_requests()
+
+    print(f"Строк: {n_rows}, запросов: {N_REQUESTS}, различных запросов: {len(MONTHS) * 2}")
+    print(f"Без кеша: {no_cache_time * 1000:.3f} мс/запрос, с кешем: {cache_time * 1000:.3f} мс/запрос "
+          f"({no_cache_time / cache_time:.0f}x), после добавления транзакций: "
+          f"{after_append_time * 1000:.3f} мс/запрос")
+    print(f"Показатели кеша: {get_result_cache().stats()}")
@@ -0,0 +1,45 @@
+"""
+Бенчмарк времени ответа функции с декоратором `write_result_to_file`: запись результата в файл в вызывающем
+потоке (прежняя реализация) и в фоновом потоке (`ResultWriter`) для текстового формата и CSV.
+Запуск из корня проекта: python -m benchmarks.bench_result_writer [количество строк, по умолчанию 1M]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import generate_transactions, parse_rows
+from src.reports import spending_by_category, write_result_to_file
+from src.result_cache import ResultCache, set_result_cache
+from src.result_writer import get_result_path, get_result_writer, write_result
+from src.store import TransactionStore, set_transaction_store
+
+N_CALLS = 10
+
+
+if __name__ == "__main__":
+    n_rows = parse_rows(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    set_transaction_store(TransactionStore(generate_transactions(n_rows)))
+    set_result_cache(ResultCache(max_entries=0))  # Каждый вызов отчета рассчитывается заново
+    report = spending_by_category.__wrapped__  # Функция без декоратора
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "report.txt")
+        print(f"Строк: {n_rows}, строк в результате: {len(report(None, 'Супермаркеты', '31.12.2021'))}")
+        for file_format in ["text", "csv"]:
+            start = time.perf_counter()
+            for _ in range(N_CALLS):
+                result = report(None, "Супермаркеты", "31.12.2021")
+                write_result(get_result_path(path, file_format), "Результат:", result, file_format)
+            sync_time = (time.perf_counter() - start) / N_CALLS
+
+            decorated = write_result_to_file(path, file_format)(report)  # Абсолютный путь - файл во временной папке
+            start = time.perf_counter()
+            for _ in range(N_CALLS):
+                decorated(None, "Супермаркеты", "31.12.2021")
+            background_time = (time.perf_counter() - start) / N_CALLS
+            get_result_writer().flush()
+
+            print(f"Формат {file_format}: запись в вызывающем потоке {sync_time * 1000:7.1f} мс/вызов, "
+                  f"в фоновом потоке {background_time * 1000:7.1f} мс/вызов ({sync_time / background_time:.1f}x)")
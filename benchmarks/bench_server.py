@@ -0,0 +1,94 @@
+"""
+Нагрузочный тест HTTP-сервера страниц: несколько клиентов (потоков) отправляют запросы по сохраняемым
+соединениям (keep-alive), для каждого адреса выводятся задержки p50/p99 и общая пропускная способность.
+Если адрес сервера не передан (--url), сервер запускается в текущем процессе на синтетических данных
+(с предварительной загрузкой данных). Страница "Главная" по умолчанию не запрашивается: она выполняет
+API-запросы курсов валют и акций (адрес можно передать в --paths).
+Запуск из корня проекта:
+python -m benchmarks.bench_server [--rows 1M] [--requests 2000] [--clients 8] [--url http://127.0.0.1:8000]
+"""
+
+import argparse
+import http.client
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import quote, urlparse
+
+import numpy as np
+
+from benchmarks.synthetic import generate_transactions, parse_rows
+from src.server import create_server
+from src.store import TransactionStore, set_transaction_store
+
+DEFAULT_PATHS = [
+    "/health",
+    f"/reports/spending_by_category?category={quote('Супермаркеты')}&date=01.02.2021",
+    "/services/high_cashback_categories?year=2021&month=03",
+]
+
+
+def run_client(host: str, port: int, paths: list[str], n_requests: int, latencies: dict[str, list[float]],
+               lock: threading.Lock) -> None:
+    """Функция клиента: n_requests запросов по одному соединению (адреса - по кругу)."""
+    connection = http.client.HTTPConnection(host, port, timeout=30)
+    client_latencies = defaultdict(list)
+    try:
+        for index in range(n_requests):
+            path = paths[index % len(paths)]
+            start = time.perf_counter()
+            connection.request("GET", path)
+            response = connection.getresponse()
+            response.read()
+            client_latencies[path].append(time.perf_counter() - start)
+            if response.status != 200:
+                raise RuntimeError(f"Ответ {response.status} на запрос {path}")
+    finally:
+        connection.close()
+    with lock:
+        for path, values in client_latencies.items():
+            latencies[path].extend(values)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Нагрузочный тест HTTP-сервера страниц")
+    parser.add_argument("--url", help="адрес запущенного сервера (по умолчанию - сервер в текущем процессе)")
+    parser.add_argument("--rows", default="1M", help="количество строк синтетических данных (без --url)")
+    parser.add_argument("--requests", type=int, default=2_000, help="общее количество запросов")
+    parser.add_argument("--clients", type=int, default=8, help="количество одновременных клиентов")
+    parser.add_argument("--paths", nargs="+", default=DEFAULT_PATHS, help="адреса запросов")
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        url = urlparse(args.url)
+        host, port = url.hostname or "127.0.0.1", url.port or 80
+    else:
+        set_transaction_store(TransactionStore(generate_transactions(parse_rows(args.rows))))
+        server = create_server(port=0, max_workers=args.clients, preload_data=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = "127.0.0.1", server.server_port
+
+    latencies: dict[str, list[float]] = defaultdict(list)
+    lock = threading.Lock()
+    clients = [
+        threading.Thread(target=run_client, args=(host, port, args.paths, args.requests // args.clients, latencies,
+                                                  lock))
+        for _ in range(args.clients)
+    ]
+    start = time.perf_counter()
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    total_time = time.perf_counter() - start
+
+    n_done = sum(len(values) for values in latencies.values())
+    print(f"Запросов: {n_done}, клиентов: {args.clients}, {n_done / total_time:.0f} запросов/с")
+    for path, values in latencies.items():
+        p50, p99 = np.percentile(values, [50, 99]) * 1000
+        print(f"  {path[:70]:70} p50 {p50:8.2f} мс   p99 {p99:8.2f} мс")
+
+    if server is not None:
+        server.shutdown()
+        server.server_close()
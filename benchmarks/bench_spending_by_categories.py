@@ -0,0 +1,42 @@
+"""
+Бенчмарк отчета по тратам для всех категорий и нескольких дат отчета: вызов `spending_by_category`
+для каждой категории и даты (выборка за 90 дней и фильтрация для каждой пары) и один вызов
+`spending_by_categories` (накопленные суммы по категориям).
+Запуск из корня проекта: python -m benchmarks.bench_spending_by_categories [количество строк, по умолчанию 1M]
+"""
+
+import sys
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import CATEGORIES, generate_transactions, parse_rows
+from src.reports import spending_by_categories, spending_by_category
+from src.store import TransactionStore, set_transaction_store
+
+REPORT_DATES = [date.strftime("%d.%m.%Y") for date in pd.date_range("2020-01-05", periods=52, freq="7D")]
+
+
+if __name__ == "__main__":
+    n_rows = parse_rows(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    set_transaction_store(TransactionStore(generate_transactions(n_rows)))
+    categories = list(CATEGORIES)
+    by_category = spending_by_category.__wrapped__  # Без записи результата в файл
+    by_categories = spending_by_categories.__wrapped__
+
+    start = time.perf_counter()
+    expected = []
+    for category in categories:
+        for report_date in REPORT_DATES:
+            spent_df = by_category(None, category, report_date)
+            expected.append(len(spent_df))
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = by_categories(None, categories, REPORT_DATES)
+    batch_time = time.perf_counter() - start
+
+    print(f"Строк: {n_rows}, категорий: {len(categories)}, дат отчета: {len(REPORT_DATES)}. "
+          f"Количество операций совпадает: {result['Количество операций'].tolist() == expected}")
+    print(f"spending_by_category для каждой пары: {loop_time * 1000:.0f} мс, spending_by_categories: "
+          f"{batch_time * 1000:.1f} мс ({loop_time / batch_time:.0f}x)")
@@ -0,0 +1,56 @@
+"""
+Бенчмарк хранилища транзакций в SQLite: время однократного импорта данных в базу данных и время запросов
+страниц "Отчеты" и "Сервисы" (выборка за период, траты по категории, суммы расходов по категориям за месяц)
+к базе данных по индексам в сравнении с расчетом по DataFrame (полным просмотром столбцов).
+Запуск из корня проекта: python -m benchmarks.bench_sql_store [количество строк, по умолчанию 1M]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.bench_date_index import best_time
+from benchmarks.synthetic import generate_transactions, parse_rows
+from src.sql_store import SqliteTransactionStore
+from src.utils import CumulativeSpending, get_slice_of_data
+
+MONTH_START, MONTH_END = datetime(2021, 2, 1), datetime(2021, 2, 28, 23, 59, 59)
+PERIOD_START, PERIOD_END = datetime(2020, 11, 3), datetime(2021, 2, 1)  # 90 дней (страница "Отчеты")
+
+if __name__ == "__main__":
+    n_rows = parse_rows(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    df = generate_transactions(n_rows)
+    temp_dir = tempfile.mkdtemp()
+    try:
+        store = SqliteTransactionStore(os.path.join(temp_dir, "transactions.db"))
+        start = time.perf_counter()
+        store.import_frame(df)
+        import_time = time.perf_counter() - start
+        store.refresh = lambda: False  # type: ignore[method-assign]  # Данные импортированы не из Excel-файла
+
+        def pandas_spending_by_category():
+            slice_df = get_slice_of_data(PERIOD_START, PERIOD_END, df)
+            return slice_df[(slice_df["Сумма платежа"] < 0) & (slice_df["Категория"] == "Супермаркеты")]
+
+        stages = {
+            "выборка за 90 дней": (lambda: get_slice_of_data(PERIOD_START, PERIOD_END, df),
+                                   lambda: store.get_slice(PERIOD_START, PERIOD_END)),
+            "траты по категории": (pandas_spending_by_category,
+                                   lambda: store.spending_by_category("Супермаркеты", PERIOD_START, PERIOD_END)),
+            "расходы по категориям": (
+                lambda: CumulativeSpending(df, ("Категория",)).get_totals([MONTH_START], [MONTH_END]),
+                lambda: store.category_spending(MONTH_START, MONTH_END),
+            ),
+        }
+        print(f"Строк: {n_rows}, импорт в базу данных: {import_time:.1f} с "
+              f"(размер файла {os.path.getsize(store.path_to_db) / 2**20:.0f} МБ)")
+        for name, (pandas_function, sql_function) in stages.items():
+            pandas_time, sql_time = best_time(pandas_function), best_time(sql_function)
+            print(f"{name:22} DataFrame {pandas_time * 1000:9.2f} мс, SQLite {sql_time * 1000:9.2f} мс "
+                  f"({pandas_time / sql_time:5.2f}x)")
+        store.close()
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
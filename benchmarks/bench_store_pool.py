@@ -0,0 +1,44 @@
+"""
+Бенчмарк пула хранилищ наборов данных пользователей: запросы страницы "Сервисы" для многих пользователей
+(частота обращений пользователей - по закону Ципфа) при ограничении памяти пула. Хранилище пользователя
+загружается при первом обращении (из синтетических данных, как из колоночного кеша файла) и удаляется
+из пула при превышении ограничения памяти (LRU).
+Запуск из корня проекта:
+python -m benchmarks.bench_store_pool [пользователей, по умолчанию 2000] [строк на пользователя, 5k] [МБ, 256]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import generate_transactions, parse_rows
+from src.result_cache import ResultCache, set_result_cache
+from src.services import get_high_cashback_categories
+from src.store import TransactionStore, TransactionStorePool, set_store_pool
+
+N_REQUESTS = 10_000  # Количество запросов
+
+if __name__ == "__main__":
+    n_users = parse_rows(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    n_rows = parse_rows(sys.argv[2]) if len(sys.argv) > 2 else 5_000
+    max_memory = int(sys.argv[3]) * 2**20 if len(sys.argv) > 3 else 256 * 2**20
+
+    template = generate_transactions(n_rows)  # Данные пользователей (загрузка - копирование и приведение типов)
+    pool = TransactionStorePool(max_memory=max_memory, loader=lambda dataset_id: TransactionStore(template.copy()))
+    set_store_pool(pool)
+    set_result_cache(ResultCache(max_entries=0))  # Каждый запрос рассчитывается по хранилищу пользователя
+
+    rng = np.random.default_rng(1)
+    users = np.minimum(rng.zipf(1.3, size=N_REQUESTS), n_users) - 1
+    start = time.perf_counter()
+    for user in users:
+        get_high_cashback_categories(None, "2021", "03", dataset_id=f"user_{user}")
+    total_time = time.perf_counter() - start
+
+    print(f"Пользователей: {n_users}, строк на пользователя: {n_rows}, запросов: {N_REQUESTS}")
+    print(f"Загрузок хранилищ: {pool.loads} ({pool.loads / N_REQUESTS:.1%} запросов), удалений из пула: "
+          f"{pool.evictions}")
+    print(f"Хранилищ в пуле: {len(pool)}, память пула: {pool.memory_usage() / 2**20:.0f} МБ "
+          f"(ограничение {max_memory / 2**20:.0f} МБ)")
+    print(f"Среднее время запроса: {total_time / N_REQUESTS * 1000:.3f} мс")
@@ -0,0 +1,156 @@
+"""
+Набор бенчмарков основных функций анализа транзакций на синтетических данных разного объема:
+время выполнения (лучшее из нескольких замеров) и пиковый объем выделенной памяти (tracemalloc) для каждой функции.
+Результаты сравниваются с сохраненными в файле `benchmarks/baseline.json`: функция, время или память которой
+превышают базовые значения больше, чем на допуск, отмечается как регрессия (код завершения - 1).
+Базовые значения зависят от компьютера, поэтому их следует сохранять на том же компьютере (--save-baseline).
+Запуск из корня проекта:
+python -m benchmarks.bench_suite [объемы данных, по умолчанию 10k 1M 10M] [--save-baseline] [--tolerance 0.25]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable
+
+from benchmarks.synthetic import generate_transactions, parse_rows
+from src import data_cache, utils
+from src.reports import spending_by_category
+from src.result_cache import ResultCache, set_result_cache
+from src.services import get_high_cashback_categories
+from src.store import TransactionStore, set_transaction_store
+from src.utils import SHEET_NAME, get_slice_of_data, get_summary_card_data, read_data_file, top_5_transactions_by_sum
+
+PATH_TO_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_SIZES = ["10k", "1M", "10M"]
+DEFAULT_TOLERANCE = 0.25  # Допустимое превышение базовых значений (доля)
+MIN_SECONDS = 0.001  # Время меньше 1 мс не сравнивается с базовым (слишком велика погрешность замера)
+REPEATS = 5  # Количество повторов замера времени (для 10M строк и больше - 3)
+
+MONTH_START, REPORT_DATE = datetime(2021, 4, 1), datetime(2021, 4, 10, 20, 30)  # Страница "Главная"
+PERIOD_START, PERIOD_END = datetime(2020, 11, 3), datetime(2021, 2, 1)  # 90 дней (страница "Отчеты")
+
+
+def get_stages(store: TransactionStore) -> dict[str, Callable[[], Any]]:
+    """Функция получения замеряемых функций (без аргументов) для данных хранилища транзакций."""
+    df = store.transactions
+    month_df = store.get_slice(MONTH_START, REPORT_DATE)
+    return {
+        "read_data_file": read_data_file,  # Чтение из колоночного кеша
+        "get_slice_of_data": lambda: get_slice_of_data(PERIOD_START, PERIOD_END, df),
+        "get_summary_card_data": lambda: get_summary_card_data(month_df),
+        "top_5_transactions_by_sum": lambda: top_5_transactions_by_sum(month_df),
+        # Без записи результата в файл
+        "spending_by_category": lambda: spending_by_category.__wrapped__(None, "Супермаркеты", "01.02.2021"),
+        "get_high_cashback_categories": lambda: get_high_cashback_categories(None, "2021", "01"),
+    }
+
+
+def measure_stage(function: Callable[[], Any], repeats: int) -> dict[str, float]:
+    """
+    Функция замера времени выполнения (лучшее из repeats замеров, в секундах) и пикового объема памяти,
+    выделенной во время выполнения (отдельный запуск с tracemalloc, в МБ).
+    """
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"seconds": min(timings), "peak_mb": peak / 2**20}
+
+
+def run_size(n_rows: int) -> dict[str, dict[str, float]]:
+    """
+    Функция замера всех функций на n_rows синтетических транзакций.
+    Данные записываются в колоночный кеш во временной папке (для `read_data_file`) и в общее хранилище.
+    """
+    df = generate_transactions(n_rows)
+    temp_dir = tempfile.mkdtemp()
+    path_to_excel, cache_dir = utils.PATH_TO_EXCEL, data_cache.PATH_TO_CACHE_DIR
+    try:
+        # Вместо Excel-файла - пустой файл (кеш проверяется по времени изменения и размеру исходного файла)
+        utils.PATH_TO_EXCEL = os.path.join(temp_dir, "operations.xlsx")
+        open(utils.PATH_TO_EXCEL, "wb").close()
+        data_cache.PATH_TO_CACHE_DIR = temp_dir
+        data_cache.save_cached_frame(df, utils.PATH_TO_EXCEL, SHEET_NAME)
+
+        store = TransactionStore(df)
+        set_transaction_store(store)
+        repeats = REPEATS if n_rows < 10_000_000 else 3
+        return {name: measure_stage(function, repeats) for name, function in get_stages(store).items()}
+    finally:
+        utils.PATH_TO_EXCEL, data_cache.PATH_TO_CACHE_DIR = path_to_excel, cache_dir
+        set_transaction_store(None)
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Функция сравнения результатов с базовыми значениями.
+    Возвращает список регрессий в формате "<объем>/<функция>: <показатель> <значение> (база <значение>)".
+    """
+    regressions = []
+    for size, stages in results.items():
+        for name, values in stages.items():
+            base = baseline.get(size, {}).get(name)
+            if base is None:
+                continue
+            if values["seconds"] > max(base["seconds"], MIN_SECONDS) * (1 + tolerance):
+                regressions.append(f"{size}/{name}: время {values['seconds'] * 1000:.2f} мс "
+                                   f"(база {base['seconds'] * 1000:.2f} мс)")
+            if values["peak_mb"] > max(base["peak_mb"], 1.0) * (1 + tolerance):
+                regressions.append(f"{size}/{name}: память {values['peak_mb']:.1f} МБ (база {base['peak_mb']:.1f} МБ)")
+    return regressions
+
+
+def print_results(size: str, stages: dict, baseline: dict) -> None:
+    """Функция вывода результатов для одного объема данных (с отношением к базовым значениям)."""
+    print(f"Строк: {size}")
+    for name, values in stages.items():
+        base = baseline.get(size, {}).get(name)
+        ratio = f"{values['seconds'] / base['seconds']:6.2f}x базы" if base else "  нет базы"
+        print(f"  {name:30} {values['seconds'] * 1000:10.2f} мс {ratio}   пик памяти {values['peak_mb']:9.1f} МБ")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Набор бенчмарков функций анализа транзакций")
+    parser.add_argument("sizes", nargs="*", default=DEFAULT_SIZES, help="объемы данных (10k, 1M, 10M)")
+    parser.add_argument("--save-baseline", action="store_true", help="сохранить результаты как базовые")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="допуск (доля)")
+    parser.add_argument("--baseline", default=PATH_TO_BASELINE, help="файл с базовыми значениями")
+    args = parser.parse_args()
+    set_result_cache(ResultCache(max_entries=0))  # Замеряется расчет, а не чтение результатов из кеша
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+
+    results = {}
+    for size in args.sizes:
+        results[size] = run_size(parse_rows(size))
+        print_results(size, results[size], baseline)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump({**baseline, **results}, file, ensure_ascii=False, indent=4)
+        print(f"Базовые значения сохранены в файл {args.baseline}.")
+        sys.exit(0)
+
+    regressions = compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"Регрессия: {regression}")
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,44 @@
+"""
+Бенчмарк выбора ТОП-5 транзакций по сумме операции: полная сортировка (sort_values + head, прежняя реализация),
+частичная сортировка (`top_n_transactions`) и отобранные ТОП-N транзакций по месяцам хранилища (`get_top_n`).
+Запуск из корня проекта: python -m benchmarks.bench_top_n [количество строк, по умолчанию 10M]
+"""
+
+import sys
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from benchmarks.bench_date_index import best_time
+from benchmarks.synthetic import generate_transactions, parse_rows
+from src.store import TransactionStore
+from src.utils import top_n_transactions
+
+PERIODS = [
+    (datetime(2021, 4, 1), datetime(2021, 4, 10, 20, 30)),  # Начало месяца - дата запроса (страница "Главная")
+    (datetime(2018, 1, 1), datetime(2021, 12, 31, 23, 59, 59)),  # Все транзакции
+]
+
+
+def top_5_by_sorting(df: pd.DataFrame) -> pd.DataFrame:
+    """ТОП-5 успешных транзакций полной сортировкой (прежняя реализация)."""
+    return df[df["Статус"] == "OK"].sort_values(by="Сумма операции с округлением", ascending=False).head(5)
+
+
+if __name__ == "__main__":
+    n_rows = parse_rows(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    store = TransactionStore(generate_transactions(n_rows))
+
+    start = time.perf_counter()
+    store.get_top_n(*PERIODS[0], 5, filters={"Статус": "OK"})
+    print(f"Строк: {n_rows}. Отбор ТОП-N транзакций по месяцам: {time.perf_counter() - start:.2f} с")
+
+    for start_date, end_date in PERIODS:
+        df = store.get_slice(start_date, end_date)
+        sort_time = best_time(top_5_by_sorting, df)
+        partial_time = best_time(top_n_transactions, df, 5, "amount", {"Статус": "OK"})
+        store_time = best_time(store.get_top_n, start_date, end_date, 5, "amount", {"Статус": "OK"})
+        print(f"Период {start_date:%d.%m.%Y} - {end_date:%d.%m.%Y} ({len(df)} строк): сортировка "
+              f"{sort_time * 1000:9.2f} мс, частичная сортировка {partial_time * 1000:8.2f} мс, "
+              f"ТОП-N по месяцам {store_time * 1000:7.3f} мс ({sort_time / store_time:.0f}x)")
@@ -0,0 +1,92 @@
+"""
+Генератор синтетических транзакций для бенчмарков.
+Формирует DataFrame с теми же столбцами и типами данных, что и функция `read_data_file` для файла
+`operations.xlsx` (после приведения типов). Генерация воспроизводима: одинаковые параметры дают одинаковые данные.
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.utils import normalize_transactions
+
+# Категории трат и соответствующие им MCC-коды (None - операции без MCC-кода)
+CATEGORIES = {
+    "Супермаркеты": 5411,
+    "Фастфуд": 5814,
+    "Рестораны": 5812,
+    "Топливо": 5541,
+    "Аптеки": 5912,
+    "Каршеринг": 7512,
+    "Мобильная связь": 4814,
+    "Транспорт": 4111,
+    "Одежда и обувь": 5651,
+    "Развлечения": 7832,
+    "Переводы": None,
+    "Наличные": 6011,
+    "Пополнения": None,
+}
+CARDS = ["*7197", "*4556", "*5091", "*5441", "*1112", "*5507", "*6002", "Карта не указана"]
+CARD_WEIGHTS = [0.70, 0.15, 0.03, 0.01, 0.01, 0.005, 0.005, 0.09]
+DESCRIPTIONS = ["Колхоз", "Магнит", "Пятерочка", "Перекресток", "Лента", "Яндекс Такси", "Мобильная связь",
+                "Перевод Кредитная карта.", "Пополнение через Газпромбанк", "Ozon.ru", "Аптека Вита", "Лукойл"]
+START_DATE = pd.Timestamp("2018-01-01")
+END_DATE = pd.Timestamp("2021-12-31 23:59:59")
+
+
+def generate_transactions(n_rows: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Функция генерации синтетических транзакций.
+    Принимает количество строк и начальное значение генератора случайных чисел.
+    Возвращает DataFrame, отсортированный по убыванию даты операции (как в выгрузке банка).
+    """
+    rng = np.random.default_rng(seed)
+
+    seconds = rng.integers(0, int((END_DATE - START_DATE).total_seconds()), size=n_rows)
+    operation_dates = START_DATE + pd.to_timedelta(np.sort(seconds)[::-1], unit="s")
+
+    category_names = list(CATEGORIES)
+    category_codes = rng.integers(0, len(category_names), size=n_rows)
+    is_income = np.isin(category_codes, [category_names.index("Пополнения")])
+
+    amounts = np.round(rng.lognormal(mean=5.5, sigma=1.2, size=n_rows), 2)
+    payment_amounts = np.where(is_income, amounts, -amounts)
+    mcc_codes = np.array([np.nan if CATEGORIES[name] is None else CATEGORIES[name] for name in category_names])
+
+    # Даты платежа (без времени) формируются по уникальным дням, а не для каждой строки (это намного быстрее)
+    day_codes, unique_days = pd.factorize(operation_dates.normalize())
+    payment_dates = unique_days.strftime("%d.%m.%Y").to_numpy(dtype=object)[day_codes]
+
+    df = pd.DataFrame(
+        {
+            "Дата операции": operation_dates,
+            "Дата платежа": payment_dates,
+            # Столбцы с повторяющимися значениями сразу формируются как category (без промежуточных массивов строк)
+            "Номер карты": pd.Categorical.from_codes(
+                rng.choice(len(CARDS), size=n_rows, p=CARD_WEIGHTS).astype(np.int8), categories=CARDS
+            ),
+            "Статус": pd.Categorical.from_codes(
+                (rng.random(n_rows) >= 0.995).astype(np.int8), categories=["OK", "FAILED"]
+            ),
+            "Сумма операции": payment_amounts,
+            "Валюта операции": "RUB",
+            "Сумма платежа": payment_amounts,
+            "Валюта платежа": "RUB",
+            "Кэшбэк": np.where(rng.random(n_rows) < 0.1, np.round(amounts * 0.01, 2), np.nan),
+            "Категория": pd.Categorical.from_codes(category_codes.astype(np.int8), categories=category_names),
+            "MCC": mcc_codes[category_codes],
+            "Описание": np.array(DESCRIPTIONS, dtype=object)[rng.integers(0, len(DESCRIPTIONS), size=n_rows)],
+            "Бонусы (включая кэшбэк)": (amounts // 100).astype(np.int64),
+            "Округление на инвесткопилку": np.zeros(n_rows, dtype=np.int64),
+            "Сумма операции с округлением": amounts,
+        }
+    )
+    return normalize_transactions(df)
+
+
+def parse_rows(value: str) -> int:
+    """Функция разбора количества строк в формате `10k`, `1M`, `10M` или числом."""
+    multipliers = {"k": 1_000, "m": 1_000_000}
+    suffix = value[-1].lower()
+    if suffix in multipliers:
+        return int(float(value[:-1]) * multipliers[suffix])
+    return int(value)
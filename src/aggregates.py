@@ -0,0 +1,180 @@
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.logging_config import get_logger
+from src.utils import get_filter_mask, get_ranking_values
+
+KEY_COLUMNS = ["Номер карты", "Категория", "Статус", "Знак"]  # Ключи агрегатов внутри месяца
+VALUE_COLUMNS = ["Сумма платежа", "Сумма операции с округлением"]  # Суммируемые столбцы
+COUNT_COLUMN = "Количество"  # Количество транзакций, вошедших в строку агрегата
+TOP_N_CAPACITY = 50  # Количество транзакций с наибольшими значениями показателя, хранимых для каждого месяца
+
+logger = get_logger(__name__, "aggregates.log")
+
+
+def _aggregate_months(df: pd.DataFrame) -> dict[tuple[int, int], pd.DataFrame]:
+    """
+    Функция расчета агрегатов транзакций по месяцам.
+    Группирует транзакции по ключу (год, месяц, номер карты, категория, статус, знак суммы платежа) и считает
+    суммы столбцов VALUE_COLUMNS и количество транзакций.
+    Возвращает словарь {(год, месяц): DataFrame с агрегатами месяца}.
+    """
+    if df.empty or not {"Дата операции", *VALUE_COLUMNS} <= set(df.columns):  # Без дат и сумм агрегаты
+        # не рассчитываются
+        return {}
+    operation_dates = df["Дата операции"]
+    keys = [operation_dates.dt.year.rename("Год"), operation_dates.dt.month.rename("Месяц")]
+    keys += [df[column] for column in KEY_COLUMNS if column in df.columns]  # Ключи, которые есть в данных
+    keys.append(pd.Series(np.sign(df["Сумма платежа"].to_numpy()).astype(np.int8), index=df.index, name="Знак"))
+    # dropna=False - транзакции без категории также учитываются (например, в расходах по картам)
+    grouped = df[VALUE_COLUMNS].groupby(keys, observed=True, dropna=False, sort=True)
+    table = grouped.sum()
+    table[COUNT_COLUMN] = grouped.size()
+    table = table.reset_index()
+
+    months = {}
+    for _, month_table in table.groupby(["Год", "Месяц"], sort=False):
+        month_key = (int(month_table["Год"].to_numpy()[0]), int(month_table["Месяц"].to_numpy()[0]))
+        months[month_key] = month_table.drop(columns=["Год", "Месяц"]).reset_index(drop=True)
+    return months
+
+
+class MonthlyAggregates:
+    """
+    Материализованные агрегаты транзакций по месяцам (суммы и количество транзакций по ключу: год, месяц,
+    номер карты, категория, статус, знак суммы платежа).
+    Агрегаты месяца имеют те же названия столбцов, что и исходные транзакции ("Номер карты", "Категория",
+    "Сумма платежа", "Сумма операции с округлением" и т.д.), поэтому функции анализа транзакций
+    (например, `get_summary_card_data`) принимают их вместо исходных строк и дают тот же результат.
+    """
+
+    def __init__(self, df: pd.DataFrame) -> None:
+        self._months = _aggregate_months(df)
+        logger.debug(f"Рассчитаны агрегаты транзакций за {len(self._months)} мес.")
+
+    def get_month(self, year: int, month: int) -> pd.DataFrame:
+        """
+        Метод получения агрегатов за заданный месяц.
+        Возвращает DataFrame с агрегатами (пустой DataFrame, если транзакций за месяц нет).
+        """
+        month_table = self._months.get((int(year), int(month)))
+        if month_table is None:
+            return pd.DataFrame(columns=KEY_COLUMNS + VALUE_COLUMNS + [COUNT_COLUMN])
+        return month_table
+
+    def add(self, new_rows: pd.DataFrame) -> None:
+        """
+        Метод обновления агрегатов при добавлении новых транзакций.
+        Пересчитываются только месяцы, в которые попали новые транзакции, поэтому время обновления зависит
+        от количества новых транзакций, а не от объема всей истории.
+        """
+        for month_key, new_table in _aggregate_months(new_rows).items():
+            old_table = self._months.get(month_key)
+            if old_table is None:
+                self._months[month_key] = new_table
+                continue
+            combined = pd.concat([old_table, new_table], ignore_index=True)
+            key_columns = [column for column in KEY_COLUMNS if column in combined.columns]
+            grouped = combined.groupby(key_columns, observed=True, dropna=False, sort=True)
+            self._months[month_key] = grouped[VALUE_COLUMNS + [COUNT_COLUMN]].sum().reset_index()
+        logger.debug(f"Агрегаты транзакций обновлены ({len(new_rows)} новых строк).")
+
+    def to_frame(self) -> pd.DataFrame:
+        """Метод получения агрегатов за все месяцы в одном DataFrame (в порядке добавления месяцев)."""
+        if not self._months:
+            return pd.DataFrame(columns=KEY_COLUMNS + VALUE_COLUMNS + [COUNT_COLUMN])
+        return pd.concat(list(self._months.values()), ignore_index=True)
+
+    def __len__(self) -> int:
+        return len(self._months)
+
+
+def _rank_entries(
+    row_ids: np.ndarray, values: np.ndarray, dates: np.ndarray, limit: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Функция выбора не более limit транзакций с наибольшими значениями показателя.
+    При равных значениях раньше идет транзакция с более поздней датой, при равных датах - с меньшим номером
+    строки (т.е. в порядке следования транзакций в выгрузке банка, см. `rank_positions`).
+    """
+    if len(values) > limit:
+        threshold = values[np.argpartition(values, len(values) - limit)[len(values) - limit]]
+        selected = np.flatnonzero(values >= threshold)
+        row_ids, values, dates = row_ids[selected], values[selected], dates[selected]
+    order = np.lexsort((row_ids, ~dates.astype("datetime64[ns]").view(np.int64), -values))[:limit]
+    return row_ids[order], values[order], dates[order]
+
+
+class MonthlyTopTransactions:
+    """
+    Транзакции с наибольшими значениями показателя (не более TOP_N_CAPACITY для каждого месяца), отобранные
+    по условиям `filters` (см. функцию `top_n_transactions`).
+    Транзакции хранятся номерами строк (неизменными при добавлении новых транзакций), значениями показателя
+    и датами операций. При добавлении транзакций пересчитываются только затронутые месяцы: новые транзакции
+    сравниваются с уже отобранными, а не со всеми транзакциями месяца.
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        row_ids: np.ndarray,
+        by: str = "amount",
+        filters: Optional[dict[str, Any]] = None,
+        capacity: int = TOP_N_CAPACITY,
+    ) -> None:
+        self.by = by
+        self.filters = filters
+        self.capacity = capacity
+        self._months: dict[tuple[int, int], tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        self.add(df, row_ids)
+        logger.debug(f"Отобраны ТОП-{capacity} транзакций по показателю {by} за {len(self._months)} мес.")
+
+    def add(self, df: pd.DataFrame, row_ids: np.ndarray) -> None:
+        """
+        Метод обновления отобранных транзакций при добавлении новых транзакций.
+        Принимает новые транзакции и номера их строк в хранилище (транзакции без столбца дат не отбираются).
+        """
+        if df.empty or "Дата операции" not in df.columns:
+            return
+        dates = df["Дата операции"].to_numpy()
+        mask = get_filter_mask(df, self.filters) & ~np.isnat(dates)
+        positions = np.flatnonzero(mask)
+        dates = dates[positions]
+        values = get_ranking_values(df, self.by)[positions]
+        row_ids = np.asarray(row_ids)[positions]
+
+        # Номера месяцев (год * 12 + месяц - 1); транзакции упорядочиваются по месяцам, чтобы разбить их на части
+        month_numbers = dates.astype("datetime64[M]").astype(np.int64)
+        order = np.argsort(month_numbers, kind="stable")
+        month_numbers = month_numbers[order]
+        starts = np.concatenate([[0], np.flatnonzero(np.diff(month_numbers)) + 1])
+        ends = np.append(starts[1:], len(order))
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            if start == end:  # Новых транзакций, удовлетворяющих условиям отбора, нет
+                continue
+            part = order[start:end]
+            year, month = divmod(int(month_numbers[start]), 12)
+            month_key = (year + 1970, month + 1)
+            part_ids, part_values, part_dates = row_ids[part], values[part], dates[part]
+            old_entries = self._months.get(month_key)
+            if old_entries is not None:  # Новые транзакции сравниваются с отобранными ранее
+                part_ids = np.concatenate([old_entries[0], part_ids])
+                part_values = np.concatenate([old_entries[1], part_values])
+                part_dates = np.concatenate([old_entries[2], part_dates])
+            self._months[month_key] = _rank_entries(part_ids, part_values, part_dates, self.capacity)
+
+    def get_month(self, year: int, month: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Метод получения отобранных транзакций за месяц.
+        Возвращает массивы номеров строк и значений показателя (по убыванию значения). Если массивы короче
+        `capacity`, они содержат все транзакции месяца, удовлетворяющие условиям отбора.
+        """
+        entries = self._months.get((int(year), int(month)))
+        if entries is None:
+            return np.array([], dtype=np.int64), np.array([], dtype=float)
+        return entries[0], entries[1]
+
+    def __len__(self) -> int:
+        return len(self._months)
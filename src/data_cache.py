@@ -0,0 +1,162 @@
+import json
+import os
+import shutil
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.logging_config import get_logger
+
+PATH_TO_CACHE_DIR: Optional[str] = None  # Папка для кеша (если None - кеш хранится рядом с исходным файлом)
+CACHE_FORMAT_VERSION = 2  # Версия формата кеша (при изменении формата старый кеш перестраивается)
+META_FILE_NAME = "meta.json"
+
+logger = get_logger(__name__, "data_cache.log")
+
+
+def get_cache_dir(path_to_file: str, sheet_name: str) -> str:
+    """
+    Функция получения пути к папке с кешем для заданного файла и листа.
+    Если задана папка `PATH_TO_CACHE_DIR`, кеш хранится в ней, иначе - рядом с исходным файлом.
+    """
+    cache_name = f"{os.path.basename(path_to_file)}.{sheet_name}.cache"
+    base_dir = PATH_TO_CACHE_DIR if PATH_TO_CACHE_DIR is not None else os.path.dirname(path_to_file)
+    return os.path.join(base_dir, cache_name)
+
+
+def get_file_fingerprint(path_to_file: str) -> dict:
+    """
+    Функция получения "отпечатка" исходного файла (время изменения и размер).
+    По нему определяется, актуален ли кеш.
+    """
+    file_stat = os.stat(path_to_file)
+    return {"mtime_ns": file_stat.st_mtime_ns, "size": file_stat.st_size, "version": CACHE_FORMAT_VERSION}
+
+
+def _is_json_scalar(value: Any) -> bool:
+    """Проверка, что значение можно без потерь сохранить в JSON."""
+    return isinstance(value, (str, int, float, bool))
+
+
+def save_cached_frame(df: pd.DataFrame, path_to_file: str, sheet_name: str) -> bool:
+    """
+    Функция записи DataFrame в колоночный кеш (набор файлов NumPy `.npy` - по одному на столбец).
+    Числовые столбцы и даты сохраняются как есть, текстовые и категориальные - в виде целочисленных кодов
+    и списка уникальных значений.
+    Принимает DataFrame, путь к исходному файлу и имя листа.
+    Возвращает True, если кеш записан, и False, если данные не удалось сохранить.
+    """
+    columns_meta = []
+    arrays = []
+    for column in df.columns:
+        series = df[column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            categories = series.cat.categories.tolist()
+            if not all(_is_json_scalar(value) for value in categories):
+                logger.warning(f"Столбец '{column}' содержит значения, не поддерживаемые кешем. Кеш не записан.")
+                return False
+            columns_meta.append({"name": column, "kind": "category", "categories": categories,
+                                 "ordered": bool(series.cat.ordered)})
+            arrays.append(series.cat.codes.to_numpy())
+        elif series.dtype == object:
+            codes, uniques = pd.factorize(series)  # Пустые значения получают код -1
+            uniques_list = uniques.tolist()
+            if not all(_is_json_scalar(value) for value in uniques_list):
+                logger.warning(f"Столбец '{column}' содержит значения, не поддерживаемые кешем. Кеш не записан.")
+                return False
+            columns_meta.append({"name": column, "kind": "object", "categories": uniques_list})
+            arrays.append(codes.astype(np.int32))
+        elif isinstance(series.dtype, np.dtype):
+            columns_meta.append({"name": column, "kind": "numpy"})
+            arrays.append(series.to_numpy())
+        else:
+            logger.warning(f"Тип данных столбца '{column}' ({series.dtype}) не поддерживается кешем. Кеш не записан.")
+            return False
+
+    cache_dir = get_cache_dir(path_to_file, sheet_name)
+    tmp_dir = f"{cache_dir}.tmp-{os.getpid()}"  # Кеш сначала пишется во временную папку, затем она переименовывается
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    for index, array in enumerate(arrays):
+        np.save(os.path.join(tmp_dir, f"col_{index:03d}.npy"), array, allow_pickle=False)
+
+    meta = {"source": get_file_fingerprint(path_to_file), "rows": len(df), "columns": columns_meta}
+    with open(os.path.join(tmp_dir, META_FILE_NAME), "w", encoding="utf-8") as file:
+        json.dump(meta, file, ensure_ascii=False)
+
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.replace(tmp_dir, cache_dir)
+    logger.debug(f"Записан кеш данных файла {path_to_file} (лист '{sheet_name}') в папку {cache_dir}.")
+
+    return True
+
+
+def load_cached_frame(path_to_file: str, sheet_name: str, check_source: bool = True) -> Optional[pd.DataFrame]:
+    """
+    Функция чтения DataFrame из колоночного кеша.
+    Числовые столбцы и коды текстовых столбцов отображаются в память (memory-map) без копирования файла.
+    Принимает путь к исходному файлу, имя листа и признак проверки актуальности кеша (check_source=False -
+    кеш читается, даже если исходный файл изменился).
+    Возвращает DataFrame или None, если кеша нет или он устарел (исходный файл изменился).
+    """
+    cache_dir = get_cache_dir(path_to_file, sheet_name)
+    try:
+        with open(os.path.join(cache_dir, META_FILE_NAME), "r", encoding="utf-8") as file:
+            meta = json.load(file)
+        if check_source and meta["source"] != get_file_fingerprint(path_to_file):
+            logger.debug(f"Кеш файла {path_to_file} устарел.")
+            return None
+
+        data: dict[str, Any] = {}
+        for index, column_meta in enumerate(meta["columns"]):
+            # np.asarray - представление отображенного в память массива без копирования данных
+            array = np.asarray(
+                np.load(os.path.join(cache_dir, f"col_{index:03d}.npy"), mmap_mode="r", allow_pickle=False)
+            )
+            if column_meta["kind"] == "category":
+                data[column_meta["name"]] = pd.Categorical.from_codes(
+                    array, categories=column_meta["categories"], ordered=column_meta["ordered"]
+                )
+            elif column_meta["kind"] == "object":
+                # Восстановление исходных значений по кодам (код -1 соответствует пустому значению)
+                uniques = np.array(column_meta["categories"] + [np.nan], dtype=object)
+                data[column_meta["name"]] = uniques[array]
+            else:
+                data[column_meta["name"]] = array
+    except (OSError, ValueError, KeyError) as error_info:
+        logger.debug(f"Кеш файла {path_to_file} не прочитан: {error_info}.")
+        return None
+
+    df = pd.DataFrame(data, copy=False)
+    logger.debug(f"Выполнено чтение кеша файла {path_to_file} из папки {cache_dir}.")
+
+    return df
+
+
+def append_cached_frame(new_rows: pd.DataFrame, path_to_file: str, sheet_name: str, previous_rows: int,
+                        prepend: bool = True) -> bool:
+    """
+    Функция добавления строк в колоночный кеш после изменения исходного файла (например, новой выгрузки из банка,
+    в которой к уже загруженным транзакциям добавились новые): кеш записывается с новыми строками и отпечатком
+    измененного файла, поэтому следующее чтение берет данные из кеша без повторного чтения Excel-файла.
+    Принимает новые строки, путь к исходному файлу, имя листа, количество строк в кеше до изменения файла
+    (кеш с другим количеством строк или столбцами не соответствует загруженным данным и не дополняется)
+    и порядок строк (prepend=True - новые строки перед строками кеша, как новые транзакции в начале листа
+    выгрузки банка).
+    Возвращает True, если кеш записан, и False, если кеш не дополнен.
+    """
+    cached = load_cached_frame(path_to_file, sheet_name, check_source=False)
+    if cached is None or len(cached) != previous_rows or list(cached.columns) != list(new_rows.columns):
+        logger.debug(f"Кеш файла {path_to_file} не соответствует загруженным данным и не дополнен.")
+        return False
+
+    parts = [new_rows, cached] if prepend else [cached, new_rows]
+    for column in cached.columns:
+        if isinstance(cached[column].dtype, pd.CategoricalDtype):  # Объединение категорий (как при чтении файла -
+            # по возрастанию значений), чтобы столбец сохранил тип category
+            new_values = pd.Index(np.asarray(new_rows[column].dropna().unique(), dtype=object))
+            dtype = pd.CategoricalDtype(cached[column].cat.categories.union(new_values),
+                                        ordered=cached[column].cat.ordered)
+            parts = [part.assign(**{column: part[column].astype(dtype)}) for part in parts]
+    return save_cached_frame(pd.concat(parts, ignore_index=True), path_to_file, sheet_name)
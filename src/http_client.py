@@ -0,0 +1,183 @@
+import threading
+import time
+from functools import cache
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+from src.logging_config import get_logger
+
+if TYPE_CHECKING:
+    import requests
+    from urllib3.util.retry import Retry
+
+
+REQUEST_TIMEOUT = (3.05, 10)  # Таймауты API-запросов в секундах (на установку соединения и на чтение ответа)
+RETRIES = 3  # Количество повторов запроса при ошибке соединения или ответе со статусом из RETRY_STATUSES
+BACKOFF_FACTOR = 0.5  # Задержка перед повтором: BACKOFF_FACTOR * 2 ** (номер повтора - 1) секунд
+RETRY_STATUSES = (429, 500, 502, 503, 504)  # Статусы ответа, при которых запрос повторяется
+MAX_RETRY_AFTER = 5.0  # Максимальная задержка перед повтором (в секундах), в т.ч. по заголовку ответа Retry-After
+POOL_MAXSIZE = 4  # Максимальное количество открытых соединений с одним сервером (равно числу потоков в views)
+
+logger = get_logger(__name__, "http_client.log")
+
+
+@cache
+def _get_retry_class() -> Callable[..., "Retry"]:
+    """
+    Функция получения класса правил повтора запросов: в отличие от `urllib3.util.retry.Retry`, задержка
+    по заголовку ответа Retry-After не больше max_retry_after секунд (сервер может указать задержку в несколько
+    минут или часов, и поток формирования страницы ожидал бы ее). Класс создается при первом вызове
+    (модуль urllib3 загружается при создании HTTP-клиента).
+    """
+    from urllib3.util.retry import Retry
+
+    class CappedRetry(Retry):
+        def __init__(self, *args: Any, max_retry_after: float = MAX_RETRY_AFTER, **kwargs: Any) -> None:
+            super().__init__(*args, **kwargs)
+            self.max_retry_after = max_retry_after
+
+        def new(self, **kwargs: Any) -> "CappedRetry":
+            retry = super().new(**kwargs)  # Новый объект создается после каждого повтора
+            retry.max_retry_after = self.max_retry_after
+            return retry
+
+        def get_retry_after(self, response: Any) -> Optional[float]:
+            retry_after = super().get_retry_after(response)
+            return min(retry_after, self.max_retry_after) if retry_after is not None else None
+
+    return CappedRetry
+
+
+class HttpClient:
+    """
+    HTTP-клиент для API-запросов к внешним сервисам (Exchange Rates Data, Marketstack).
+    Использует общую сессию `requests.Session`: соединения с сервером сохраняются (keep-alive) и используются
+    повторно, поэтому DNS-запрос и установка TCP/TLS-соединения выполняются только для первого запроса.
+    Запросы, завершившиеся ошибкой соединения или статусом из RETRY_STATUSES, повторяются с экспоненциально
+    растущей задержкой (или задержкой из заголовка ответа Retry-After); задержка не больше max_retry_after
+    секунд. Метод `get_stats` возвращает счетчики запросов, повторов, времени ответа
+    и повторного использования соединений.
+    """
+
+    def __init__(
+        self,
+        retries: int = RETRIES,
+        backoff_factor: float = BACKOFF_FACTOR,
+        pool_maxsize: int = POOL_MAXSIZE,
+        timeout: tuple[float, float] = REQUEST_TIMEOUT,
+        max_retry_after: float = MAX_RETRY_AFTER,
+    ) -> None:
+        # Модули requests и urllib3 импортируются при создании клиента (их загрузка замедляет запуск программы)
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.timeout = timeout
+        retry = _get_retry_class()(
+            total=retries,
+            backoff_factor=backoff_factor,
+            backoff_max=max_retry_after,
+            max_retry_after=max_retry_after,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=["GET"],
+            raise_on_status=False,  # После последнего повтора возвращается ответ сервера (а не исключение)
+        )
+        self._adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_maxsize, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", self._adapter)
+        self.session.mount("https://", self._adapter)
+
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._errors = 0
+        self._retries = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+    def get(self, url: str, **kwargs: Any) -> "requests.Response":
+        """
+        Метод выполнения GET-запроса.
+        Принимает адрес и параметры запроса `requests` (params, headers и т.д.; по умолчанию timeout=REQUEST_TIMEOUT).
+        Возвращает ответ сервера. При ошибке соединения (после всех повторов) выбрасывает `requests.RequestException`.
+        """
+        import requests  # Модуль уже загружен при создании клиента
+
+        kwargs.setdefault("timeout", self.timeout)
+        start = time.perf_counter()
+        try:
+            response = self.session.get(url, **kwargs)
+        except requests.RequestException:
+            self._record(time.perf_counter() - start, retries=0, error=True)
+            raise
+        # История повторов хранится в объекте Retry, который urllib3 возвращает вместе с ответом
+        retry = getattr(response.raw, "retries", None)
+        retries = len(retry.history) if retry is not None else 0
+        self._record(time.perf_counter() - start, retries=retries, error=response.status_code != 200)
+        logger.debug(f"GET {url}: статус {response.status_code}, повторов {retries}.")
+        return response
+
+    def _record(self, latency: float, retries: int, error: bool) -> None:
+        """Метод обновления счетчиков после выполнения запроса."""
+        with self._lock:
+            self._requests += 1
+            self._errors += int(error)
+            self._retries += retries
+            self._latency_total += latency
+            self._latency_max = max(self._latency_max, latency)
+
+    def _count_connections(self) -> tuple[int, int]:
+        """Метод подсчета открытых соединений и отправленных запросов (с повторами) по всем пулам соединений."""
+        pools = self._adapter.poolmanager.pools
+        opened = sent = 0
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                opened += pool.num_connections
+                sent += pool.num_requests
+        return opened, sent
+
+    def get_stats(self) -> dict:
+        """
+        Метод получения счетчиков HTTP-клиента.
+        Возвращает словарь: количество запросов, ответов с ошибкой, повторов, открытых и повторно использованных
+        соединений, суммарное, среднее и максимальное время ответа в секундах.
+        """
+        opened, sent = self._count_connections()
+        with self._lock:
+            return {
+                "requests": self._requests,
+                "errors": self._errors,
+                "retries": self._retries,
+                "connections_opened": opened,
+                "connections_reused": max(sent - opened, 0),
+                "latency_total": self._latency_total,
+                "latency_avg": self._latency_total / self._requests if self._requests else 0.0,
+                "latency_max": self._latency_max,
+            }
+
+    def close(self) -> None:
+        """Метод закрытия всех соединений сессии."""
+        self.session.close()
+
+
+_http_client: Optional[HttpClient] = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """Функция получения общего HTTP-клиента (создается при первом обращении)."""
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None:
+            _http_client = HttpClient()
+        return _http_client
+
+
+def set_http_client(client: Optional[HttpClient]) -> None:
+    """
+    Функция замены общего HTTP-клиента (прежний клиент закрывается).
+    Если передан None, клиент будет создан заново при обращении.
+    """
+    global _http_client
+    with _http_client_lock:
+        if _http_client is not None and _http_client is not client:
+            _http_client.close()
+        _http_client = client
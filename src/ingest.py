@@ -0,0 +1,167 @@
+from collections import Counter
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.data_cache import append_cached_frame
+from src.logging_config import get_logger
+from src.result_cache import get_result_cache
+from src.store import TransactionStore, get_transaction_store
+from src.streaming import iter_excel_chunks, normalize_chunks
+from src.utils import PATH_TO_EXCEL, SHEET_NAME, get_dataset_path
+
+INGEST_CHUNK_SIZE = 1_000  # Количество строк Excel-файла, читаемых за один раз при поиске новых транзакций
+# Столбцы, по которым определяется, что транзакция уже загружена ("отпечаток" строки)
+FINGERPRINT_COLUMNS = ["Дата операции", "Дата платежа", "Номер карты", "Статус", "Сумма операции", "Сумма платежа",
+                       "Категория", "Описание", "Сумма операции с округлением"]
+
+logger = get_logger(__name__, "ingest.log")
+
+
+def fingerprint_rows(df: pd.DataFrame) -> np.ndarray:
+    """
+    Функция получения "отпечатков" транзакций (64-битных хешей значений столбцов FINGERPRINT_COLUMNS).
+    Числовые столбцы приводятся к float64, остальные - к строкам, поэтому отпечатки не зависят от типов
+    столбцов (например, category в хранилище и object в прочитанной части файла).
+    """
+    columns = {}
+    for column in FINGERPRINT_COLUMNS:
+        if column in df.columns:
+            series = df[column]
+            if pd.api.types.is_numeric_dtype(series) and not isinstance(series.dtype, pd.CategoricalDtype):
+                series = series.astype("float64")
+            columns[column] = series.astype(str)
+    return pd.util.hash_pandas_object(pd.DataFrame(columns, index=df.index), index=False).to_numpy()
+
+
+def _align_dtypes(new_rows: pd.DataFrame, reference: pd.DataFrame) -> pd.DataFrame:
+    """
+    Функция приведения столбцов новых транзакций к типам NumPy столбцов хранилища (например, столбец "Кэшбэк"
+    без значений в прочитанной части файла имеет тип object, а в хранилище - float64).
+    """
+    columns = {}
+    for column in new_rows.columns:
+        if column in reference.columns and isinstance(reference[column].dtype, np.dtype):
+            if new_rows[column].dtype != reference[column].dtype:
+                try:
+                    columns[column] = new_rows[column].astype(reference[column].dtype)
+                except (TypeError, ValueError):  # Если значения нельзя привести к типу, столбец не изменяется
+                    pass
+    return new_rows.assign(**columns) if columns else new_rows
+
+
+def get_new_rows(
+    store: TransactionStore,
+    path: str = PATH_TO_EXCEL,
+    sheet_name: str = SHEET_NAME,
+    chunk_size: int = INGEST_CHUNK_SIZE,
+    sorted_descending: bool = True,
+) -> pd.DataFrame:
+    """
+    Функция получения из Excel-файла транзакций, которых еще нет в хранилище.
+    Граница загруженных данных - самая поздняя дата операции в хранилище: новыми считаются транзакции с более
+    поздней датой, а транзакции с той же датой сравниваются по "отпечаткам" с транзакциями хранилища за эту дату.
+    В выгрузке банка транзакции упорядочены по убыванию даты (sorted_descending=True), поэтому новые транзакции
+    находятся в начале листа, и чтение файла прекращается на первой части с более ранними транзакциями:
+    время работы зависит от количества новых транзакций, а не от объема всей истории.
+    Возвращает DataFrame с новыми транзакциями (в порядке следования в файле, типы столбцов - как в хранилище).
+    """
+    return _scan_new_rows(store, path, sheet_name, chunk_size, sorted_descending, check_file_end=False)[0]
+
+
+def _scan_new_rows(
+    store: TransactionStore,
+    path: str,
+    sheet_name: str,
+    chunk_size: int,
+    sorted_descending: bool,
+    check_file_end: bool = True,
+) -> tuple[pd.DataFrame, Optional[Counter]]:
+    """
+    Функция поиска новых транзакций в Excel-файле (см. `get_new_rows`).
+    Если чтение прекращено на полной части файла, при check_file_end=True читается следующая часть, чтобы
+    проверить, что файл прочитан до конца.
+    Возвращает новые транзакции и количество остальных прочитанных транзакций с каждым отпечатком
+    (None, если файл прочитан не до конца или это не проверялось).
+    """
+    last_rows = store.get_last_rows()
+    high_water_mark = last_rows["Дата операции"].iloc[0] if not last_rows.empty else None
+    # Количество уже загруженных транзакций с каждым отпечатком (одинаковые транзакции могут повторяться)
+    known_fingerprints = Counter(fingerprint_rows(last_rows).tolist())
+
+    parts = []
+    read_fingerprints: Counter = Counter()  # Отпечатки прочитанных транзакций, которые не новые
+    read_to_end = True
+    n_read_rows = 0
+    chunks = normalize_chunks(iter_excel_chunks(path, sheet_name, chunk_size))
+    for chunk in chunks:
+        n_read_rows += len(chunk)
+        if high_water_mark is None:  # Если хранилище пустое, все транзакции - новые
+            parts.append(chunk)
+            continue
+        dates = chunk["Дата операции"]
+        is_new = (dates > high_water_mark).to_numpy()
+        same_date_positions = np.flatnonzero((dates == high_water_mark).to_numpy())
+        for position, fingerprint in zip(same_date_positions, fingerprint_rows(chunk.iloc[same_date_positions])):
+            if known_fingerprints[fingerprint] > 0:  # Транзакция уже загружена
+                known_fingerprints[fingerprint] -= 1
+            else:
+                is_new[position] = True
+        if is_new.any():
+            parts.append(chunk[is_new])
+        read_fingerprints.update(fingerprint_rows(chunk[~is_new]).tolist())
+        if sorted_descending and (dates < high_water_mark).any():  # Дальше в файле - только загруженные транзакции
+            if len(chunk) == chunk_size and (not check_file_end or next(chunks, None) is not None):
+                read_to_end = False
+            break
+    chunks.close()  # Закрытие Excel-файла (если чтение прекращено досрочно)
+    logger.debug(f"Прочитано {n_read_rows} строк файла {path} (граница загруженных данных: {high_water_mark}).")
+
+    new_rows = _align_dtypes(pd.concat(parts, ignore_index=True), store.transactions) if parts \
+        else store.transactions.iloc[0:0]
+    return new_rows, read_fingerprints if read_to_end else None
+
+
+def ingest_new_rows(
+    store: Optional[TransactionStore] = None,
+    path: Optional[str] = None,
+    sheet_name: str = SHEET_NAME,
+    chunk_size: int = INGEST_CHUNK_SIZE,
+    sorted_descending: bool = True,
+    dataset_id: Optional[str] = None,
+) -> int:
+    """
+    Функция добавления в хранилище транзакций из Excel-файла, которых в нем еще нет (например, после новой
+    выгрузки из банка), без повторной загрузки всей истории.
+    Принимает хранилище транзакций (None - хранилище набора данных dataset_id, по умолчанию - общее хранилище),
+    путь к файлу (None - файл набора данных dataset_id, см. `get_dataset_path`) и параметры чтения файла
+    (см. `get_new_rows`).
+    Накопленные суммы расходов, ТОП-N транзакций по месяцам и индекс дат хранилища обновляются только для новых
+    транзакций. Новые транзакции дописываются в кеш данных файла (см. `append_cached_frame`), только если файл
+    прочитан до конца и остальные его транзакции совпадают с транзакциями хранилища: иначе изменения файла,
+    которые не были прочитаны (например, транзакции с более ранней датой, добавленные банком позже, или
+    исправления загруженных транзакций), не попали бы в кеш, и кеш не дополняется - он устаревает
+    и перестраивается при следующем чтении файла. Одновременные загрузки в одно хранилище выполняются по очереди.
+    Возвращает количество добавленных транзакций.
+    """
+    store = store if store is not None else get_transaction_store(dataset_id)
+    path = path if path is not None else get_dataset_path(dataset_id)
+    # Поиск и добавление новых транзакций - одна операция: иначе одновременные загрузки из файла находят
+    # одни и те же новые транзакции и добавляют их дважды
+    with store.ingest_lock:
+        n_old_rows = len(store)
+        new_rows, read_fingerprints = _scan_new_rows(store, path, sheet_name, chunk_size, sorted_descending)
+        # Файл - транзакции хранилища и новые транзакции (других изменений в файле нет)
+        only_new_rows = read_fingerprints is not None and read_fingerprints == Counter(
+            fingerprint_rows(store.transactions).tolist()
+        )
+        store.append(new_rows)
+        if len(new_rows):
+            if only_new_rows:  # Новые транзакции дописываются в кеш данных файла (следующий запуск не читает
+                # весь Excel-файл)
+                append_cached_frame(new_rows, path, sheet_name, n_old_rows, prepend=sorted_descending)
+            # Результаты, рассчитанные по прежней версии данных, больше не запрашиваются
+            get_result_cache().invalidate_store(store.uid)
+    logger.info(f"В хранилище добавлено {len(new_rows)} новых транзакций из файла {path}.")
+    return len(new_rows)
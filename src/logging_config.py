@@ -0,0 +1,118 @@
+import atexit
+import io
+import logging
+import os
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional, cast
+
+LOGS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "logs")
+LOG_FORMAT = "%(asctime)s - %(filename)s - %(funcName)s - %(levelname)s: %(message)s"
+LOG_MAX_BYTES = 5 * 1024 * 1024  # Размер файла журнала, при котором он переименовывается в архивный (.1, .2, ...)
+LOG_BACKUP_COUNT = 3  # Количество архивных файлов каждого журнала
+
+_log_files: dict[str, str] = {}  # Имя логгера - имя файла журнала в папке LOGS_DIR
+_log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+_listener: Optional[QueueListener] = None
+_listener_lock = threading.Lock()
+
+
+class _RotatingFileHandler(RotatingFileHandler):
+    """
+    Обработчик записи в файл журнала с ограничением размера. Файл открывается функцией `io.open`, а не встроенной
+    функцией `open`: файл открывается в потоке записи журналов, и замена `open` в вызывающем потоке (например,
+    в тестах) не должна влиять на запись журналов.
+    """
+
+    def _open(self) -> io.TextIOWrapper:
+        stream = io.open(self.baseFilename, self.mode, encoding=self.encoding, errors=self.errors)
+        return cast(io.TextIOWrapper, stream)
+
+
+class _FileRouter(logging.Handler):
+    """
+    Обработчик записей журнала в потоке `QueueListener`: запись добавляется в файл журнала модуля, который
+    ее создал. Файл открывается (в режиме добавления) при первой записи в него. Размер файла ограничен
+    LOG_MAX_BYTES: заполненный файл переименовывается в архивный, хранятся LOG_BACKUP_COUNT архивных файлов.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._handlers: dict[str, _RotatingFileHandler] = {}
+
+    def emit(self, record: logging.LogRecord) -> None:
+        filename = _log_files.get(record.name)
+        if filename is None:
+            return
+        handler = self._handlers.get(filename)
+        if handler is None:
+            os.makedirs(LOGS_DIR, exist_ok=True)
+            handler = _RotatingFileHandler(os.path.join(LOGS_DIR, filename), "a", maxBytes=LOG_MAX_BYTES,
+                                           backupCount=LOG_BACKUP_COUNT, encoding="utf-8")
+            handler.setFormatter(logging.Formatter(LOG_FORMAT))
+            self._handlers[filename] = handler
+        handler.handle(record)
+
+    def close(self) -> None:
+        for handler in self._handlers.values():
+            handler.close()
+        self._handlers.clear()
+        super().close()
+
+
+class _LazyQueueHandler(QueueHandler):
+    """
+    Обработчик, передающий записи журнала в очередь (без записи на диск в вызывающем потоке).
+    Поток записи в файлы (`QueueListener`) запускается при первой записи журнала.
+    """
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        start_logging()
+        super().enqueue(record)
+
+
+_queue_handler = _LazyQueueHandler(_log_queue)
+
+
+def get_logger(name: str, filename: str) -> logging.Logger:
+    """
+    Функция получения логгера модуля (уровень DEBUG).
+    Принимает имя логгера (обычно __name__) и имя файла журнала в папке `logs`.
+    При импорте модуля файл журнала не открывается: записи передаются через очередь в отдельный поток,
+    который запускается и открывает файл при первой записи журнала.
+    """
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.DEBUG)
+    with _listener_lock:
+        _log_files[name] = filename
+        if _queue_handler not in logger.handlers:
+            logger.addHandler(_queue_handler)
+    return logger
+
+
+def start_logging() -> None:
+    """Функция запуска потока записи журналов в файлы (если он еще не запущен)."""
+    global _listener
+    if _listener is not None:
+        return
+    with _listener_lock:
+        if _listener is None:
+            listener = QueueListener(_log_queue, _FileRouter())
+            listener.start()
+            _listener = listener
+
+
+@atexit.register
+def stop_logging() -> None:
+    """
+    Функция записи оставшихся записей журналов, закрытия файлов и остановки потока записи
+    (при следующей записи журнала поток запускается заново).
+    """
+    global _listener
+    with _listener_lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
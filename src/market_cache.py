@@ -0,0 +1,249 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional, Protocol
+
+from src.logging_config import get_logger
+from src.settings import get_env
+
+CURRENCIES_TTL = 15 * 60  # Время актуальности курсов валют в секундах (курсы меняются несколько раз в час)
+STOCKS_TTL = 12 * 60 * 60  # Время актуальности курсов акций в секундах (End-of-Day Data меняются раз в день)
+MAX_STALE = 24 * 60 * 60  # Максимальный возраст устаревших данных, которые выдаются до окончания их обновления
+MEMORY_MAX_ENTRIES = 1000  # Максимальное количество значений кеша в памяти (наборов тикеров пользователей)
+
+logger = get_logger(__name__, "market_cache.log")
+
+
+class CacheBackend(Protocol):
+    """Хранилище кеша: значение хранится вместе со временем его получения (в секундах, time.time())."""
+
+    def get(self, key: str) -> Optional[tuple[list[dict], float]]:
+        """Метод получения значения и времени его получения (None, если значения нет)."""
+        ...
+
+    def set(self, key: str, value: list[dict], stored_at: float) -> None:
+        """Метод записи значения."""
+        ...
+
+    def clear(self) -> None:
+        """Метод удаления всех значений."""
+        ...
+
+
+def copy_value(value: list[dict]) -> list[dict]:
+    """Функция копирования значения кеша (список словарей с курсами), чтобы изменение копии не затрагивало кеш."""
+    return [dict(item) for item in value]
+
+
+class MemoryBackend:
+    """
+    Хранилище кеша в памяти процесса (LRU, не больше max_entries значений: ключи - наборы тикеров, которые
+    различаются у пользователей). Значения копируются при записи и чтении.
+    """
+
+    def __init__(self, max_entries: int = MEMORY_MAX_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[list[dict], float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[tuple[list[dict], float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+        return copy_value(entry[0]), entry[1]
+
+    def set(self, key: str, value: list[dict], stored_at: float) -> None:
+        entry = (copy_value(value), stored_at)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class SqliteBackend:
+    """Хранилище кеша в файле SQLite (общее для нескольких процессов)."""
+
+    def __init__(self, path_to_db: str) -> None:
+        self.path_to_db = path_to_db
+        self._execute(
+            "CREATE TABLE IF NOT EXISTS market_data (key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL)"
+        )
+
+    def _execute(self, query: str, parameters: tuple = ()) -> list:
+        """Метод выполнения SQL-запроса в отдельном соединении (соединения SQLite нельзя делить между потоками)."""
+        import sqlite3  # Импорт только при использовании кеша в файле SQLite
+
+        connection = sqlite3.connect(self.path_to_db, timeout=5)
+        try:
+            with connection:  # Транзакция фиксируется при выходе из блока
+                return connection.execute(query, parameters).fetchall()
+        finally:
+            connection.close()
+
+    def get(self, key: str) -> Optional[tuple[list[dict], float]]:
+        rows = self._execute("SELECT value, stored_at FROM market_data WHERE key = ?", (key,))
+        if not rows:
+            return None
+        return json.loads(rows[0][0]), rows[0][1]
+
+    def set(self, key: str, value: list[dict], stored_at: float) -> None:
+        self._execute(
+            "INSERT OR REPLACE INTO market_data (key, value, stored_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value, ensure_ascii=False), stored_at),
+        )
+
+    def clear(self) -> None:
+        self._execute("DELETE FROM market_data")
+
+
+def make_cache_key(endpoint: str, base_currency: str, symbols: list[str]) -> str:
+    """Функция формирования ключа кеша по адресу API, базовой валюте и набору тикеров."""
+    return json.dumps([endpoint, base_currency, sorted(symbols)], ensure_ascii=False)
+
+
+class MarketDataCache:
+    """
+    Кеш ответов API курсов валют и акций с временем актуальности (TTL) для каждого источника.
+    Значение ищется последовательно во всех хранилищах (сначала в памяти, затем, если задано, в SQLite).
+    Если значение устарело (но не старше MAX_STALE), оно возвращается сразу, а обновление запускается в фоне
+    (stale-while-revalidate), поэтому после заполнения кеша API-запрос не задерживает формирование страницы.
+    Если значения нет, API-запрос по ключу выполняется одним потоком, а остальные потоки ожидают его результат.
+    Пустые ответы (ошибки API) в кеш не записываются.
+    """
+
+    def __init__(self, backends: list[CacheBackend], max_stale: float = MAX_STALE) -> None:
+        self.backends = backends
+        self.max_stale = max_stale
+        self._refreshing: set[str] = set()  # Ключи, обновление которых уже запущено в фоне
+        self._fetching: dict[str, Future] = {}  # Результаты API-запросов значений, которых нет в кеше
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="market-cache")
+
+    def _lookup(self, key: str) -> Optional[tuple[list[dict], float]]:
+        """Метод поиска значения во всех хранилищах (найденное значение копируется в предыдущие хранилища)."""
+        for index, backend in enumerate(self.backends):
+            entry = backend.get(key)
+            if entry is not None:
+                for previous_backend in self.backends[:index]:
+                    previous_backend.set(key, *entry)
+                return entry
+        return None
+
+    def _store(self, key: str, value: list[dict]) -> None:
+        """Метод записи значения во все хранилища."""
+        stored_at = time.time()
+        for backend in self.backends:
+            backend.set(key, value, stored_at)
+
+    def _refresh(self, key: str, fetch: Callable[[], list[dict]]) -> list[dict]:
+        """Метод получения нового значения от API и записи его в кеш (если ответ не пустой)."""
+        try:
+            value = fetch()
+            if value:
+                self._store(key, value)
+            return value
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get_or_fetch(self, key: str, ttl: float, fetch: Callable[[], list[dict]]) -> list[dict]:
+        """
+        Метод получения значения из кеша или от API.
+        Принимает ключ кеша, время актуальности значения в секундах и функцию получения значения от API.
+        """
+        entry = self._lookup(key)
+        if entry is not None:
+            value, stored_at = entry
+            age = time.time() - stored_at
+            if age < ttl:
+                logger.debug(f"Данные {key} получены из кеша.")
+                return value
+            if age < ttl + self.max_stale:
+                with self._lock:
+                    start_refresh = key not in self._refreshing
+                    self._refreshing.add(key)
+                if start_refresh:
+                    self._executor.submit(self._refresh, key, fetch)
+                    logger.debug(f"Данные {key} устарели. Запущено их обновление в фоне.")
+                return value
+
+        return self._fetch_once(key, ttl, fetch)
+
+    def _fetch_once(self, key: str, ttl: float, fetch: Callable[[], list[dict]]) -> list[dict]:
+        """
+        Метод получения от API значения, которого нет в кеше: API-запрос выполняет первый поток, остальные
+        потоки, запросившие тот же ключ, ожидают его результат.
+        """
+        with self._lock:
+            future = self._fetching.get(key)
+            first = future is None
+            if future is None:
+                future = self._fetching[key] = Future()
+                self._refreshing.add(key)
+        if not first:
+            logger.debug(f"Данных {key} нет в кеше. Ожидается результат API-запроса другого потока.")
+            return copy_value(future.result())
+
+        try:
+            entry = self._lookup(key)  # Значение могло быть записано, пока поток ожидал блокировку
+            if entry is not None and time.time() - entry[1] < ttl:
+                with self._lock:
+                    self._refreshing.discard(key)
+                value = entry[0]
+            else:
+                logger.debug(f"Данных {key} нет в кеше. Выполняется API-запрос.")
+                value = self._refresh(key, fetch)
+        except BaseException as error_info:
+            future.set_exception(error_info)
+            raise
+        finally:
+            with self._lock:
+                self._fetching.pop(key, None)
+        future.set_result(value)
+        return copy_value(value)
+
+    def clear(self) -> None:
+        """Метод очистки всех хранилищ кеша."""
+        for backend in self.backends:
+            backend.clear()
+
+
+_market_data_cache: Optional[MarketDataCache] = None
+_market_data_cache_lock = threading.Lock()
+
+
+def get_market_data_cache() -> MarketDataCache:
+    """
+    Функция получения общего кеша данных API.
+    Кеш хранится в памяти процесса. Если задана переменная окружения MARKET_CACHE_DB (в т.ч. в файле `.env`),
+    данные дополнительно хранятся в указанном файле SQLite и доступны другим процессам.
+    """
+    global _market_data_cache
+    with _market_data_cache_lock:
+        if _market_data_cache is None:
+            backends: list[CacheBackend] = [MemoryBackend()]
+            path_to_db = get_env("MARKET_CACHE_DB")  # Путь к файлу SQLite из .env-файла
+            if path_to_db:
+                backends.append(SqliteBackend(path_to_db))
+            _market_data_cache = MarketDataCache(backends)
+        return _market_data_cache
+
+
+def set_market_data_cache(cache: Optional[MarketDataCache]) -> None:
+    """Функция замены общего кеша данных API (если передан None, кеш будет создан заново при обращении)."""
+    global _market_data_cache
+    with _market_data_cache_lock:
+        _market_data_cache = cache
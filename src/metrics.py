@@ -0,0 +1,282 @@
+import atexit
+import cProfile
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Generator, Optional, TypeVar, cast
+
+from src.logging_config import LOGS_DIR, get_logger
+from src.settings import get_env
+
+PROFILE_MODES = ("cprofile", "pyinstrument")  # Режимы профилирования (переменная окружения PROFILE_MODE)
+ENABLED_VALUES = ("1", "true", "yes", "on")  # Значения переменной окружения METRICS_MEMORY, включающие замер памяти
+METRICS_PREFIX = "financial_assistant"  # Префикс названий метрик в формате Prometheus
+
+logger = get_logger(__name__, "metrics.log")
+
+Function = TypeVar("Function", bound=Callable[..., Any])
+
+
+def get_memory_usage() -> int:
+    """
+    Функция получения объема памяти процесса в байтах: если включено отслеживание выделения памяти (tracemalloc),
+    возвращается объем памяти, выделенной Python, иначе - резидентная память процесса (RSS, только Linux;
+    на других системах возвращается 0).
+    """
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[0]
+    try:
+        with open("/proc/self/statm", "rb") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def count_rows(result: Any) -> Optional[int]:
+    """Функция получения количества строк результата (DataFrame, списка и т.д.; None для строк и чисел)."""
+    if isinstance(result, (str, bytes)) or not hasattr(result, "__len__"):
+        return None
+    return len(result)
+
+
+class StageMetrics:
+    """Показатели этапа обработки: количество вызовов, время, количество строк результата и изменение памяти."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.seconds_total = 0.0
+        self.seconds_max = 0.0
+        self.seconds_last = 0.0
+        self.rows_total = 0
+        self.rows_last: Optional[int] = None
+        self.memory_delta_last = 0
+        self.memory_delta_max = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "seconds_total": self.seconds_total,
+            "seconds_avg": self.seconds_total / self.calls if self.calls else 0.0,
+            "seconds_max": self.seconds_max,
+            "seconds_last": self.seconds_last,
+            "rows_total": self.rows_total,
+            "rows_last": self.rows_last,
+            "memory_delta_last": self.memory_delta_last,
+            "memory_delta_max": self.memory_delta_max,
+        }
+
+
+class MetricsRegistry:
+    """
+    Реестр показателей этапов обработки (чтение файла, выборка транзакций, расчеты, API-запросы и т.д.).
+    Изменение памяти за время этапа замеряется, только если включен замер памяти (track_memory или переменная
+    окружения METRICS_MEMORY: "1", "true", "yes" или "on"): замер читает объем памяти процесса до и после
+    каждого вызова этапа, поэтому по умолчанию он отключен.
+    Если задан режим профилирования (profile_mode или переменная окружения PROFILE_MODE: "cprofile" или
+    "pyinstrument"), внешние (не вложенные в другие этапы) вызовы этапов профилируются, а результаты
+    профилирования записываются в папку `logs` (файлы `profile_<этап>.prof` или `profile_<этап>.html`).
+    """
+
+    def __init__(self, profile_mode: Optional[str] = None, track_memory: Optional[bool] = None) -> None:
+        profile_mode = profile_mode if profile_mode is not None else (get_env("PROFILE_MODE") or "")
+        if profile_mode and profile_mode not in PROFILE_MODES:
+            logger.warning(f"Неизвестный режим профилирования: {profile_mode}. Профилирование отключено.")
+            profile_mode = ""
+        self.profile_mode = profile_mode
+        if track_memory is None:
+            track_memory = (get_env("METRICS_MEMORY") or "").lower() in ENABLED_VALUES
+        self.track_memory = track_memory
+        self._stages: dict[str, StageMetrics] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()  # Глубина вложенности этапов в каждом потоке
+
+    def record(self, stage: str, seconds: float, rows: Optional[int] = None, memory_delta: int = 0,
+               error: bool = False) -> None:
+        """Метод добавления показателей одного выполнения этапа."""
+        with self._lock:
+            metrics = self._stages.get(stage)
+            if metrics is None:
+                metrics = self._stages[stage] = StageMetrics()
+            metrics.calls += 1
+            metrics.errors += int(error)
+            metrics.seconds_total += seconds
+            metrics.seconds_max = max(metrics.seconds_max, seconds)
+            metrics.seconds_last = seconds
+            metrics.rows_last = rows
+            metrics.rows_total += rows or 0
+            metrics.memory_delta_last = memory_delta
+            metrics.memory_delta_max = max(metrics.memory_delta_max, memory_delta)
+
+    @contextmanager
+    def measure(self, stage: str) -> Generator[dict, None, None]:
+        """
+        Контекстный менеджер замера этапа обработки: время выполнения, изменение памяти (если включен замер
+        памяти) и количество строк (значение "rows" словаря, возвращаемого менеджером, задается внутри блока with).
+        """
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        profiler = self._start_profiler() if depth == 0 and self.profile_mode else None
+        info: dict = {"rows": None}
+        memory_before = get_memory_usage() if self.track_memory else 0
+        start = time.perf_counter()
+        error = False
+        try:
+            yield info
+        except BaseException:
+            error = True
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            memory_delta = get_memory_usage() - memory_before if self.track_memory else 0
+            self.record(stage, seconds, info["rows"], memory_delta, error)
+            self._local.depth = depth
+            if profiler is not None:
+                self._save_profile(stage, profiler)
+
+    def _start_profiler(self) -> Any:
+        """Метод запуска профилировщика (None, если профилировщик недоступен)."""
+        if self.profile_mode == "pyinstrument":
+            try:
+                from pyinstrument import Profiler  # type: ignore[import-not-found]
+            except ImportError:
+                logger.warning("Модуль pyinstrument не установлен. Используется cProfile.")
+                self.profile_mode = "cprofile"
+            else:
+                profiler = Profiler()
+                profiler.start()
+                return profiler
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:  # Если уже работает другой профилировщик (например, в другом потоке)
+            return None
+        return profiler
+
+    def _save_profile(self, stage: str, profiler: Any) -> None:
+        """Метод остановки профилировщика и записи результатов профилирования этапа в папку `logs`."""
+        os.makedirs(LOGS_DIR, exist_ok=True)
+        if isinstance(profiler, cProfile.Profile):
+            profiler.disable()
+            path = os.path.join(LOGS_DIR, f"profile_{stage}.prof")
+            profiler.dump_stats(path)
+        else:
+            profiler.stop()
+            path = os.path.join(LOGS_DIR, f"profile_{stage}.html")
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(profiler.output_html())
+        logger.debug(f"Результаты профилирования этапа {stage} записаны в файл {path}.")
+
+    def get_stage(self, stage: str) -> dict:
+        """Метод получения показателей этапа (пустой словарь, если этап не выполнялся)."""
+        with self._lock:
+            metrics = self._stages.get(stage)
+            return metrics.to_dict() if metrics is not None else {}
+
+    def to_dict(self) -> dict:
+        """Метод получения показателей всех этапов: {этап: показатели}."""
+        with self._lock:
+            return {stage: metrics.to_dict() for stage, metrics in sorted(self._stages.items())}
+
+    def to_prometheus(self) -> str:
+        """Метод получения показателей всех этапов в текстовом формате Prometheus."""
+        # Название метрики: (показатель этапа, тип метрики, описание)
+        metric_types = {
+            "calls_total": ("calls", "counter", "Количество вызовов этапа"),
+            "errors_total": ("errors", "counter", "Количество вызовов этапа, завершившихся ошибкой"),
+            "seconds_total": ("seconds_total", "counter", "Суммарное время выполнения этапа в секундах"),
+            "seconds_max": ("seconds_max", "gauge", "Максимальное время выполнения этапа в секундах"),
+            "rows_total": ("rows_total", "counter", "Суммарное количество строк результатов этапа"),
+            "memory_delta_bytes_max": ("memory_delta_max", "gauge",
+                                       "Максимальное изменение памяти процесса за время этапа в байтах"),
+        }
+        stages = self.to_dict()
+        lines = []
+        for name, (field, metric_type, description) in metric_types.items():
+            metric = f"{METRICS_PREFIX}_stage_{name}"
+            lines.append(f"# HELP {metric} {description}")
+            lines.append(f"# TYPE {metric} {metric_type}")
+            for stage, values in stages.items():
+                lines.append(f'{metric}{{stage="{stage}"}} {values[field]}')
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str) -> None:
+        """
+        Метод записи показателей всех этапов в файл: `.json` - в формате JSON, остальные расширения
+        (например, `.prom`) - в текстовом формате Prometheus.
+        """
+        with open(path, "w", encoding="utf-8") as file:
+            if path.endswith(".json"):
+                json.dump(self.to_dict(), file, ensure_ascii=False, indent=4)
+            else:
+                file.write(self.to_prometheus())
+        logger.info(f"Показатели этапов обработки записаны в файл {path}.")
+
+    def reset(self) -> None:
+        """Метод удаления всех показателей."""
+        with self._lock:
+            self._stages.clear()
+
+
+_metrics_registry: Optional[MetricsRegistry] = None
+_metrics_registry_lock = threading.Lock()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Функция получения общего реестра показателей (создается при первом обращении)."""
+    global _metrics_registry
+    with _metrics_registry_lock:
+        if _metrics_registry is None:
+            _metrics_registry = MetricsRegistry()
+        return _metrics_registry
+
+
+def set_metrics_registry(registry: Optional[MetricsRegistry]) -> None:
+    """Функция замены общего реестра показателей (если передан None, он будет создан заново при обращении)."""
+    global _metrics_registry
+    with _metrics_registry_lock:
+        _metrics_registry = registry
+
+
+@contextmanager
+def measure(stage: str) -> Generator[dict, None, None]:
+    """Контекстный менеджер замера этапа обработки в общем реестре показателей (см. `MetricsRegistry.measure`)."""
+    with get_metrics_registry().measure(stage) as info:
+        yield info
+
+
+def timed(stage: Optional[str] = None) -> Callable[[Function], Function]:
+    """
+    Декоратор замера времени выполнения функции, изменения памяти (если включен замер памяти, см.
+    `MetricsRegistry`) и количества строк результата (в общем реестре показателей). Название этапа
+    по умолчанию - имя функции.
+    """
+
+    def decorator(function: Function) -> Function:
+        stage_name = stage or function.__name__
+
+        @wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with measure(stage_name) as info:
+                result = function(*args, **kwargs)
+                info["rows"] = count_rows(result)
+            return result
+
+        return cast(Function, wrapper)
+
+    return decorator
+
+
+@atexit.register
+def _export_metrics_on_exit() -> None:
+    """Запись показателей при завершении программы в файл из переменной окружения METRICS_FILE (если задана)."""
+    if _metrics_registry is None:
+        return
+    path = get_env("METRICS_FILE")
+    if path:
+        _metrics_registry.export(path)
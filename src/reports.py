@@ -1,48 +1,59 @@
-import logging
 import os
 from datetime import datetime, timedelta
 from functools import wraps
 from typing import Any, Callable, Optional
 
+import numpy as np
 import pandas as pd
 
-PATH_TO_LOG_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "logs", "reports.log")
+from src.logging_config import get_logger
+from src.metrics import timed
+from src.result_cache import RESULT_CACHE_TTL, cached_result
+from src.result_writer import RESULT_FORMATS, get_result_path, get_result_writer
+from src.sql_store import get_sql_store
+from src.store import cumulative_spending, slice_by_date
+from src.utils import get_window_starts
 
-logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-file_handler = logging.FileHandler(PATH_TO_LOG_FILE, "w", encoding="utf-8")
-file_formatter = logging.Formatter("%(asctime)s - %(filename)s - %(funcName)s - %(levelname)s: %(message)s")
-file_handler.setFormatter(file_formatter)
-logger.addHandler(file_handler)
+REPORT_WINDOW_DAYS = 90  # Длина периода отчета по тратам в днях (последние три месяца до даты отчета)
 
+logger = get_logger(__name__, "reports.log")
 
-def write_result_to_file(filename: str = "") -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+
+def write_result_to_file(filename: str = "", file_format: str = "text"
+                         ) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
     """Декоратор, который автоматически записывает в файл результат выполнения декорируемых функций.
     Декоратор имеет необязательный входной параметр 'filename' - имя файла, в который вносится информация
     о работе функции. Если при вызове декоратора параметр 'filename' не указан, логирование выводится в файл
-    `reports_result.txt`, находящийся в папке 'logs'."""
+    `report_from_<имя функции>.txt`, находящийся в папке 'logs'.
+    Параметр 'file_format' - формат файла: "text" (для DataFrame - не больше MAX_TEXT_ROWS строк), "csv"
+    или "parquet" (расширение `.txt` заменяется на расширение формата).
+    Запись выполняется в фоновом потоке (`ResultWriter`): декорируемая функция возвращает результат сразу
+    после его расчета, не ожидая преобразования результата в текст и записи на диск."""
+    if file_format not in RESULT_FORMATS:
+        raise ValueError(f"Неизвестный формат файла с результатом: {file_format}.")
 
     def decorator(function: Callable[..., Any]) -> Callable[..., Any]:
+        # Если передано имя файла для записи результата, определяется путь к нему
+        if filename:
+            path_to_logfile = os.path.join(os.path.dirname(os.path.dirname(__file__)), "logs", filename)
+        else:
+            path_to_logfile = os.path.join(os.path.dirname(os.path.dirname(__file__)),
+                                           f"logs/report_from_{function.__name__}.txt")
+
         @wraps(function)
         def wrapper(*args: Any, **kwargs: Any) -> Any:
             try:
                 result = function(*args, **kwargs)
-                logging_info = f"Вызвана функция '{function.__name__}' (успешно). \nРезультат: \n{result}"
+                logging_info = f"Вызвана функция '{function.__name__}' (успешно). \nРезультат: "
+                path, result_format = get_result_path(path_to_logfile, file_format), file_format
             except Exception as error_info:
                 logging_info = (
                     f"Вызвана функция '{function.__name__}' (неуспешно). Ошибка: {error_info}."
                 )
                 result = None
-            # Если передано имя файла для записи результата, определяется путь к нему и записывается результат
-            if filename:
-                path_to_logfile = os.path.join(os.path.dirname(os.path.dirname(__file__)), "logs", filename)
-                with open(path_to_logfile, "w", encoding="UTF-8") as file:
-                    file.write(f"{logging_info}\n")
-            else:
-                path_to_logfile = os.path.join(os.path.dirname(os.path.dirname(__file__)),
-                                               f"logs/report_from_{function.__name__}.txt")
-                with open(path_to_logfile, "w", encoding="UTF-8") as file:
-                    file.write(f"{logging_info}\n")
+                path, result_format = path_to_logfile, "text"
+            # Результат записывается в файл в фоновом потоке
+            get_result_writer().submit(path, logging_info, result, result_format)
             return result
 
         return wrapper
@@ -50,28 +61,46 @@ def write_result_to_file(filename: str = "") -> Callable[[Callable[..., Any]], C
     return decorator
 
 
+def _parse_report_date(report_date: Optional[str | datetime]) -> datetime:
+    """
+    Функция получения даты отчета: строка в формате ДД.ММ.ГГГГ преобразуется в datetime,
+    если дата не передана (None), берется текущая дата.
+    """
+    if report_date is None:
+        return datetime.now()
+    if isinstance(report_date, datetime):
+        return report_date
+    return datetime.strptime(report_date, "%d.%m.%Y")
+
+
 @write_result_to_file()
-def spending_by_category(transactions: pd.DataFrame, category: str,
-                         start_date: Optional[str | datetime] = None) -> pd.DataFrame:
+@cached_result(data_arg="transactions", ttl=RESULT_CACHE_TTL)  # Дата отчета по умолчанию - текущая дата
+@timed()
+def spending_by_category(transactions: Optional[pd.DataFrame], category: str,
+                         start_date: Optional[str | datetime] = None, dataset_id: Optional[str] = None
+                         ) -> pd.DataFrame:
     """
     Функция, выбирающая из данных о транзакциях траты по заданной категории.
-    Принимает данные о транзакциях в формате DataFrame, название категории в формате str, опционально дату
-    в формате str (ДД.ММ.ГГГГ). Если дата не передана, то берется текущая дата.
+    Принимает данные о транзакциях в формате DataFrame (или None - тогда используются данные хранилища
+    транзакций набора данных dataset_id, по умолчанию - общего хранилища или, если задана переменная окружения
+    TRANSACTIONS_DB, базы данных транзакций), название категории в формате str,
+    опционально дату в формате str (ДД.ММ.ГГГГ).
+    Если дата не передана, то берется текущая дата.
     Возвращает траты по заданной категории за последние три месяца (от переданной или текущей даты) в DataFrame.
     """
 
-    if start_date is None:  # Если дата для анализа выборки не передана, то принимается текущая дата
-        start_date = datetime.now()
-        end_date = start_date - timedelta(days=90)
-    else:
-        start_date = datetime.strptime(start_date, '%d.%m.%Y')
-        end_date = start_date - timedelta(days=90)
+    start_date = _parse_report_date(start_date)
+    end_date = start_date - timedelta(days=REPORT_WINDOW_DAYS)  # Начало периода (как `get_window_starts`)
 
-    transactions["Дата операции"] = pd.to_datetime(transactions["Дата операции"], dayfirst=True)  # Преобразование дат
-    # в столбце "Дата операции" в формат datetime для выборки по интервалу дат
+    sql_store = get_sql_store() if transactions is None and dataset_id is None else None
+    if sql_store is not None:  # Отбор по категории, периоду и сумме платежа - SQL-запросом по индексу
+        result = sql_store.spending_by_category(category, end_date, start_date)
+        logger.debug(f"Данные по тратам в категории '{category}' за последние три месяца получены из базы данных.")
+        return result
 
-    slice_df = transactions[transactions["Дата операции"].between(end_date, start_date)]  # Выборка транзакций для
-    # заданного промежутка дат
+    # Выборка транзакций для заданного промежутка дат (для данных хранилища - двоичным поиском
+    # по отсортированным датам)
+    slice_df = slice_by_date(transactions, end_date, start_date, dataset_id)
     logger.debug(
         f"Сделана выборка транзакций в диапазоне дат {end_date.strftime('%d.%m.%Y')} - {start_date.strftime(
             '%d.%m.%Y')}.")
@@ -84,3 +113,53 @@ def spending_by_category(transactions: pd.DataFrame, category: str,
     logger.debug(f"Данные по тратам в категории '{category}' за последние три месяца успешно получены.")
 
     return result
+
+
+@write_result_to_file()
+def spending_by_categories(
+    transactions: Optional[pd.DataFrame],
+    categories: list[str],
+    report_dates: Optional[list[Optional[str | datetime]]] = None,
+    window_days: int = REPORT_WINDOW_DAYS,
+    dataset_id: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Функция расчета трат по нескольким категориям сразу для нескольких дат отчета.
+    Принимает данные о транзакциях в формате DataFrame (или None - данные хранилища транзакций набора данных
+    dataset_id, по умолчанию - общего хранилища), список категорий, список дат отчета (str в формате ДД.ММ.ГГГГ
+    или datetime; если не передан - текущая дата) и длину периода в днях (по умолчанию - 90 дней, как в функции
+    `spending_by_category`).
+    Суммы за все периоды рассчитываются по накопленным суммам расходов по категориям (`CumulativeSpending`),
+    без отдельной выборки для каждой категории и даты.
+    Возвращает DataFrame (строка - категория и дата отчета, в т.ч. без трат) со столбцами "Категория",
+    "Дата отчета", "Начало периода", "Сумма расходов" (по столбцу "Сумма операции с округлением") и
+    "Количество операций". Суммы и количество совпадают с тратами, выбранными функцией `spending_by_category`.
+    """
+    end_dates = np.array([_parse_report_date(report_date) for report_date in (report_dates or [None])],
+                         dtype="datetime64[ns]")
+    categories = list(dict.fromkeys(categories))  # Категории без повторов (в порядке передачи)
+
+    # Накопленные суммы расходов (включая переводы) по категориям (для данных общего хранилища - рассчитываются
+    # один раз): сумма за каждый период - разность накопленных сумм на его границах
+    spending = cumulative_spending(transactions, ("Категория",), dataset_id)
+    start_dates = get_window_starts(end_dates, f"{window_days}D")
+    sums, counts = spending.get_totals(start_dates, end_dates)
+    # Номера групп заданных категорий; для категорий без расходов в данных (номер -1) выбирается
+    # дополнительный последний столбец с нулевыми суммами
+    groups = pd.Index(spending.keys["Категория"]).get_indexer(pd.Index(categories))
+    sums = np.column_stack([sums, np.zeros(len(end_dates))])[:, groups]
+    counts = np.column_stack([counts, np.zeros(len(end_dates), dtype=np.int64)])[:, groups]
+
+    # Строки результата: для каждой категории - все даты отчета
+    result = pd.DataFrame(
+        {
+            "Категория": np.repeat(np.array(categories, dtype=object), len(end_dates)),
+            "Дата отчета": np.tile(end_dates, len(categories)),
+            "Начало периода": np.tile(start_dates, len(categories)),
+            "Сумма расходов": sums.T.ravel(),
+            "Количество операций": counts.T.ravel(),
+        }
+    )
+    logger.debug(f"Траты по {len(categories)} категориям за {len(end_dates)} периодов успешно получены.")
+
+    return result
@@ -0,0 +1,206 @@
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Optional, TypeVar, cast
+
+import pandas as pd
+
+from src.logging_config import get_logger
+from src.settings import get_env
+from src.sql_store import get_sql_store
+from src.store import get_store_version
+
+RESULT_CACHE_MAX_ENTRIES = 1_000  # Максимальное количество результатов в кеше (по умолчанию)
+# Время актуальности (в секундах) результатов, зависящих от текущего времени (приветствие, курсы валют и акций,
+# дата отчета по умолчанию - текущая дата)
+RESULT_CACHE_TTL = 60
+
+logger = get_logger(__name__, "result_cache.log")
+
+Function = TypeVar("Function", bound=Callable[..., Any])
+
+
+class ResultCache:
+    """
+    Кеш результатов функций страниц для одинаковых запросов (LRU, не больше max_entries результатов).
+    Ключ результата - имя функции, версия данных (см. `get_data_version`) и остальные аргументы, поэтому
+    после добавления транзакций в хранилище (новая версия данных) результаты рассчитываются заново.
+    max_entries=0 отключает кеш.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None) -> None:
+        if max_entries is None:
+            max_entries = get_max_entries()
+        self.max_entries = max_entries
+        self.hits = 0  # Количество результатов, найденных в кеше
+        self.misses = 0  # Количество результатов, рассчитанных заново
+        self.evictions = 0  # Количество результатов, удаленных из кеша при превышении max_entries
+        # {ключ: (результат, время окончания актуальности или None)}, от давно использованных к недавним
+        self._entries: OrderedDict[tuple, tuple[Any, Optional[float]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> tuple[bool, Any]:
+        """Метод поиска результата в кеше. Возвращает (True, результат) или (False, None)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > time.monotonic()):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[0]
+            if entry is not None:  # Результат устарел
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def set(self, key: tuple, value: Any, ttl: Optional[float] = None) -> None:
+        """Метод записи результата в кеш (ttl - время актуальности в секундах, None - без ограничения)."""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, None if ttl is None else time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_store(self, uid: int) -> int:
+        """
+        Метод удаления результатов, рассчитанных по данным хранилища с номером uid (после добавления транзакций).
+        Возвращает количество удаленных результатов.
+        """
+        with self._lock:
+            keys = [key for key in self._entries if isinstance(key[1], tuple) and key[1][0] == uid]
+            for key in keys:
+                del self._entries[key]
+        if keys:
+            logger.debug(f"Из кеша удалено {len(keys)} результатов по данным хранилища {uid}.")
+        return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """Метод получения показателей кеша: количество попаданий и промахов, доля попаданий, размер кеша."""
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / requests, 4) if requests else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+            }
+
+    def to_prometheus(self) -> str:
+        """Метод получения показателей кеша в текстовом формате Prometheus."""
+        stats = self.stats()
+        lines = []
+        for field, metric_type, description in (("hits", "counter", "Результаты, найденные в кеше"),
+                                                ("misses", "counter", "Результаты, рассчитанные заново"),
+                                                ("evictions", "counter", "Результаты, удаленные из кеша (LRU)"),
+                                                ("entries", "gauge", "Количество результатов в кеше")):
+            name = f"financial_assistant_result_cache_{field}" + ("_total" if metric_type == "counter" else "")
+            lines += [f"# HELP {name} {description}", f"# TYPE {name} {metric_type}", f"{name} {stats[field]}"]
+        return "\n".join(lines) + "\n"
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def get_max_entries() -> int:
+    """
+    Функция получения размера кеша результатов из переменной окружения RESULT_CACHE_SIZE (0 - кеш отключен).
+    Если переменная не задана, возвращается RESULT_CACHE_MAX_ENTRIES.
+    """
+    value = get_env("RESULT_CACHE_SIZE")
+    if not value:
+        return RESULT_CACHE_MAX_ENTRIES
+    try:
+        return max(int(value), 0)
+    except ValueError:
+        logger.warning(f"Некорректное значение RESULT_CACHE_SIZE: {value}. Используется {RESULT_CACHE_MAX_ENTRIES}.")
+        return RESULT_CACHE_MAX_ENTRIES
+
+
+def get_data_version(df: Optional[pd.DataFrame], dataset_id: Optional[str] = None, use_sql_store: bool = False
+                     ) -> Optional[tuple]:
+    """
+    Функция получения версии данных для ключа кеша результатов:
+    ("sql", отпечаток Excel-файла) - для базы данных транзакций (None и use_sql_store=True, если задана
+    переменная окружения TRANSACTIONS_DB), (номер хранилища, версия данных) - для None (данные хранилища
+    набора данных dataset_id). Для переданного DataFrame (в т.ч. полученного из хранилища) возвращается None:
+    результаты по данным вызывающего кода не кешируются (DataFrame можно изменить "на месте", а хеширование
+    содержимого сравнимо по времени с расчетом результата).
+    """
+    if df is None and dataset_id is None and use_sql_store:
+        sql_store = get_sql_store()
+        if sql_store is not None:
+            return "sql", sql_store.get_version()
+    return get_store_version(df, dataset_id)
+
+
+_result_cache: Optional[ResultCache] = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    """Функция получения общего кеша результатов (создается при первом обращении)."""
+    global _result_cache
+    with _result_cache_lock:
+        if _result_cache is None:
+            _result_cache = ResultCache()
+        return _result_cache
+
+
+def set_result_cache(cache: Optional[ResultCache]) -> None:
+    """Функция замены общего кеша результатов (если передан None, кеш будет создан заново при обращении)."""
+    global _result_cache
+    with _result_cache_lock:
+        _result_cache = cache
+
+
+def cached_result(data_arg: Optional[str] = None, ttl: Optional[float] = None) -> Callable[[Function], Function]:
+    """
+    Декоратор кеширования результатов функции страницы в общем кеше результатов (см. `ResultCache`).
+    data_arg - имя аргумента с данными о транзакциях (DataFrame или None; функции с этим аргументом
+    используют базу данных транзакций, если она задана), без него версия данных определяется по хранилищу
+    набора данных dataset_id. ttl - время актуальности результата в секундах (для результатов, зависящих
+    от текущего времени).
+    Кешируются только результаты по данным хранилища или базы данных транзакций (None вместо DataFrame):
+    функция с переданным DataFrame вызывается без кеша (см. `get_data_version`). Результат DataFrame
+    сохраняется в кеше копией, и каждый вызов получает свою копию, которую можно изменять, не затрагивая кеш.
+    """
+
+    def decorator(function: Function) -> Function:
+        signature = inspect.signature(function)
+
+        @wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            cache = get_result_cache()
+            if cache.max_entries <= 0:
+                return function(*args, **kwargs)
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+            df = arguments.pop(data_arg) if data_arg is not None else None
+            version = get_data_version(df, arguments.get("dataset_id"), use_sql_store=data_arg is not None)
+            if version is None:  # Данные вызывающего кода
+                return function(*args, **kwargs)
+            key = (function.__qualname__, version, tuple(arguments.items()))
+            try:
+                found, value = cache.get(key)
+            except TypeError:  # Аргументы, которые нельзя использовать в ключе (например, списки)
+                return function(*args, **kwargs)
+            if found:
+                return value.copy() if isinstance(value, pd.DataFrame) else value
+            value = function(*args, **kwargs)
+            cache.set(key, value.copy() if isinstance(value, pd.DataFrame) else value, ttl)
+            return value
+
+        return cast(Function, wrapper)
+
+    return decorator
@@ -0,0 +1,180 @@
+import atexit
+import copy
+import os
+import queue
+import threading
+from typing import Any, Optional
+
+import pandas as pd
+
+from src.logging_config import get_logger
+
+RESULT_FORMATS = ("text", "csv", "parquet")  # Форматы файлов с результатами функций
+QUEUE_SIZE = 64  # Максимальное количество результатов, ожидающих записи
+# Действия при заполненной очереди: "wait" - ожидание освобождения места, "drop" - результат не записывается
+QUEUE_FULL_POLICIES = ("wait", "drop")
+MAX_TEXT_ROWS = 60  # Максимальное количество строк DataFrame в текстовом файле (остальные строки не выводятся)
+
+logger = get_logger(__name__, "result_writer.log")
+
+
+def get_result_path(path: str, file_format: str) -> str:
+    """
+    Функция получения пути к файлу с результатом: для форматов "csv" и "parquet" расширение файла `.txt`
+    заменяется на расширение формата.
+    """
+    root, extension = os.path.splitext(path)
+    if file_format != "text" and extension == ".txt":
+        return f"{root}.{file_format}"
+    return path
+
+
+def snapshot_result(result: Any) -> Any:
+    """
+    Функция получения копии результата для записи в фоновом потоке: вызывающий код может изменить результат
+    сразу после возврата из функции, а файл должен содержать результат на момент вызова.
+    DataFrame копируется полностью (копирование быстрее преобразования в CSV или текст), остальные изменяемые
+    значения (списки, словари) - функцией copy.deepcopy; строки и None не копируются.
+    """
+    if result is None or isinstance(result, (str, bytes, int, float)):
+        return result
+    if isinstance(result, pd.DataFrame):
+        return result.copy(deep=True)
+    return copy.deepcopy(result)
+
+
+def write_result(path: str, header: str, result: Any, file_format: str = "text") -> None:
+    """
+    Функция записи результата функции в файл.
+    Принимает путь к файлу, заголовок (сообщение о вызове функции), результат (None - записывается только
+    заголовок) и формат файла:
+    "text" - заголовок и результат в текстовом виде (для DataFrame - не больше MAX_TEXT_ROWS строк),
+    "csv" и "parquet" - результат в формате CSV / Parquet (если результат - DataFrame, иначе - текст).
+    Выбрасывает ValueError при неизвестном формате и ImportError, если для записи Parquet не установлен
+    pyarrow или fastparquet.
+    """
+    if file_format not in RESULT_FORMATS:
+        raise ValueError(f"Неизвестный формат файла с результатом: {file_format}.")
+    if isinstance(result, pd.DataFrame) and file_format == "csv":
+        result.to_csv(path, index=False, encoding="utf-8")
+    elif isinstance(result, pd.DataFrame) and file_format == "parquet":
+        result.to_parquet(path, index=False)
+    else:
+        with open(path, "w", encoding="UTF-8") as file:
+            if result is None:  # Результата нет (функция завершилась ошибкой) - записывается только заголовок
+                file.write(f"{header}\n")
+            elif isinstance(result, pd.DataFrame):
+                file.write(f"{header}\n{result.to_string(max_rows=MAX_TEXT_ROWS, show_dimensions=True)}\n")
+            else:
+                file.write(f"{header}\n{result}\n")
+
+
+class ResultWriter:
+    """
+    Фоновая запись результатов функций в файлы.
+    Результаты помещаются в очередь ограниченного размера (QUEUE_SIZE), а преобразование результата в текст
+    (CSV, Parquet) и запись на диск выполняет отдельный поток, поэтому вызывающая функция не ожидает записи.
+    В очередь помещается копия результата (см. `snapshot_result`).
+    Объем памяти, занимаемой ожидающими записи результатами, ограничен размером очереди. Если очередь
+    заполнена (запись не успевает за вызовами функций), действие задается параметром on_full: "wait" (по
+    умолчанию) - добавление результата ожидает освобождения места, т.е. вызывающая функция ожидает записи
+    более ранних результатов; "drop" - результат не записывается (учитывается в `dropped`), и вызывающая
+    функция не ожидает. Выбрасывает ValueError при неизвестном значении on_full.
+    """
+
+    def __init__(self, queue_size: int = QUEUE_SIZE, on_full: str = "wait") -> None:
+        if on_full not in QUEUE_FULL_POLICIES:
+            raise ValueError(f"Неизвестное действие при заполненной очереди записи: {on_full}.")
+        self.on_full = on_full
+        self._queue: queue.Queue[Optional[tuple[str, str, Any, str]]] = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.written = 0  # Количество записанных файлов
+        self.errors = 0  # Количество ошибок записи
+        self.dropped = 0  # Количество результатов, не записанных из-за заполненной очереди (on_full="drop")
+
+    def _start(self) -> None:
+        """Метод запуска потока записи (при первом добавлении результата)."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="result-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        """Метод потока записи: результаты записываются в порядке добавления, None - завершение потока."""
+        while True:
+            task = self._queue.get()
+            try:
+                if task is None:
+                    return
+                path, header, result, file_format = task
+                try:
+                    write_result(path, header, result, file_format)
+                    self.written += 1
+                    logger.debug(f"Результат записан в файл {path}.")
+                except Exception as error_info:
+                    self.errors += 1
+                    print(f"Ошибка записи результата в файл {path}: {error_info}")
+                    logger.error(f"Ошибка записи результата в файл {path}: {error_info}")
+            finally:
+                self._queue.task_done()
+
+    def submit(self, path: str, header: str, result: Any, file_format: str = "text") -> None:
+        """
+        Метод добавления копии результата в очередь на запись (см. `write_result`). Если очередь заполнена,
+        метод ожидает освобождения места или не добавляет результат (см. параметр on_full).
+        """
+        self._start()
+        task = (path, header, snapshot_result(result), file_format)
+        if self.on_full == "wait":
+            self._queue.put(task)
+            return
+        try:
+            self._queue.put_nowait(task)
+        except queue.Full:
+            self.dropped += 1
+            logger.warning(f"Очередь записи заполнена, результат не записан в файл {path}.")
+
+    def flush(self) -> None:
+        """Метод ожидания записи всех результатов, добавленных в очередь."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def close(self) -> None:
+        """Метод записи оставшихся результатов и завершения потока записи."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._thread = None
+
+
+_result_writer: Optional[ResultWriter] = None
+_result_writer_lock = threading.Lock()
+
+
+def get_result_writer() -> ResultWriter:
+    """Функция получения общего объекта фоновой записи результатов (создается при первом обращении)."""
+    global _result_writer
+    with _result_writer_lock:
+        if _result_writer is None:
+            _result_writer = ResultWriter()
+        return _result_writer
+
+
+def set_result_writer(writer: Optional[ResultWriter]) -> None:
+    """
+    Функция замены общего объекта фоновой записи результатов (прежний объект записывает оставшиеся
+    результаты и завершает работу). Если передан None, объект будет создан заново при обращении.
+    """
+    global _result_writer
+    with _result_writer_lock:
+        if _result_writer is not None and _result_writer is not writer:
+            _result_writer.close()
+        _result_writer = writer
+
+
+@atexit.register
+def _close_result_writer() -> None:
+    """Запись оставшихся результатов при завершении программы (поток записи - фоновый)."""
+    if _result_writer is not None:
+        _result_writer.close()
@@ -0,0 +1,415 @@
+import argparse
+import json
+import os
+import selectors
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Any, Callable, Optional
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from src.logging_config import get_logger
+from src.metrics import get_metrics_registry
+from src.reports import spending_by_category
+from src.result_cache import get_result_cache
+from src.services import get_high_cashback_categories
+from src.sql_store import get_sql_store
+from src.store import get_transaction_store
+from src.utils import SPENDING_KEY_COLUMNS, actual_currencies, actual_stocks, get_dataset_path
+from src.views import main_info, market_data_executor
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+DEFAULT_WORKERS = 8  # Количество потоков обработки запросов
+KEEP_ALIVE_TIMEOUT = 5  # Время (в секундах), через которое закрывается неактивное соединение клиента
+REQUEST_TIMEOUT = 5  # Время (в секундах) ожидания данных запроса, чтение которого уже началось
+IDLE_CHECK_INTERVAL = 0.5  # Период (в секундах) проверки неактивных соединений
+# Допустимые годы в параметрах запроса (с запасом в год от границ дат pandas: 1677-2262)
+MIN_YEAR, MAX_YEAR = pd.Timestamp.min.year + 1, pd.Timestamp.max.year - 1
+
+logger = get_logger(__name__, "server.log")
+
+
+class RequestError(Exception):
+    """Ошибка в параметрах запроса (ответ со статусом 400)."""
+
+
+class NotFoundError(Exception):
+    """Запрошенные данные не найдены (ответ со статусом 404)."""
+
+
+def _get_optional_param(params: dict[str, list[str]], name: str) -> Optional[str]:
+    """Функция получения необязательного параметра запроса (строки запроса URL); None, если он не передан."""
+    values = params.get(name)
+    return values[0] if values and values[0] else None
+
+
+def _get_param(params: dict[str, list[str]], name: str) -> str:
+    """Функция получения обязательного параметра запроса. Выбрасывает RequestError, если он не передан."""
+    value = _get_optional_param(params, name)
+    if value is None:
+        raise RequestError(f"Не передан параметр '{name}'.")
+    return value
+
+
+def _check_date(name: str, value: str, date_format: str) -> str:
+    """
+    Функция проверки даты в параметре запроса. Выбрасывает RequestError, если формат неверный
+    или год вне диапазона MIN_YEAR-MAX_YEAR.
+    """
+    try:
+        year = datetime.strptime(value, date_format).year
+    except ValueError:
+        raise RequestError(f"Параметр '{name}' не соответствует формату {date_format}: {value}.")
+    if not MIN_YEAR <= year <= MAX_YEAR:
+        raise RequestError(f"Год в параметре '{name}' должен быть от {MIN_YEAR} до {MAX_YEAR}: {value}.")
+    return value
+
+
+def _check_int(name: str, value: str, min_value: int, max_value: int) -> str:
+    """Функция проверки целого числа в параметре запроса. Выбрасывает RequestError, если число неверное."""
+    if not (value.isascii() and value.isdigit()) or not min_value <= int(value) <= max_value:
+        raise RequestError(f"Параметр '{name}' должен быть целым числом от {min_value} до {max_value}: {value}.")
+    return value
+
+
+def _get_dataset_id(params: dict[str, list[str]]) -> Optional[str]:
+    """
+    Функция получения идентификатора набора данных из параметра dataset_id (None - общее хранилище).
+    Выбрасывает RequestError, если идентификатор недопустимый, и NotFoundError, если файла набора данных нет.
+    """
+    dataset_id = _get_optional_param(params, "dataset_id")
+    if dataset_id is None:
+        return None
+    try:
+        path = get_dataset_path(dataset_id)
+    except ValueError as error_info:
+        raise RequestError(str(error_info))
+    if not os.path.isfile(path):
+        raise NotFoundError(f"Набор данных {dataset_id} не найден.")
+    return dataset_id
+
+
+def handle_main_info(params: dict[str, list[str]]) -> str:
+    """Обработчик запроса страницы "Главная": параметры date_time (ГГГГ-ММ-ДД ЧЧ:ММ:СС), user_id, dataset_id."""
+    date_time = _check_date("date_time", _get_param(params, "date_time"), "%Y-%m-%d %H:%M:%S")
+    return main_info(date_time, user_id=_get_optional_param(params, "user_id"), dataset_id=_get_dataset_id(params))
+
+
+def handle_spending_by_category(params: dict[str, list[str]]) -> str:
+    """
+    Обработчик запроса страницы "Отчеты": параметры category, date (ДД.ММ.ГГГГ, по умолчанию - текущая дата),
+    dataset_id. Результат не записывается в файл (в отличие от вызова функции `spending_by_category`),
+    транзакции возвращаются списком объектов JSON.
+    """
+    spending_function = spending_by_category.__wrapped__  # type: ignore[attr-defined]  # Без записи в файл
+    date = _get_optional_param(params, "date")
+    if date is not None:
+        _check_date("date", date, "%d.%m.%Y")
+    result: pd.DataFrame = spending_function(None, _get_param(params, "category"), date,
+                                             dataset_id=_get_dataset_id(params))
+    return str(result.to_json(orient="records", date_format="iso", force_ascii=False))
+
+
+def handle_high_cashback_categories(params: dict[str, list[str]]) -> str:
+    """Обработчик запроса страницы "Сервисы": параметры year, month, dataset_id."""
+    year = _check_int("year", _get_param(params, "year"), MIN_YEAR, MAX_YEAR)
+    month = _check_int("month", _get_param(params, "month"), 1, 12)
+    result = get_high_cashback_categories(None, year, month, dataset_id=_get_dataset_id(params))
+    return result or "{}"  # Пустая строка - данные для анализа не обнаружены
+
+
+# Обработчики запросов: {путь: функция(параметры запроса) -> JSON-ответ}
+ROUTES: dict[str, Callable[[dict[str, list[str]]], str]] = {
+    "/views/main_info": handle_main_info,
+    "/reports/spending_by_category": handle_spending_by_category,
+    "/services/high_cashback_categories": handle_high_cashback_categories,
+}
+
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    """
+    Обработчик HTTP-запросов к страницам "Главная", "Отчеты" и "Сервисы" (GET-запросы с параметрами в строке
+    запроса, ответ - JSON), проверки работоспособности (/health) и показателей этапов обработки и кеша
+    результатов (/metrics).
+    Соединения с клиентами сохраняются (HTTP/1.1 keep-alive): обработчик создается один раз для соединения
+    и обрабатывает по одному запросу (см. `handle_next`), а между запросами соединение ожидает без потока
+    обработки (см. `IdleConnections`).
+    """
+
+    protocol_version = "HTTP/1.1"
+    timeout = REQUEST_TIMEOUT
+    # Заголовки и тело ответа отправляются отдельно: без TCP_NODELAY тело ожидает подтверждения
+    # получения заголовков (алгоритм Нейгла и отложенное подтверждение - задержка около 40 мс)
+    disable_nagle_algorithm = True
+    server: "TransactionsServer"
+
+    def __init__(self, request: Any, client_address: Any, server: "TransactionsServer") -> None:
+        """Создание обработчика соединения (в отличие от BaseRequestHandler, запросы при этом не обрабатываются)."""
+        self.request = request
+        self.client_address = client_address
+        self.server = server
+        self.setup()
+
+    def handle_next(self) -> bool:
+        """Метод обработки одного запроса соединения. Возвращает True, если соединение сохраняется."""
+        self.close_connection = True
+        self.handle_one_request()
+        return not self.close_connection
+
+    def has_pending_request(self) -> bool:
+        """
+        Метод проверки (без ожидания), получены ли уже данные следующего запроса: клиент может отправить
+        несколько запросов подряд, и они читаются в буфер вместе с предыдущим запросом.
+        """
+        self.connection.settimeout(0)
+        try:
+            return bool(self.rfile.peek(1))  # type: ignore[attr-defined]
+        except OSError:
+            return False
+        finally:
+            self.connection.settimeout(self.timeout)
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        if url.path == "/health":
+            self._send(200, json.dumps(self.server.get_health(), ensure_ascii=False))
+            return
+        if url.path == "/metrics":
+            self._send(200, get_metrics_registry().to_prometheus() + get_result_cache().to_prometheus(),
+                       "text/plain; version=0.0.4")
+            return
+        handler = ROUTES.get(url.path)
+        if handler is None:
+            self._send_error(404, f"Неизвестный адрес: {url.path}.")
+            return
+        try:
+            body = handler(parse_qs(url.query))
+        except RequestError as error_info:  # Ошибки в параметрах (формат даты, месяца и т.д.)
+            self._send_error(400, str(error_info))
+            return
+        except NotFoundError as error_info:
+            self._send_error(404, str(error_info))
+            return
+        except Exception:
+            logger.exception(f"Ошибка при обработке запроса {self.path}.")
+            self._send_error(500, "Внутренняя ошибка сервера.")
+            return
+        self._send(200, body)
+
+    def _send(self, status: int, body: str, content_type: str = "application/json") -> None:
+        """Метод отправки ответа (длина ответа указывается всегда - для сохранения соединения)."""
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, status: int, message: str) -> None:
+        self._send(status, json.dumps({"error": message}, ensure_ascii=False))
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+
+class IdleConnections:
+    """
+    Сохраняемые соединения, ожидающие следующего запроса. Соединения отслеживает один поток (модуль selectors),
+    поэтому неактивные клиенты не занимают потоки обработки запросов: при поступлении данных запроса
+    соединение передается в on_ready, а соединение без запросов дольше timeout секунд - в on_expired
+    (для закрытия).
+    """
+
+    def __init__(self, on_ready: Callable[[ApiRequestHandler], None],
+                 on_expired: Callable[[ApiRequestHandler], None], timeout: float = KEEP_ALIVE_TIMEOUT) -> None:
+        self.timeout = timeout
+        self._on_ready = on_ready
+        self._on_expired = on_expired
+        self._selector = selectors.DefaultSelector()
+        self._deadlines: dict[ApiRequestHandler, float] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        # Пара сокетов для прерывания ожидания при закрытии. Новые соединения регистрируются без прерывания:
+        # epoll и kqueue учитывают их в уже начатом ожидании
+        self._wakeup_reader, self._wakeup_writer = socket.socketpair()
+        self._selector.register(self._wakeup_reader, selectors.EVENT_READ)
+        self._thread = threading.Thread(target=self._run, name="http-server-idle", daemon=True)
+        self._thread.start()
+
+    def add(self, handler: ApiRequestHandler) -> None:
+        """Метод передачи соединения в ожидание следующего запроса."""
+        with self._lock:
+            if not self._closed:
+                self._deadlines[handler] = time.monotonic() + self.timeout
+                self._selector.register(handler.connection, selectors.EVENT_READ, handler)
+                return
+        self._on_expired(handler)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._deadlines)
+
+    def _run(self) -> None:
+        next_check = time.monotonic() + IDLE_CHECK_INTERVAL
+        while True:
+            events = self._selector.select(IDLE_CHECK_INTERVAL)
+            ready, expired = [], []
+            with self._lock:
+                for key, _ in events:
+                    if key.data is not None and self._deadlines.pop(key.data, None) is not None:
+                        self._selector.unregister(key.fileobj)
+                        ready.append(key.data)
+                now = time.monotonic()
+                if self._closed or now >= next_check:  # Проверка времени ожидания - не чаще IDLE_CHECK_INTERVAL
+                    next_check = now + IDLE_CHECK_INTERVAL
+                    expired = [handler for handler, deadline in self._deadlines.items()
+                               if self._closed or deadline <= now]
+                    for handler in expired:
+                        del self._deadlines[handler]
+                        self._selector.unregister(handler.connection)
+                closed = self._closed
+            for handler in ready:
+                self._on_ready(handler)
+            for handler in expired:
+                self._on_expired(handler)
+            if closed:
+                return
+
+    def close(self) -> None:
+        """Метод закрытия всех ожидающих соединений и остановки потока отслеживания."""
+        with self._lock:
+            self._closed = True
+        self._wakeup_writer.send(b"\0")
+        self._thread.join()
+        self._selector.close()
+        self._wakeup_reader.close()
+        self._wakeup_writer.close()
+
+
+class TransactionsServer(HTTPServer):
+    """
+    HTTP-сервер с пулом потоков обработки запросов: сервер работает постоянно, поэтому данные общего
+    хранилища транзакций, его индексы и агрегаты, а также кеш курсов валют и акций загружаются один раз
+    и используются всеми запросами (а не при каждом запуске программы).
+    Поток из пула занимается на время обработки одного запроса: между запросами сохраняемые соединения
+    ожидают в `IdleConnections` и закрываются через keep_alive_timeout секунд бездействия.
+    """
+
+    def __init__(self, address: tuple[str, int], max_workers: int = DEFAULT_WORKERS,
+                 keep_alive_timeout: float = KEEP_ALIVE_TIMEOUT) -> None:
+        super().__init__(address, ApiRequestHandler)
+        self.started_at = time.time()
+        self.preloaded = False
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="http-server")
+        self._idle_connections = IdleConnections(self._on_connection_ready, self._close_connection,
+                                                 keep_alive_timeout)
+
+    def process_request(self, request: Any, client_address: Any) -> None:
+        """Метод передачи соединения в пул потоков (прием следующих соединений не ожидает обработки запроса)."""
+        self._executor.submit(self._open_connection, request, client_address)
+
+    def _open_connection(self, request: Any, client_address: Any) -> None:
+        try:
+            handler = ApiRequestHandler(request, client_address, self)
+        except Exception:
+            self.handle_error(request, client_address)
+            self.shutdown_request(request)
+            return
+        self._serve_connection(handler)
+
+    def _on_connection_ready(self, handler: ApiRequestHandler) -> None:
+        self._executor.submit(self._serve_connection, handler)
+
+    def _serve_connection(self, handler: ApiRequestHandler) -> None:
+        """
+        Метод обработки запроса соединения в потоке из пула. Запросы, уже полученные сервером, обрабатываются
+        сразу, затем сохраняемое соединение передается в ожидание следующего запроса (поток освобождается).
+        """
+        keep_alive = True
+        try:
+            while keep_alive:
+                keep_alive = handler.handle_next()
+                if not handler.has_pending_request():
+                    break
+        except Exception:
+            self.handle_error(handler.request, handler.client_address)
+            keep_alive = False
+        if keep_alive:
+            self._idle_connections.add(handler)
+        else:
+            self._close_connection(handler)
+
+    def _close_connection(self, handler: ApiRequestHandler) -> None:
+        try:
+            handler.finish()
+        except OSError:  # Если клиент уже закрыл соединение
+            pass
+        self.shutdown_request(handler.request)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self._idle_connections.close()
+        self._executor.shutdown(wait=True)
+
+    def get_health(self) -> dict[str, Any]:
+        """Метод получения состояния сервера для проверки работоспособности."""
+        return {"status": "ok", "uptime": round(time.time() - self.started_at, 3), "preloaded": self.preloaded,
+                "idle_connections": len(self._idle_connections), "result_cache": get_result_cache().stats()}
+
+
+def preload() -> None:
+    """
+    Функция предварительной загрузки данных при запуске сервера (чтобы первые запросы не ожидали загрузки):
+    чтение транзакций в общее хранилище, расчет накопленных сумм расходов и ТОП-N транзакций по месяцам,
+    импорт в базу данных транзакций (если задана переменная окружения TRANSACTIONS_DB) и запрос курсов
+    валют и акций в кеш.
+    """
+    start = time.perf_counter()
+    market_data_futures = [market_data_executor.submit(actual_currencies), market_data_executor.submit(actual_stocks)]
+    store = get_transaction_store()
+    store.get_cumulative_spending(SPENDING_KEY_COLUMNS)
+    store.get_cumulative_spending(("Категория",))
+    store.get_top_n(datetime.now(), datetime.now(), 5, by="amount", filters={"Статус": "OK"})
+    sql_store = get_sql_store()
+    if sql_store is not None:
+        sql_store.refresh()
+    for future in market_data_futures:
+        future.result()
+    logger.info(f"Данные загружены за {time.perf_counter() - start:.2f} с ({len(store)} транзакций).")
+
+
+def create_server(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, max_workers: int = DEFAULT_WORKERS,
+                  preload_data: bool = False) -> TransactionsServer:
+    """
+    Функция создания HTTP-сервера (порт 0 - любой свободный порт).
+    Если preload_data=True, данные загружаются до начала приема запросов (см. `preload`).
+    """
+    if preload_data:
+        preload()
+    server = TransactionsServer((host, port), max_workers)
+    server.preloaded = preload_data
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HTTP-сервер страниц 'Главная', 'Отчеты' и 'Сервисы'")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="адрес сервера")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="порт сервера")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="количество потоков обработки")
+    parser.add_argument("--preload", action="store_true", help="загрузить данные до начала приема запросов")
+    args = parser.parse_args()
+
+    http_server = create_server(args.host, args.port, args.workers, args.preload)
+    print(f"Сервер запущен: http://{args.host}:{http_server.server_port}")
+    try:
+        http_server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        http_server.server_close()
@@ -1,51 +1,86 @@
 import json
-import logging
-import os
+from typing import Optional
 
+import numpy as np
 import pandas as pd
 
-PATH_TO_LOG_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "logs", "services.log")
+from src.logging_config import get_logger
+from src.metrics import timed
+from src.result_cache import cached_result
+from src.sql_store import get_sql_store
+from src.store import cumulative_spending, get_transaction_store
+from src.utils import get_month_range, get_slice_of_data
 
-logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-file_handler = logging.FileHandler(PATH_TO_LOG_FILE, "w", encoding="utf-8")
-file_formatter = logging.Formatter("%(asctime)s - %(filename)s - %(funcName)s - %(levelname)s: %(message)s")
-file_handler.setFormatter(file_formatter)
-logger.addHandler(file_handler)
+logger = get_logger(__name__, "services.log")
 
 
-def get_high_cashback_categories(df: pd.DataFrame, year: str, month: str) -> str:
+@cached_result(data_arg="df")
+@timed()
+def get_high_cashback_categories(df: Optional[pd.DataFrame], year: str, month: str, dataset_id: Optional[str] = None
+                                 ) -> str:
     """
     Функция, из раздела "Сервисы", анализирующая, какие категории были наиболее выгодными в заданном месяце для выбора
     в качестве категорий повышенного кешбэка.
-    Принимает на вход данные для анализа в формате DataFrame, год и месяц в формате str.
+    Принимает на вход данные для анализа в формате DataFrame (или None - тогда используются данные хранилища
+    транзакций набора данных dataset_id, по умолчанию - общего хранилища или, если задана переменная окружения
+    TRANSACTIONS_DB, базы данных транзакций), год и месяц в формате str.
     Возвращает JSON-ответ с анализом, сколько на каждой категории расходов можно заработать кешбэка в указанном
     месяце года.
     """
 
-    if df.empty:  # Если данных нет...
-        print("Ошибка. Данные для анализа не обнаружены.")
-        return ""
-    df["Дата операции"] = pd.to_datetime(df["Дата операции"], dayfirst=True)  # Преобразование дат в столбце
-    # "Дата операции" в формат datetime для выборки за месяц
+    start_date, end_date = get_month_range(year, month)
+    sql_store = get_sql_store() if df is None and dataset_id is None else None
+    if sql_store is not None:
+        # Суммы расходов по категориям за месяц - SQL-запросом с группировкой в базе данных транзакций
+        category_sum = sql_store.category_spending(start_date, end_date)
+        result = cashback_from_category_sums(category_sum.drop("Переводы", errors="ignore"))
+    elif df is None:
+        if not len(get_transaction_store(dataset_id)):  # Если данных нет...
+            print("Ошибка. Данные для анализа не обнаружены.")
+            return ""
+        # Суммы расходов по категориям за заданный месяц определенного года - по накопленным суммам расходов
+        # хранилища (рассчитываются один раз, сумма за месяц - разность на границах месяца)
+        spending = cumulative_spending(None, ("Категория",), dataset_id)
+        sums, counts = spending.get_totals(np.array([start_date], dtype="datetime64[ns]"),
+                                           np.array([end_date], dtype="datetime64[ns]"))
+        has_spending = counts[0] > 0
+        category_sum = pd.Series(sums[0][has_spending], index=spending.keys["Категория"][has_spending].tolist())
+        result = cashback_from_category_sums(category_sum.drop("Переводы", errors="ignore"))
+    else:
+        if df.empty:  # Если данных нет...
+            print("Ошибка. Данные для анализа не обнаружены.")
+            return ""
+        # Для переданного DataFrame - выборка за месяц и группировка по категориям (накопленные суммы по всей
+        # истории не рассчитываются для одного запроса)
+        result = calculate_cashback_by_category(get_slice_of_data(start_date, end_date, df))
+    logger.debug(f"Рассчитаны расходы по категориям за месяц {month} (год {year}).")
+    logger.debug("Сводная информация о кешбеке по каждой категории успешно получена.")
+
+    return json.dumps(result, indent=4, ensure_ascii=False)
 
-    # Выборка транзакций за заданный месяц определенного года
-    slice_df = df[(df["Дата операции"].dt.month == int(month)) & (df["Дата операции"].dt.year == int(year))]
-    logger.debug(f"Сделана выборка транзакций за месяц {month} (год {year}).")
 
+def calculate_cashback_by_category(df: pd.DataFrame) -> dict[str, float]:
+    """
+    Функция расчета кешбэка (1% от суммы расходов, исключая переводы) по каждой категории.
+    Принимает транзакции за месяц (или агрегаты транзакций с теми же названиями столбцов) в формате DataFrame.
+    Возвращает словарь {категория: кешбэк}, упорядоченный по убыванию суммы расходов.
+    """
     # DataFrame только с расходами (исключая переводы)
-    spent_df = slice_df[(slice_df["Сумма платежа"] < 0) & (slice_df["Категория"] != "Переводы")]
+    spent_df = df[(df["Сумма платежа"] < 0) & (df["Категория"] != "Переводы")]
 
-    category_grouped = spent_df.groupby(by="Категория", as_index=False)  # Группировка данных по категориям трат
-    category_sum = category_grouped["Сумма операции с округлением"].sum()  # Расчет сумм расходов по каждой категории
+    # Расчет сумм расходов по каждой категории (группировка данных по категориям трат)
+    category_sum = spent_df.groupby(by="Категория", observed=True)["Сумма операции с округлением"].sum()
 
-    # Сортировка сумм расходов по каждой категории по убыванию
-    sorted_category_sum = category_sum.sort_values(by="Сумма операции с округлением", ascending=False,
-                                                   ignore_index=True)
-    result = {}
-    # Формирование данных для вывода сводной информации по каждой категории
-    for index, row in sorted_category_sum.iterrows():
-        result[row["Категория"]] = round(row["Сумма операции с округлением"] * 0.01, 2)
-    logger.debug("Сводная информация о кешбеке по каждой категории успешно получена.")
+    return cashback_from_category_sums(category_sum)
 
-    return json.dumps(result, indent=4, ensure_ascii=False)
+
+def cashback_from_category_sums(category_sum: pd.Series) -> dict[str, float]:
+    """
+    Функция расчета кешбэка (1% от суммы расходов) по суммам расходов по категориям.
+    Возвращает словарь {категория: кешбэк}, упорядоченный по убыванию суммы расходов.
+    """
+    # Сортировка сумм расходов по каждой категории по убыванию
+    sorted_category_sum = category_sum.sort_values(ascending=False)
+    # Формирование данных для вывода сводной информации по каждой категории (по столбцам, без построчного перебора)
+    cashback = (sorted_category_sum.to_numpy(dtype=float) * 0.01).tolist()
+    return {category: round(value, 2) for category, value in zip(sorted_category_sum.index.tolist(), cashback)}
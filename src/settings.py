@@ -0,0 +1,155 @@
+import json
+import os
+import sys
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+from src.logging_config import get_logger
+
+PATH_TO_USER_SETTINGS_JSON = os.path.join(os.path.dirname(os.path.dirname(__file__)), "user_settings.json")
+
+SETTINGS_FIELDS = ("user_currencies", "user_stocks")  # Списки тикеров в файле `user_settings.json`
+
+logger = get_logger(__name__, "settings.log")
+
+
+@dataclass(frozen=True, slots=True)
+class UserSettings:
+    """Настройки пользователя: тикеры валют и акций для страницы "Главная"."""
+
+    user_currencies: tuple[str, ...]
+    user_stocks: tuple[str, ...]
+
+
+def _parse_tickers(value: object, field: str) -> tuple[str, ...]:
+    """
+    Функция проверки списка тикеров из файла настроек.
+    Возвращает кортеж тикеров (строки интернируются, поэтому одинаковые тикеры разных пользователей
+    хранятся в памяти один раз) или выбрасывает ValueError, если значение не является списком строк.
+    """
+    if not isinstance(value, list) or not all(isinstance(ticker, str) for ticker in value):
+        raise ValueError(f"Поле {field} должно быть списком строк.")
+    return tuple(sys.intern(ticker) for ticker in value)
+
+
+def parse_user_settings(data: object) -> dict[Optional[str], UserSettings]:
+    """
+    Функция проверки содержимого файла `user_settings.json`.
+    Принимает данные из файла в формате:
+    {
+      "user_currencies": ["USD", "EUR"],
+      "user_stocks": ["AAPL", "AMZN"],
+      "profiles": {"user_1": {"user_stocks": ["TSLA"]}}
+    }
+    Отсутствующий список тикеров считается пустым. Раздел "profiles" необязателен: в профиле пользователя
+    указываются только отличающиеся поля, остальные берутся из общих настроек (и не копируются в памяти).
+    Возвращает словарь {идентификатор пользователя: настройки}, общие настройки хранятся с ключом None.
+    Выбрасывает ValueError, если данные не соответствуют формату.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Файл настроек должен содержать JSON-объект.")
+    default = UserSettings(*(_parse_tickers(data.get(field, []), field) for field in SETTINGS_FIELDS))
+
+    profiles: dict[Optional[str], UserSettings] = {None: default}
+    raw_profiles = data.get("profiles", {})
+    if not isinstance(raw_profiles, dict):
+        raise ValueError("Поле profiles должно быть JSON-объектом.")
+    for user_id, raw_profile in raw_profiles.items():
+        if not isinstance(raw_profile, dict):
+            raise ValueError(f"Профиль {user_id} должен быть JSON-объектом.")
+        profiles[user_id] = UserSettings(
+            *(
+                _parse_tickers(raw_profile[field], field) if field in raw_profile else getattr(default, field)
+                for field in SETTINGS_FIELDS
+            )
+        )
+    return profiles
+
+
+class SettingsLoader:
+    """
+    Загрузчик настроек пользователей из файла `user_settings.json`.
+    Файл читается и проверяется один раз, при следующих обращениях проверяется только время изменения
+    и размер файла (os.stat): если файл изменился, настройки загружаются заново.
+    """
+
+    def __init__(self, path: str = PATH_TO_USER_SETTINGS_JSON) -> None:
+        self.path = path
+        self._profiles: dict[Optional[str], UserSettings] = {}
+        self._fingerprint: Optional[tuple[int, int]] = None
+        self._lock = threading.Lock()
+
+    def _reload_if_changed(self) -> None:
+        """
+        Метод загрузки настроек, если файл изменился с момента последней загрузки.
+        Выбрасывает FileNotFoundError, если файла нет, и ValueError (в т.ч. json.JSONDecodeError),
+        если файл содержит некорректные данные.
+        """
+        file_stat = os.stat(self.path)
+        fingerprint = (file_stat.st_mtime_ns, file_stat.st_size)
+        if fingerprint == self._fingerprint:
+            return
+        logger.debug(f"Чтение настроек из файла {self.path}...")
+        with open(self.path, "r", encoding="utf-8") as file:
+            self._profiles = parse_user_settings(json.load(file))
+        self._fingerprint = fingerprint
+        logger.info(f"Настройки загружены (профилей пользователей: {len(self._profiles) - 1}).")
+
+    def get(self, user_id: Optional[str] = None) -> UserSettings:
+        """
+        Метод получения настроек пользователя.
+        Принимает идентификатор пользователя (None - общие настройки). Если профиля пользователя нет
+        в файле, возвращаются общие настройки.
+        """
+        with self._lock:
+            self._reload_if_changed()
+            settings = self._profiles.get(user_id)
+            if settings is None:
+                logger.warning(f"Профиль пользователя {user_id} не найден. Используются общие настройки.")
+                settings = self._profiles[None]
+            return settings
+
+
+_settings_loader: Optional[SettingsLoader] = None
+_settings_loader_lock = threading.Lock()
+_env_loaded = False
+
+
+def get_settings_loader() -> SettingsLoader:
+    """Функция получения общего загрузчика настроек (создается при первом обращении)."""
+    global _settings_loader
+    with _settings_loader_lock:
+        if _settings_loader is None:
+            _settings_loader = SettingsLoader()
+        return _settings_loader
+
+
+def set_settings_loader(loader: Optional[SettingsLoader]) -> None:
+    """Функция замены общего загрузчика настроек (если передан None, он будет создан заново при обращении)."""
+    global _settings_loader
+    with _settings_loader_lock:
+        _settings_loader = loader
+
+
+def get_user_settings(user_id: Optional[str] = None) -> UserSettings:
+    """
+    Функция получения настроек пользователя из файла `user_settings.json` (см. `SettingsLoader.get`).
+    Выбрасывает FileNotFoundError, если файла нет, и ValueError, если файл содержит некорректные данные.
+    """
+    return get_settings_loader().get(user_id)
+
+
+def get_env(name: str) -> Optional[str]:
+    """
+    Функция получения значения переменной окружения (API-ключа, пути к файлу и т.д.).
+    Файл `.env` загружается один раз при первом обращении.
+    """
+    global _env_loaded
+    with _settings_loader_lock:
+        if not _env_loaded:
+            from dotenv import load_dotenv  # Импорт при первом обращении к переменным окружения
+
+            load_dotenv()
+            _env_loaded = True
+    return os.getenv(name)
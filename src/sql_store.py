@@ -0,0 +1,298 @@
+import json
+import threading
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.data_cache import get_file_fingerprint
+from src.logging_config import get_logger
+from src.settings import get_env
+from src.utils import get_dataset_path, read_data_file
+
+if TYPE_CHECKING:
+    import sqlite3
+
+TABLE_NAME = "transactions"
+ROW_ID_COLUMN = "_row_id"  # Номер строки в файле (порядок строк и индекс выборок, как у DataFrame из файла)
+DATE_COLUMN = "Дата операции"
+# Индексы таблицы транзакций: {имя индекса: столбцы}
+INDEXES = {
+    "idx_date": ("Дата операции",),
+    "idx_card_date": ("Номер карты", "Дата операции"),
+    "idx_category_date": ("Категория", "Дата операции"),
+}
+INSERT_CHUNK_SIZE = 50_000  # Количество строк, записываемых в базу данных за один запрос
+
+logger = get_logger(__name__, "sql_store.log")
+
+
+def quote_name(name: str) -> str:
+    """Функция экранирования имени столбца (таблицы) для SQL-запроса."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def to_timestamp_ns(value: datetime) -> int:
+    """Функция преобразования даты в целое число наносекунд от 01.01.1970 (формат хранения дат в базе данных)."""
+    return int(pd.Timestamp(value).value)
+
+
+def _describe_column(series: pd.Series) -> dict[str, Any]:
+    """
+    Функция получения описания столбца для восстановления его типа при чтении из базы данных:
+    тип ("datetime", "category", "float", "int", "bool" или "object") и, для category, список категорий.
+    """
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        return {"kind": "category", "categories": dtype.categories.tolist(), "ordered": bool(dtype.ordered)}
+    if dtype == "datetime64[ns]":
+        return {"kind": "datetime"}
+    if isinstance(dtype, np.dtype) and dtype.kind in "biuf":  # Типы NumPy (без типов pandas с пропусками)
+        return {"kind": {"b": "bool", "i": "int", "u": "int", "f": "float"}[dtype.kind]}
+    return {"kind": "object"}
+
+
+def _to_sql_values(series: pd.Series, kind: str) -> list:
+    """Функция преобразования столбца в список значений для записи в базу данных (пропуски - NULL)."""
+    if kind == "datetime":
+        dates = series.to_numpy(dtype="datetime64[ns]")
+        return [None if is_nat else value for is_nat, value in zip(np.isnat(dates).tolist(),
+                                                                   dates.view(np.int64).tolist())]
+    if kind in ("int", "bool"):
+        return series.to_numpy(dtype=np.int64).tolist()
+    values = series.astype(object)
+    return list(values.where(values.notna(), None))
+
+
+def _from_sql_values(values: pd.Series, column: dict[str, Any]) -> Any:
+    """Функция восстановления исходного типа столбца, прочитанного из базы данных (см. `_describe_column`)."""
+    kind = column["kind"]
+    if kind == "datetime":  # Пропуски читаются как наименьшее int64 (значение NaT)
+        return values.to_numpy(dtype=np.int64).view("datetime64[ns]")
+    if kind == "category":
+        return pd.Categorical(values, categories=column["categories"], ordered=column["ordered"])
+    if kind == "float":
+        return values.to_numpy(dtype=float, na_value=np.nan)
+    if kind == "int":
+        return values.to_numpy(dtype=np.int64)
+    if kind == "bool":
+        return values.to_numpy(dtype=np.int64).astype(bool)
+    values = values.astype(object)
+    return values.where(values.notna(), np.nan).to_numpy()
+
+
+class SqliteTransactionStore:
+    """
+    Хранилище транзакций в файле SQLite: данные Excel-файла набора данных (по умолчанию - общего файла
+    `operations.xlsx`) один раз импортируются в таблицу с индексами по (дата), (карта, дата) и (категория, дата),
+    после чего выборки по периоду и суммы расходов рассчитываются SQL-запросами по индексам,
+    без чтения и просмотра всего файла. При изменении Excel-файла (время изменения или размер) данные
+    импортируются заново. Даты хранятся как целое число наносекунд, исходные типы столбцов (category и т.д.)
+    восстанавливаются при чтении, поэтому результаты совпадают с расчетом по DataFrame из файла.
+    """
+
+    def __init__(self, path_to_db: str, dataset_id: Optional[str] = None) -> None:
+        self.path_to_db = path_to_db
+        self.dataset_id = dataset_id
+        self.imports = 0  # Количество импортов данных из Excel-файла
+        self._columns: list[tuple[str, dict[str, Any]]] = []  # Столбцы таблицы с описанием типов
+        self._amount_scale = 1  # 100 - суммы расходов складываются в копейках (как в `CumulativeSpending`)
+        self._fingerprint: Optional[dict] = None
+        self._local = threading.local()  # Соединения SQLite нельзя делить между потоками
+        self._lock = threading.Lock()
+        self._execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._load_meta()
+
+    def _connection(self) -> "sqlite3.Connection":
+        """Метод получения соединения с базой данных для текущего потока (создается при первом обращении)."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            import sqlite3  # Импорт только при использовании хранилища в файле SQLite
+
+            connection = sqlite3.connect(self.path_to_db, timeout=5)
+            connection.execute("PRAGMA journal_mode=WAL")  # Чтение не блокируется импортом в другом процессе
+            self._local.connection = connection
+        return connection
+
+    def _execute(self, query: str, parameters: tuple = ()) -> list:
+        connection = self._connection()
+        with connection:  # Транзакция фиксируется при выходе из блока
+            return connection.execute(query, parameters).fetchall()
+
+    def _load_meta(self) -> None:
+        """Метод чтения описания импортированных данных (столбцы, отпечаток Excel-файла) из базы данных."""
+        meta = {key: json.loads(value) for key, value in self._execute("SELECT key, value FROM meta")}
+        self._columns = [tuple(column) for column in meta.get("columns", [])]  # type: ignore[misc]
+        self._amount_scale = meta.get("amount_scale", 1)
+        self._fingerprint = meta.get("fingerprint")
+
+    def import_frame(self, df: pd.DataFrame, fingerprint: Optional[dict] = None) -> None:
+        """
+        Метод импорта транзакций (DataFrame после приведения типов, см. `read_data_file`) в базу данных.
+        Предыдущие данные заменяются в одной транзакции: запросы из других потоков и процессов
+        видят либо старые, либо новые данные.
+        """
+        if len(df.columns) and DATE_COLUMN not in df.columns:
+            raise ValueError(f"В данных для импорта отсутствует столбец '{DATE_COLUMN}'.")
+        columns = [(str(name), _describe_column(df[name])) for name in df.columns]
+        amount_scale = self._get_amount_scale(df)
+        sql_types = {"datetime": "INTEGER", "int": "INTEGER", "bool": "INTEGER", "float": "REAL"}
+
+        connection = self._connection()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")  # Изменение схемы и данных - в одной транзакции
+            connection.execute(f"DROP TABLE IF EXISTS {TABLE_NAME}")
+            if columns:
+                definitions = ", ".join(f"{quote_name(name)} {sql_types.get(column['kind'], 'TEXT')}"
+                                        for name, column in columns)
+                connection.execute(f"CREATE TABLE {TABLE_NAME} ({ROW_ID_COLUMN} INTEGER PRIMARY KEY, {definitions})")
+                placeholders = ", ".join("?" * (len(columns) + 1))
+                for start in range(0, len(df), INSERT_CHUNK_SIZE):
+                    chunk = df.iloc[start:start + INSERT_CHUNK_SIZE]
+                    values = [_to_sql_values(chunk[name], column["kind"]) for name, column in columns]
+                    connection.executemany(f"INSERT INTO {TABLE_NAME} VALUES ({placeholders})",
+                                           zip(range(start, start + len(chunk)), *values))
+                for index_name, index_columns in INDEXES.items():
+                    if all(name in df.columns for name in index_columns):
+                        connection.execute(f"CREATE INDEX {index_name} ON {TABLE_NAME} "
+                                           f"({', '.join(quote_name(name) for name in index_columns)})")
+            meta = {"columns": columns, "amount_scale": amount_scale, "fingerprint": fingerprint}
+            connection.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                                   [(key, json.dumps(value, ensure_ascii=False)) for key, value in meta.items()])
+        self._columns, self._amount_scale, self._fingerprint = columns, amount_scale, fingerprint
+        self.imports += 1
+        logger.debug(f"В базу данных {self.path_to_db} импортировано {len(df)} транзакций.")
+
+    @staticmethod
+    def _get_amount_scale(df: pd.DataFrame) -> int:
+        """
+        Метод проверки, являются ли все суммы расходов целыми копейками (тогда суммы складываются в копейках,
+        как в `CumulativeSpending`, и совпадают с расчетом по DataFrame без ошибки округления float).
+        """
+        if not {"Сумма платежа", "Сумма операции с округлением"} <= set(df.columns):
+            return 1
+        is_spent = (df["Сумма платежа"] < 0).to_numpy(dtype=bool, na_value=False) & df[DATE_COLUMN].notna().to_numpy()
+        if "Категория" in df.columns:  # Расходы без категории не входят в суммы по категориям
+            is_spent &= df["Категория"].notna().to_numpy()
+        amounts = np.nan_to_num(df["Сумма операции с округлением"].to_numpy(dtype=float, na_value=np.nan)[is_spent])
+        return 100 if np.array_equal(np.round(amounts * 100) / 100, amounts) else 1
+
+    def refresh(self) -> bool:
+        """
+        Метод импорта данных из Excel-файла набора данных, если база данных пуста или файл изменился
+        после последнего импорта. Возвращает True, если данные импортированы.
+        """
+        path = get_dataset_path(self.dataset_id)
+        fingerprint = get_file_fingerprint(path)
+        if fingerprint == self._fingerprint:
+            return False
+        with self._lock:
+            self._load_meta()  # Данные могли быть импортированы другим потоком или процессом
+            if fingerprint == self._fingerprint:
+                return False
+            self.import_frame(read_data_file(dataset_id=self.dataset_id), fingerprint)
+        return True
+
+    def get_version(self) -> str:
+        """Метод получения версии данных (отпечатка импортированного Excel-файла) после проверки изменения файла."""
+        self.refresh()
+        return json.dumps(self._fingerprint, sort_keys=True)
+
+    def _select(self, where: str, parameters: tuple) -> pd.DataFrame:
+        """
+        Метод выборки транзакций по условию (в порядке строк файла) с восстановлением типов столбцов.
+        Возвращает DataFrame с номерами строк файла в качестве индекса (пустой DataFrame, если данных нет).
+        """
+        if not self._columns:
+            return pd.DataFrame()
+        # Пропуски дат заменяются наименьшим int64 (NaT), чтобы столбец читался как int64 без потери точности
+        fields = ", ".join(
+            f"coalesce({quote_name(name)}, {np.iinfo(np.int64).min})" if column["kind"] == "datetime"
+            else quote_name(name)
+            for name, column in self._columns
+        )
+        rows = self._execute(f"SELECT {ROW_ID_COLUMN}, {fields} FROM {TABLE_NAME} WHERE {where} "
+                             f"ORDER BY {ROW_ID_COLUMN}", parameters)
+        values = list(zip(*rows)) if rows else [()] * (len(self._columns) + 1)
+        return pd.DataFrame(
+            {name: _from_sql_values(pd.Series(column_values, dtype=object), column)
+             for (name, column), column_values in zip(self._columns, values[1:])},
+            index=pd.Index(np.array(values[0], dtype=np.int64)),
+        )
+
+    def get_slice(self, start_date: datetime, end_date: datetime) -> pd.DataFrame:
+        """
+        Метод выборки транзакций за период (обе границы включительно) по индексу дат.
+        Результат совпадает с результатом функции `get_slice_of_data` для DataFrame из Excel-файла.
+        """
+        self.refresh()
+        return self._select(f"{quote_name(DATE_COLUMN)} BETWEEN ? AND ?",
+                            (to_timestamp_ns(start_date), to_timestamp_ns(end_date)))
+
+    def spending_by_category(self, category: str, start_date: datetime, end_date: datetime) -> pd.DataFrame:
+        """
+        Метод выборки расходов (транзакций с отрицательной суммой платежа) по категории за период
+        (обе границы включительно) по индексу (категория, дата).
+        """
+        self.refresh()
+        return self._select(
+            f"{quote_name('Категория')} = ? AND {quote_name(DATE_COLUMN)} BETWEEN ? AND ? "
+            f"AND {quote_name('Сумма платежа')} < 0",
+            (category, to_timestamp_ns(start_date), to_timestamp_ns(end_date)),
+        )
+
+    def category_spending(self, start_date: datetime, end_date: datetime) -> pd.Series:
+        """
+        Метод расчета сумм расходов по категориям за период (обе границы включительно) SQL-запросом
+        с группировкой. Возвращает Series {категория: сумма расходов} для категорий с расходами в периоде,
+        упорядоченный по категориям.
+        """
+        self.refresh()
+        if not self._columns:
+            return pd.Series(dtype=float)
+        amount = quote_name("Сумма операции с округлением")
+        total = (f"sum(cast(round({amount} * 100) AS INTEGER))" if self._amount_scale == 100
+                 else f"coalesce(sum({amount}), 0.0)")
+        rows = self._execute(
+            f"SELECT {quote_name('Категория')}, {total} FROM {TABLE_NAME} "
+            f"WHERE {quote_name(DATE_COLUMN)} BETWEEN ? AND ? AND {quote_name('Сумма платежа')} < 0 "
+            f"AND {quote_name('Категория')} IS NOT NULL GROUP BY 1 ORDER BY 1",
+            (to_timestamp_ns(start_date), to_timestamp_ns(end_date)),
+        )
+        sums = np.array([row[1] or 0 for row in rows], dtype=float) / self._amount_scale
+        return pd.Series(sums, index=[row[0] for row in rows])
+
+    def close(self) -> None:
+        """Метод закрытия соединения с базой данных текущего потока."""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+_sql_store: Optional[SqliteTransactionStore] = None
+_sql_store_lock = threading.Lock()
+
+
+def get_sql_store() -> Optional[SqliteTransactionStore]:
+    """
+    Функция получения общего хранилища транзакций в файле SQLite (создается при первом обращении).
+    Если переменная окружения TRANSACTIONS_DB (путь к файлу SQLite, в т.ч. в файле `.env`) не задана,
+    возвращается None - данные анализируются в памяти (общее хранилище `TransactionStore`).
+    """
+    global _sql_store
+    with _sql_store_lock:
+        if _sql_store is None:
+            path_to_db = get_env("TRANSACTIONS_DB")  # Путь к файлу SQLite из .env-файла
+            if not path_to_db:
+                return None
+            _sql_store = SqliteTransactionStore(path_to_db)
+        return _sql_store
+
+
+def set_sql_store(store: Optional[SqliteTransactionStore]) -> None:
+    """Функция замены общего хранилища транзакций в SQLite (если передан None, оно будет создано при обращении)."""
+    global _sql_store
+    with _sql_store_lock:
+        _sql_store = store
@@ -0,0 +1,489 @@
+import itertools
+import sys
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.aggregates import TOP_N_CAPACITY, MonthlyTopTransactions
+from src.logging_config import get_logger
+from src.utils import (SPENDING_KEY_COLUMNS, CumulativeSpending, get_month_range, get_ranking_values,
+                       get_slice_of_data, normalize_transactions, rank_positions, read_data_file, top_n_positions)
+
+STORE_POOL_MAX_STORES = 1_000  # Максимальное количество хранилищ наборов данных в памяти
+STORE_POOL_MAX_MEMORY = 2 * 2**30  # Максимальный объем памяти, занимаемой хранилищами наборов данных (байт)
+
+logger = get_logger(__name__, "store.log")
+
+_store_uids = itertools.count(1)  # Номера хранилищ (уникальны в пределах процесса)
+
+
+def _concat_transactions(old_rows: pd.DataFrame, new_rows: pd.DataFrame) -> pd.DataFrame:
+    """
+    Функция объединения транзакций хранилища с новыми транзакциями.
+    Категории столбцов с типом category объединяются с сохранением порядка уже известных значений
+    (новые значения добавляются в конец), поэтому тип category сохраняется.
+    """
+    if old_rows.empty:
+        return new_rows
+    new_rows = new_rows.copy(deep=False)
+    old_rows = old_rows.copy(deep=False)
+    for column in old_rows.columns:
+        if column in new_rows.columns and isinstance(old_rows[column].dtype, pd.CategoricalDtype):
+            old_categories = old_rows[column].cat.categories
+            new_categories = pd.Index(new_rows[column].dropna().unique())
+            dtype = pd.CategoricalDtype(old_categories.append(new_categories.difference(old_categories)))
+            old_rows[column] = old_rows[column].astype(dtype)
+            new_rows[column] = new_rows[column].astype(dtype)
+    return pd.concat([old_rows, new_rows], ignore_index=True)
+
+
+def _make_filters_key(filters: Optional[dict[str, Any]]) -> tuple:
+    """Функция получения ключа (хешируемого значения) для словаря условий отбора транзакций."""
+    return tuple(
+        sorted(
+            (column, tuple(value) if isinstance(value, (list, tuple, set, frozenset)) else value)
+            for column, value in (filters or {}).items()
+        )
+    )
+
+
+def _frame_memory_usage(df: pd.DataFrame) -> int:
+    """
+    Функция получения объема памяти DataFrame в байтах с учетом строковых значений (как memory_usage(deep=True),
+    которая не работает для столбцов object, доступных только для чтения).
+    """
+    n_bytes = int(df.memory_usage(index=True, deep=False).sum())
+    for column in df.columns:
+        if df[column].dtype == object:
+            n_bytes += sum(map(sys.getsizeof, df[column].to_numpy()))
+    return n_bytes
+
+
+def _make_read_only(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Функция получения DataFrame, данные которого нельзя изменить "на месте" (без копирования данных).
+    Массивы NumPy всех столбцов помечаются как доступные только для чтения.
+    """
+    data: dict[str, Any] = {}
+    for column in df.columns:
+        series = df[column]
+        if isinstance(series.dtype, np.dtype):
+            values = series.to_numpy().view()  # Представление массива столбца (без копирования)
+            values.flags.writeable = False
+            data[column] = values
+        else:
+            data[column] = series.array  # Столбцы с типами расширений pandas (например, category) не изменяются
+    return pd.DataFrame(data, index=df.index, copy=False)
+
+
+class TransactionStore:
+    """
+    Хранилище транзакций, общее для страниц "Главная", "Отчеты" и "Сервисы".
+    Хранит единственную копию загруженных данных (столбцы приводятся к типам для анализа один раз при загрузке)
+    и выдает вызывающему коду представления этих данных, доступные только для чтения.
+    Транзакции хранятся отсортированными по возрастанию даты операции, поэтому выборка за период выполняется
+    двоичным поиском границ периода (O(log n)) и возвращает представление данных без копирования.
+    """
+
+    def __init__(self, df: pd.DataFrame) -> None:
+        self._lock = threading.Lock()
+        # Блокировка загрузки новых транзакций (поиск транзакций, которых нет в хранилище, и их добавление)
+        self.ingest_lock = threading.Lock()
+        self.uid = next(_store_uids)  # Номер хранилища (не повторяется, в отличие от id объекта)
+        self.version = 0  # Версия данных (увеличивается при каждом добавлении транзакций)
+        # Приведение типов (если данные не были приведены при чтении файла). Номера строк - порядковые номера
+        # транзакций в исходных данных (не изменяются при сортировке и добавлении транзакций)
+        self._set_transactions(normalize_transactions(df), np.arange(len(df), dtype=np.int64))
+        # ТОП-N транзакций по месяцам для каждого показателя и условий отбора (рассчитываются при первом запросе)
+        self._top_transactions: dict[tuple, MonthlyTopTransactions] = {}
+        # Накопленные суммы расходов для каждого набора столбцов групп (рассчитываются при первом запросе)
+        self._cumulative_spending: dict[tuple, CumulativeSpending] = {}
+        self._memory_usage: Optional[tuple[int, int]] = None  # (версия данных, объем памяти в байтах)
+        logger.debug(f"Создано хранилище транзакций ({len(df)} строк).")
+
+    def _set_transactions(self, df: pd.DataFrame, row_ids: np.ndarray) -> None:
+        """
+        Метод сохранения транзакций и номеров их строк в хранилище (с сортировкой по дате операции,
+        если она нарушена).
+        """
+        if not df.empty:
+            if not df["Дата операции"].is_monotonic_increasing:
+                order = np.argsort(df["Дата операции"].to_numpy(), kind="stable")
+                df = df.take(order).reset_index(drop=True)
+                row_ids = row_ids[order]
+            self._dates = df["Дата операции"].to_numpy()
+        else:
+            self._dates = np.array([], dtype="datetime64[ns]")
+        self._transactions = _make_read_only(df)
+        self._row_ids = row_ids
+        # Позиции строк в хранилище по их номерам (номера строк - числа от 0 до количества транзакций)
+        self._positions_by_id = np.empty(len(row_ids), dtype=np.int64)
+        self._positions_by_id[row_ids] = np.arange(len(row_ids), dtype=np.int64)
+
+    def append(self, new_rows: pd.DataFrame) -> None:
+        """
+        Метод добавления новых транзакций в хранилище.
+        ТОП-N транзакций по месяцам обновляются только для месяцев с новыми транзакциями, а накопленные суммы
+        расходов дополняются новыми расходами (см. `CumulativeSpending.extended`).
+        Ранее выданные представления данных не изменяются (содержат данные на момент их получения).
+        """
+        new_rows = normalize_transactions(new_rows)
+        if new_rows.empty:
+            return
+        with self._lock:
+            n_old_rows = len(self._row_ids)
+            new_row_ids = np.arange(n_old_rows, n_old_rows + len(new_rows), dtype=np.int64)
+            new_dates = new_rows["Дата операции"].to_numpy()
+            if self._is_after_last_date(new_dates):
+                # Новые транзакции не раньше уже добавленных (ежедневная выгрузка): они дописываются в конец,
+                # индекс дат и позиции строк дополняются, а не пересчитываются (без сортировки всех данных)
+                order = np.argsort(new_dates, kind="stable")
+                combined = _concat_transactions(self._transactions, new_rows.take(order))
+                new_positions = np.empty(len(new_rows), dtype=np.int64)
+                new_positions[order] = np.arange(n_old_rows, len(combined), dtype=np.int64)
+                self._transactions = _make_read_only(combined)
+                self._dates = np.concatenate([self._dates, new_dates[order]])
+                self._row_ids = np.concatenate([self._row_ids, new_row_ids[order]])
+                self._positions_by_id = np.concatenate([self._positions_by_id, new_positions])
+                new_row_ids = new_row_ids[order]
+            else:
+                combined = _concat_transactions(self._transactions, new_rows)
+                self._set_transactions(combined, np.concatenate([self._row_ids, new_row_ids]))
+            # Новые строки берутся из объединенных данных, чтобы категории совпадали с категориями хранилища
+            added_rows = combined.iloc[n_old_rows:]
+            for top_transactions in self._top_transactions.values():
+                top_transactions.add(added_rows, new_row_ids)
+            for key_columns, spending in list(self._cumulative_spending.items()):
+                extended = spending.extended(added_rows)
+                if extended is None:  # Рассчитываются заново при следующем запросе
+                    del self._cumulative_spending[key_columns]
+                else:
+                    self._cumulative_spending[key_columns] = extended
+            self.version += 1
+        logger.debug(f"В хранилище добавлено {len(new_rows)} транзакций (версия данных {self.version}).")
+
+    def _is_after_last_date(self, new_dates: np.ndarray) -> bool:
+        """Проверка, что все даты новых транзакций указаны и не раньше последней даты операции в хранилище."""
+        if len(self._dates) == 0 or np.isnat(self._dates[-1]) or np.isnat(new_dates).any():
+            return False
+        return bool(new_dates.min() >= self._dates[-1])
+
+    def get_last_rows(self) -> pd.DataFrame:
+        """
+        Метод получения транзакций с самой поздней датой операции в хранилище (границы уже загруженных данных).
+        Возвращает представление данных хранилища (пустой DataFrame, если транзакций с датой операции нет).
+        """
+        end_index = int(self._dates.searchsorted(np.datetime64("NaT", "ns"), side="left"))  # Даты NaT - в конце
+        if end_index == 0:
+            return self._transactions.iloc[0:0]
+        start_index = int(self._dates.searchsorted(self._dates[end_index - 1], side="left"))
+        return self._transactions.iloc[start_index:end_index]
+
+    @property
+    def transactions(self) -> pd.DataFrame:
+        """
+        Возвращает представление данных хранилища, доступное только для чтения.
+        Данные не копируются, а попытка изменить их "на месте" приводит к ошибке ValueError.
+        """
+        return self._transactions.copy(deep=False)
+
+    def get_slice(self, start_date: datetime, end_date: datetime) -> pd.DataFrame:
+        """
+        Метод получения транзакций за период (обе границы включительно).
+        Границы периода находятся двоичным поиском по отсортированным датам, выборка - представление данных
+        хранилища без копирования.
+        """
+        start_index, end_index = self._get_positions(start_date, end_date)
+        logger.debug(f"Сделана выборка транзакций в диапазоне дат {start_date} - {end_date}.")
+        return self._transactions.iloc[start_index:end_index]
+
+    def get_month(self, year: str, month: str) -> pd.DataFrame:
+        """Метод получения транзакций за заданный месяц определенного года."""
+        return self.get_slice(*get_month_range(year, month))
+
+    def get_top_n(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        n: int = 5,
+        by: str = "amount",
+        filters: Optional[dict[str, Any]] = None,
+    ) -> pd.DataFrame:
+        """
+        Метод получения ТОП-N транзакций за период (обе границы включительно) по показателю `by` с условиями
+        отбора `filters` (см. функцию `top_n_transactions`; результат совпадает с ее результатом для
+        выборки `get_slice`, упорядоченной по убыванию даты операции, как в выгрузке банка: при равных значениях
+        показателя раньше идет более поздняя транзакция).
+        Для каждого месяца периода используются заранее отобранные транзакции с наибольшими значениями
+        показателя (`MonthlyTopTransactions`), поэтому повторные запросы не просматривают все транзакции.
+        Транзакции неполного месяца просматриваются, только если среди отобранных транзакций месяца
+        в период попало меньше n. Для хранилища без транзакций возвращается пустой DataFrame.
+        """
+        transactions = self._transactions
+        if transactions.empty:
+            return transactions.iloc[0:0]
+        if n > TOP_N_CAPACITY:  # Отобранных транзакций недостаточно - выбор по всем транзакциям периода
+            start_index, end_index = self._get_positions(start_date, end_date)
+            part = self._transactions.iloc[start_index:end_index]
+            return self._transactions.iloc[top_n_positions(part, n, by, filters, newest_first=True) + start_index]
+        with self._lock:
+            key = (by, _make_filters_key(filters))
+            top_transactions = self._top_transactions.get(key)
+            if top_transactions is None:
+                top_transactions = MonthlyTopTransactions(self._transactions, self._row_ids, by, filters)
+                self._top_transactions[key] = top_transactions
+
+            start_date, end_date = pd.Timestamp(start_date), pd.Timestamp(end_date)
+            start_index, end_index = self._get_positions(start_date, end_date)
+            positions, values = [], []
+            month_start = start_date.normalize().replace(day=1)
+            while month_start <= end_date:
+                month_ids, month_values = top_transactions.get_month(month_start.year, month_start.month)
+                month_positions = self._positions_by_id[month_ids]
+                inside = (month_positions >= start_index) & (month_positions < end_index)
+                if inside.sum() >= n or len(month_ids) < top_transactions.capacity:
+                    positions.append(month_positions[inside])
+                    values.append(month_values[inside])
+                else:  # Просмотр всех транзакций месяца, попавших в период
+                    _, month_end_date = get_month_range(str(month_start.year), str(month_start.month))
+                    part_start, part_end = self._get_positions(max(start_date, month_start),
+                                                               min(end_date, month_end_date))
+                    part = self._transactions.iloc[part_start:part_end]
+                    part_positions = top_n_positions(part, n, by, filters, newest_first=True)
+                    positions.append(part_positions + part_start)
+                    values.append(get_ranking_values(part, by)[part_positions])
+                month_start = month_start + pd.DateOffset(months=1)  # Первое число следующего месяца
+
+            if not positions:
+                return self._transactions.iloc[0:0]
+            positions_array = np.concatenate(positions)
+            return self._transactions.iloc[
+                rank_positions(positions_array, np.concatenate(values), n, self._dates[positions_array])
+            ]
+
+    def get_cumulative_spending(self, key_columns: tuple[str, ...] = SPENDING_KEY_COLUMNS) -> CumulativeSpending:
+        """
+        Метод получения накопленных сумм расходов по группам транзакций (см. `CumulativeSpending`).
+        Накопленные суммы рассчитываются при первом запросе для каждого набора столбцов key_columns
+        и дополняются при добавлении транзакций.
+        """
+        key_columns = tuple(key_columns)
+        with self._lock:
+            cumulative_spending = self._cumulative_spending.get(key_columns)
+            if cumulative_spending is None:
+                cumulative_spending = CumulativeSpending(self._transactions, key_columns)
+                self._cumulative_spending[key_columns] = cumulative_spending
+                logger.debug(f"Рассчитаны накопленные суммы расходов по группам {key_columns}.")
+            return cumulative_spending
+
+    def memory_usage(self) -> int:
+        """
+        Метод получения объема памяти, занимаемой транзакциями хранилища и индексами строк (в байтах, с учетом
+        строковых значений). Рассчитывается один раз для каждой версии данных.
+        """
+        with self._lock:
+            if self._memory_usage is None or self._memory_usage[0] != self.version:
+                n_bytes = _frame_memory_usage(self._transactions)
+                n_bytes += self._dates.nbytes + self._row_ids.nbytes + self._positions_by_id.nbytes
+                self._memory_usage = (self.version, n_bytes)
+            return self._memory_usage[1]
+
+    def _get_positions(self, start_date: datetime, end_date: datetime) -> tuple[int, int]:
+        """Метод поиска позиций границ периода (обе границы включительно) в отсортированных датах."""
+        start_index = self._dates.searchsorted(pd.Timestamp(start_date).to_datetime64(), side="left")
+        end_index = self._dates.searchsorted(pd.Timestamp(end_date).to_datetime64(), side="right")
+        return int(start_index), int(end_index)
+
+    def __len__(self) -> int:
+        return len(self._transactions)
+
+
+class TransactionStorePool:
+    """
+    Пул хранилищ транзакций наборов данных (пользователей).
+    Хранилище набора данных загружается при первом обращении (функцией loader, по умолчанию - из файла
+    набора данных, см. `read_data_file`) и остается в памяти для следующих запросов. Если количество хранилищ
+    превышает max_stores или занимаемая ими память (см. `TransactionStore.memory_usage`) - max_memory байт,
+    из пула удаляются хранилища, к которым дольше всего не обращались (LRU). Хранилище, к которому обратились
+    последним, не удаляется, даже если оно одно превышает ограничение памяти.
+    Разные наборы данных загружаются параллельно, а одновременные запросы одного набора данных ожидают
+    одной загрузки.
+    """
+
+    def __init__(
+        self,
+        max_stores: int = STORE_POOL_MAX_STORES,
+        max_memory: int = STORE_POOL_MAX_MEMORY,
+        loader: Optional[Callable[[str], TransactionStore]] = None,
+    ) -> None:
+        self.max_stores = max_stores
+        self.max_memory = max_memory
+        self._loader = loader or (lambda dataset_id: TransactionStore(read_data_file(dataset_id=dataset_id)))
+        self._stores: OrderedDict[str, TransactionStore] = OrderedDict()  # В порядке обращения (последние - в конце)
+        self._loading_locks: dict[str, threading.Lock] = {}  # Блокировки загрузки наборов данных
+        self._lock = threading.Lock()
+        self.loads = 0  # Количество загрузок хранилищ
+        self.evictions = 0  # Количество удалений хранилищ из пула
+
+    def get(self, dataset_id: str) -> TransactionStore:
+        """Метод получения хранилища набора данных (загружается, если его нет в пуле)."""
+        with self._lock:
+            store = self._stores.get(dataset_id)
+            if store is not None:
+                self._stores.move_to_end(dataset_id)
+                return store
+            loading_lock = self._loading_locks.setdefault(dataset_id, threading.Lock())
+        with loading_lock:
+            with self._lock:  # Набор данных мог быть загружен другим потоком во время ожидания
+                store = self._stores.get(dataset_id)
+                if store is not None:
+                    self._stores.move_to_end(dataset_id)
+                    return store
+            try:
+                store = self._loader(dataset_id)
+            except BaseException:
+                with self._lock:
+                    self._loading_locks.pop(dataset_id, None)
+                raise
+            with self._lock:  # Хранилище добавляется в пул вместе с удалением блокировки загрузки
+                self._stores[dataset_id] = store
+                self._loading_locks.pop(dataset_id, None)
+                self.loads += 1
+                self._evict()
+        logger.debug(f"Загружено хранилище набора данных {dataset_id} ({len(store)} строк).")
+        return store
+
+    def _evict(self) -> None:
+        """Метод удаления из пула хранилищ, к которым дольше всего не обращались, до выполнения ограничений."""
+        memory = sum(store.memory_usage() for store in self._stores.values())
+        while len(self._stores) > 1 and (len(self._stores) > self.max_stores or memory > self.max_memory):
+            dataset_id, store = self._stores.popitem(last=False)
+            memory -= store.memory_usage()
+            self.evictions += 1
+            logger.debug(f"Хранилище набора данных {dataset_id} удалено из пула.")
+
+    def memory_usage(self) -> int:
+        """Метод получения объема памяти, занимаемой хранилищами пула (в байтах)."""
+        with self._lock:
+            return sum(store.memory_usage() for store in self._stores.values())
+
+    def __contains__(self, dataset_id: object) -> bool:
+        with self._lock:
+            return dataset_id in self._stores
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._stores)
+
+
+_store: Optional[TransactionStore] = None
+_store_lock = threading.Lock()
+_store_pool: Optional[TransactionStorePool] = None
+
+
+def get_store_pool() -> TransactionStorePool:
+    """Функция получения общего пула хранилищ наборов данных (создается при первом обращении)."""
+    global _store_pool
+    with _store_lock:
+        if _store_pool is None:
+            _store_pool = TransactionStorePool()
+        return _store_pool
+
+
+def set_store_pool(pool: Optional[TransactionStorePool]) -> None:
+    """Функция замены общего пула хранилищ наборов данных (если передан None, он будет создан заново)."""
+    global _store_pool
+    with _store_lock:
+        _store_pool = pool
+
+
+def get_transaction_store(dataset_id: Optional[str] = None) -> TransactionStore:
+    """
+    Функция получения хранилища транзакций.
+    Принимает идентификатор набора данных (пользователя): None - общее хранилище (при первом вызове данные
+    загружаются из файла функцией `read_data_file`, при последующих - возвращается уже загруженное хранилище),
+    иначе - хранилище набора данных из общего пула (см. `TransactionStorePool`).
+    """
+    if dataset_id is not None:
+        return get_store_pool().get(dataset_id)
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = TransactionStore(read_data_file())
+            logger.debug("Хранилище транзакций загружено из файла.")
+        return _store
+
+
+def set_transaction_store(store: Optional[TransactionStore]) -> None:
+    """
+    Функция замены общего хранилища транзакций (например, хранилищем с другими данными).
+    Если передан None, хранилище будет заново загружено из файла при следующем обращении.
+    """
+    global _store
+    with _store_lock:
+        _store = store
+
+
+def resolve_transactions(df: Optional[pd.DataFrame], dataset_id: Optional[str] = None) -> pd.DataFrame:
+    """
+    Функция выбора данных для анализа: если DataFrame не передан (None), возвращаются данные хранилища
+    набора данных dataset_id (None - общего хранилища).
+    """
+    if df is None:
+        return get_transaction_store(dataset_id).transactions
+    return df
+
+
+def _find_store(df: Optional[pd.DataFrame], dataset_id: Optional[str] = None) -> Optional[TransactionStore]:
+    """
+    Функция поиска хранилища данных: для None - хранилище набора данных dataset_id, для переданного DataFrame - None.
+    Переданный DataFrame (даже полученный из хранилища) обрабатывается как данные вызывающего кода: его столбцы
+    могли быть заменены, а данные хранилища - дополнены после его получения.
+    """
+    return get_transaction_store(dataset_id) if df is None else None
+
+
+def get_store_version(df: Optional[pd.DataFrame], dataset_id: Optional[str] = None) -> Optional[tuple[int, int]]:
+    """
+    Функция получения версии данных хранилища для ключей кеша результатов: для None (данные хранилища набора
+    данных dataset_id) - (номер хранилища, версия данных), для переданного DataFrame - None.
+    """
+    store = _find_store(df, dataset_id)
+    return None if store is None else (store.uid, store.version)
+
+
+def slice_by_date(df: Optional[pd.DataFrame], start_date: datetime, end_date: datetime,
+                  dataset_id: Optional[str] = None) -> pd.DataFrame:
+    """
+    Функция получения транзакций за период (обе границы включительно).
+    Для None (данные хранилища набора данных dataset_id) выборка выполняется по отсортированному индексу дат
+    хранилища, для переданного DataFrame - полным просмотром столбца "Дата операции"
+    (функция `get_slice_of_data`).
+    """
+    store = _find_store(df, dataset_id)
+    if store is not None:
+        return store.get_slice(start_date, end_date)
+    return get_slice_of_data(start_date, end_date, df)
+
+
+def slice_by_month(df: Optional[pd.DataFrame], year: str, month: str, dataset_id: Optional[str] = None
+                   ) -> pd.DataFrame:
+    """Функция получения транзакций за заданный месяц определенного года (см. `slice_by_date`)."""
+    return slice_by_date(df, *get_month_range(year, month), dataset_id=dataset_id)
+
+
+def cumulative_spending(df: Optional[pd.DataFrame], key_columns: tuple[str, ...] = SPENDING_KEY_COLUMNS,
+                        dataset_id: Optional[str] = None) -> CumulativeSpending:
+    """
+    Функция получения накопленных сумм расходов по группам транзакций (см. `CumulativeSpending`).
+    Для None (данные хранилища набора данных dataset_id) используются накопленные суммы хранилища
+    (рассчитываются один раз), для переданного DataFrame - рассчитываются по переданным данным.
+    """
+    store = _find_store(df, dataset_id)
+    if store is not None:
+        return store.get_cumulative_spending(key_columns)
+    return CumulativeSpending(resolve_transactions(df), key_columns)
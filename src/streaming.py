@@ -0,0 +1,273 @@
+import json
+from datetime import datetime
+from typing import Any, Generator, Iterable, Optional, Protocol
+
+import pandas as pd
+from openpyxl import load_workbook  # type: ignore[import-untyped]
+from openpyxl.reader.excel import ExcelReader  # type: ignore[import-untyped]
+from openpyxl.styles.stylesheet import apply_stylesheet  # type: ignore[import-untyped]
+
+try:  # Закрытый модуль openpyxl (версия openpyxl ограничена в pyproject.toml)
+    from openpyxl.worksheet._reader import WorkSheetParser  # type: ignore[import-untyped]
+except ImportError:
+    WorkSheetParser = None
+
+from src.aggregates import MonthlyAggregates
+from src.logging_config import get_logger
+from src.services import calculate_cashback_by_category
+from src.utils import (PATH_TO_EXCEL, SHEET_NAME, get_month_range, get_summary_card_data, normalize_transactions,
+                       top_5_transactions_by_sum, top_n_transactions)
+
+CHUNK_SIZE = 50_000  # Количество строк Excel-файла в одной части (определяет объем памяти для обработки)
+
+logger = get_logger(__name__, "streaming.log")
+
+
+def _iter_sheet_rows(path: str, sheet_name: str) -> Generator[tuple, None, None]:
+    """
+    Функция-генератор построчного чтения значений ячеек листа Excel-файла.
+    Используются те же классы openpyxl, что и в режиме "только чтение" (`load_workbook(read_only=True)`), но без
+    предварительного определения размеров листа: если размеры не записаны в файле (как в выгрузке банка),
+    openpyxl определяет их просмотром всего листа, и чтение первых строк требует разбора всего файла.
+    Если закрытые классы и атрибуты openpyxl недоступны (изменились в другой версии), лист читается в режиме
+    "только чтение" (см. `_iter_sheet_rows_read_only`).
+    Возвращает кортежи значений ячеек строк (строки без значений пропускаются).
+    """
+    if WorkSheetParser is None:
+        yield from _iter_sheet_rows_read_only(path, sheet_name)
+        return
+    reader = ExcelReader(path, read_only=True, data_only=True)
+    try:
+        reader.read_manifest()
+        reader.read_strings()
+        reader.read_workbook()
+        apply_stylesheet(reader.archive, reader.wb)  # Форматы ячеек (для преобразования дат, записанных числами)
+        targets = [rel.target for sheet, rel in reader.parser.find_sheets() if sheet.name == sheet_name]
+        if not targets:
+            raise KeyError(f"Worksheet {sheet_name} does not exist.")
+        date_formats = getattr(reader.wb, "_date_formats", None)
+        timedelta_formats = getattr(reader.wb, "_timedelta_formats", None)
+        if date_formats is not None and timedelta_formats is not None:
+            with reader.archive.open(targets[0]) as source:
+                parser = WorkSheetParser(source, reader.shared_strings, data_only=True, epoch=reader.wb.epoch,
+                                         date_formats=date_formats, timedelta_formats=timedelta_formats)
+                for _, cells in parser.parse():
+                    if not cells:
+                        continue
+                    values = [None] * max(cell["column"] for cell in cells)
+                    for cell in cells:
+                        values[cell["column"] - 1] = cell["value"]
+                    yield tuple(values)
+            return
+    finally:
+        reader.archive.close()
+    yield from _iter_sheet_rows_read_only(path, sheet_name)
+
+
+def _iter_sheet_rows_read_only(path: str, sheet_name: str) -> Generator[tuple, None, None]:
+    """
+    Функция-генератор построчного чтения значений ячеек листа Excel-файла в режиме openpyxl "только чтение"
+    (только открытые функции openpyxl; если размеры листа не записаны в файле, первые строки возвращаются
+    после просмотра всего листа). Строки возвращаются в том же виде, что и `_iter_sheet_rows`: пустые ячейки
+    в конце строки отбрасываются, строки без значений пропускаются.
+    """
+    logger.warning(f"Закрытые классы openpyxl недоступны, файл {path} читается в режиме 'только чтение'.")
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for row in wb[sheet_name].iter_rows(values_only=True):
+            length = len(row)
+            while length and row[length - 1] is None:
+                length -= 1
+            if length:
+                yield row[:length]
+    finally:
+        wb.close()
+
+
+def iter_excel_chunks(
+    path: str = PATH_TO_EXCEL, sheet_name: str = SHEET_NAME, chunk_size: int = CHUNK_SIZE
+) -> Generator[pd.DataFrame, None, None]:
+    """
+    Функция-генератор чтения листа Excel-файла частями.
+    Файл читается построчно (см. `_iter_sheet_rows`), поэтому в памяти находится не больше chunk_size строк.
+    Пустые строки пропускаются.
+    Возвращает части листа в формате DataFrame (названия столбцов - из первой строки листа).
+    """
+    rows = _iter_sheet_rows(path, sheet_name)
+    try:
+        header = next(rows, None)
+        if header is None:  # Если лист пустой...
+            return
+        columns = list(header)
+        n_columns = len(columns)
+        chunk: list[tuple] = []
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            # Строки дополняются (обрезаются) до количества столбцов заголовка
+            chunk.append(row[:n_columns] + (None,) * (n_columns - len(row)))
+            if len(chunk) == chunk_size:
+                yield pd.DataFrame(chunk, columns=columns)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame(chunk, columns=columns)
+    finally:
+        rows.close()
+
+
+def normalize_chunks(chunks: Iterable[pd.DataFrame]) -> Generator[pd.DataFrame, None, None]:
+    """
+    Функция-генератор приведения частей данных к типам для анализа (как при чтении файла функцией
+    `read_data_file`: "Карта не указана" вместо пустого номера карты и `normalize_transactions`).
+    """
+    for chunk in chunks:
+        if "Номер карты" in chunk.columns:
+            chunk = chunk.assign(**{"Номер карты": chunk["Номер карты"].fillna("Карта не указана")})
+        yield normalize_transactions(chunk)
+
+
+def _select_period(chunk: pd.DataFrame, start_date: datetime, end_date: datetime) -> pd.DataFrame:
+    """Функция отбора транзакций части данных за период (обе границы включительно)."""
+    return chunk[chunk["Дата операции"].between(start_date, end_date)]
+
+
+def filter_chunks(
+    chunks: Iterable[pd.DataFrame], start_date: datetime, end_date: datetime
+) -> Generator[pd.DataFrame, None, None]:
+    """
+    Функция-генератор отбора транзакций за период (обе границы включительно).
+    Части, в которых после отбора не осталось транзакций, пропускаются.
+    """
+    for chunk in chunks:
+        chunk = _select_period(chunk, start_date, end_date)
+        if not chunk.empty:
+            yield chunk
+
+
+class ChunkAccumulator(Protocol):
+    """Расчет показателя по частям данных: `update` вызывается для каждой части, `result` - после всех частей."""
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        """Метод учета части данных."""
+        ...
+
+    def result(self) -> Any:
+        """Метод получения результата расчета."""
+        ...
+
+
+class CardSummaryAccumulator:
+    """
+    Сводная информация по картам за период (результат совпадает с `get_summary_card_data` для транзакций
+    за период). Хранятся только агрегаты по месяцам, а не транзакции.
+    """
+
+    def __init__(self, start_date: datetime, end_date: datetime) -> None:
+        self.start_date, self.end_date = start_date, end_date
+        self.aggregates = MonthlyAggregates(pd.DataFrame())
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        self.aggregates.add(_select_period(chunk, self.start_date, self.end_date))
+
+    def result(self) -> list[dict]:
+        return get_summary_card_data(self.aggregates.to_frame())
+
+
+class CashbackAccumulator:
+    """
+    Кешбэк по категориям за месяц (результат совпадает с `get_high_cashback_categories`).
+    Хранятся только агрегаты месяца, а не транзакции.
+    """
+
+    def __init__(self, year: str, month: str) -> None:
+        self.start_date, self.end_date = get_month_range(year, month)
+        self.aggregates = MonthlyAggregates(pd.DataFrame())
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        self.aggregates.add(_select_period(chunk, self.start_date, self.end_date))
+
+    def result(self) -> str:
+        return json.dumps(calculate_cashback_by_category(self.aggregates.to_frame()), indent=4, ensure_ascii=False)
+
+
+class TopTransactionsAccumulator:
+    """
+    ТОП-N транзакций за период (результат совпадает с `top_n_transactions` для транзакций за период).
+    Хранятся только n лучших транзакций из уже обработанных частей: они объединяются со следующей частью
+    (и идут перед ее транзакциями, поэтому порядок при равных значениях сохраняется).
+    """
+
+    def __init__(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        n: int = 5,
+        by: str = "amount",
+        filters: Optional[dict[str, Any]] = None,
+    ) -> None:
+        self.start_date, self.end_date = start_date, end_date
+        self.n, self.by, self.filters = n, by, filters
+        self._top: Optional[pd.DataFrame] = None
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        chunk = _select_period(chunk, self.start_date, self.end_date)
+        chunk = top_n_transactions(chunk, self.n, self.by, self.filters)
+        if self._top is None or self._top.empty:
+            self._top = chunk
+        elif not chunk.empty:  # Лучшие транзакции части сравниваются с лучшими транзакциями предыдущих частей
+            self._top = top_n_transactions(pd.concat([self._top, chunk]), self.n, self.by)
+
+    def result(self) -> pd.DataFrame:
+        return self._top if self._top is not None else pd.DataFrame()
+
+
+def consume_chunks(chunks: Iterable[pd.DataFrame], accumulators: Iterable[ChunkAccumulator]) -> int:
+    """
+    Функция обработки частей данных всеми расчетами за один проход.
+    Возвращает количество обработанных строк.
+    """
+    accumulators = list(accumulators)
+    n_rows = 0
+    for chunk in chunks:
+        for accumulator in accumulators:
+            accumulator.update(chunk)
+        n_rows += len(chunk)
+    return n_rows
+
+
+def stream_report(
+    start_date: datetime,
+    end_date: datetime,
+    year: str,
+    month: str,
+    path: str = PATH_TO_EXCEL,
+    chunk_size: int = CHUNK_SIZE,
+) -> dict:
+    """
+    Функция расчета показателей по Excel-файлу с транзакциями за один проход по файлу без загрузки его в память.
+    Принимает период для сводной информации по картам и ТОП-5 транзакций (обе границы включительно), год и месяц
+    для кешбэка по категориям, путь к Excel-файлу и количество строк в одной части.
+    Возвращает словарь с результатами, совпадающими с результатами функций `get_summary_card_data`,
+    `top_5_transactions_by_sum` и `get_high_cashback_categories` для данных, прочитанных `read_data_file`:
+    {"cards": [...], "top_transactions": [...], "cashback": "JSON-строка"}.
+    """
+    cards = CardSummaryAccumulator(start_date, end_date)
+    top_transactions = TopTransactionsAccumulator(start_date, end_date, 5, by="amount", filters={"Статус": "OK"})
+    cashback = CashbackAccumulator(year, month)
+
+    # Конвейер: чтение частей файла -> приведение типов -> отбор транзакций, нужных хотя бы одному расчету ->
+    # расчет всех показателей
+    month_start_date, month_end_date = get_month_range(year, month)
+    chunks = filter_chunks(
+        normalize_chunks(iter_excel_chunks(path, chunk_size=chunk_size)),
+        min(pd.Timestamp(start_date), month_start_date),
+        max(pd.Timestamp(end_date), month_end_date),
+    )
+    n_rows = consume_chunks(chunks, [cards, top_transactions, cashback])
+    logger.info(f"Обработан файл {path} ({n_rows} строк за период расчетов).")
+
+    return {
+        "cards": cards.result(),
+        "top_transactions": top_5_transactions_by_sum(top_transactions.result()),
+        "cashback": cashback.result(),
+    }
@@ -1,22 +1,41 @@
+import copy
 import json
-import logging
 import os
-from datetime import datetime
+import re
+from datetime import datetime, timedelta
+from typing import Any, Optional
 
+import numpy as np
 import pandas as pd
-import requests
-from dotenv import load_dotenv
 
-PATH_TO_EXCEL = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "operations.xlsx")
-PATH_TO_USER_SETTINGS_JSON = os.path.join(os.path.dirname(os.path.dirname(__file__)), "user_settings.json")
-PATH_TO_LOG_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "logs", "utils.log")
+from src.data_cache import load_cached_frame, save_cached_frame
+from src.http_client import get_http_client
+from src.logging_config import get_logger
+from src.market_cache import CURRENCIES_TTL, STOCKS_TTL, get_market_data_cache, make_cache_key
+from src.metrics import timed
+from src.settings import PATH_TO_USER_SETTINGS_JSON, get_env, get_user_settings
 
-logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-file_handler = logging.FileHandler(PATH_TO_LOG_FILE, "w", encoding="utf-8")
-file_formatter = logging.Formatter("%(asctime)s - %(filename)s - %(funcName)s - %(levelname)s: %(message)s")
-file_handler.setFormatter(file_formatter)
-logger.addHandler(file_handler)
+PATH_TO_EXCEL = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "operations.xlsx")
+# Папка с файлами транзакций пользователей (наборов данных): `<идентификатор набора данных>.xlsx`
+PATH_TO_DATASETS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "users")
+DATASET_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,64}")  # Допустимые идентификаторы наборов данных
+SHEET_NAME = "Отчет по операциям"
+DATE_TIME_FORMAT = "%d.%m.%Y %H:%M:%S"  # Формат столбца "Дата операции" в Excel-файле
+DATE_FORMAT = "%d.%m.%Y"  # Формат дат без времени (используется, если время операции не указано)
+AMOUNT_COLUMNS = ("Сумма платежа", "Сумма операции с округлением")  # Столбцы с суммами (тип float64)
+CATEGORY_COLUMNS = ("Категория", "Номер карты", "Статус")  # Столбцы с повторяющимися значениями (тип category)
+URL_APILAYER = "https://api.apilayer.com/exchangerates_data/latest"  # URL для API-запроса текущих курсов валют
+URL_MARKETSTACK = "http://api.marketstack.com/v1/eod/latest"  # URL для API-запроса курсов акций (End-of-Day Data)
+SPENDING_KEY_COLUMNS = ("Номер карты", "Категория")  # Группы транзакций для накопленных сумм расходов
+CALENDAR_MONTH = "M"  # Длина периода "календарный месяц" (с первого числа месяца до конца периода)
+# Показатели для выбора ТОП-N транзакций: название показателя - столбец с его значениями
+TOP_N_RANKINGS = {
+    "amount": "Сумма операции с округлением",  # По сумме операции
+    "cashback": "Кэшбэк",  # По кешбэку
+    "abs_payment": "Сумма платежа",  # По модулю суммы платежа (расходы и поступления)
+}
+
+logger = get_logger(__name__, "utils.log")
 
 
 def get_date_range(date_time: str) -> tuple[datetime, datetime]:
@@ -36,39 +55,146 @@ def get_date_range(date_time: str) -> tuple[datetime, datetime]:
     return start_date, end_date
 
 
-def read_data_file() -> pd.DataFrame:
+def get_month_range(year: str, month: str) -> tuple[datetime, datetime]:
+    """
+    Функция получения границ месяца для выборки транзакций.
+    Принимает год и месяц в формате str.
+    Возвращает начало месяца и последний момент месяца (с точностью до наносекунды) в виде объектов datetime.
+    """
+    start_date = datetime(int(year), int(month), 1)  # Первое число месяца
+    next_month_start = (start_date + timedelta(days=32)).replace(day=1)  # Первое число следующего месяца
+    end_date = pd.Timestamp(next_month_start) - pd.Timedelta(1, unit="ns")  # Последний момент месяца
+
+    return start_date, end_date
+
+
+def get_dataset_path(dataset_id: Optional[str] = None) -> str:
+    """
+    Функция получения пути к Excel-файлу с транзакциями набора данных (пользователя).
+    Принимает идентификатор набора данных (None - общий файл `data/operations.xlsx`).
+    Файлы пользователей находятся в папке `data/users`: `<идентификатор>.xlsx`.
+    Выбрасывает ValueError, если идентификатор содержит недопустимые символы (допустимы латинские буквы, цифры,
+    "_" и "-"), чтобы идентификатор нельзя было использовать для доступа к файлам вне папки.
+    """
+    if dataset_id is None:
+        return PATH_TO_EXCEL
+    if not DATASET_ID_PATTERN.fullmatch(dataset_id):
+        raise ValueError(f"Недопустимый идентификатор набора данных: {dataset_id!r}.")
+    return os.path.join(PATH_TO_DATASETS_DIR, f"{dataset_id}.xlsx")
+
+
+@timed()
+def read_data_file(use_cache: bool = True, dataset_id: Optional[str] = None) -> pd.DataFrame:
     """
         Функция получения объекта DataFrame с транзакциями из файла для последующего анализа.
-        Считывает данные из файла.
+        Считывает данные из файла набора данных (см. `get_dataset_path`; по умолчанию - общий файл) и приводит
+        столбцы к типам для анализа (см. `normalize_transactions`).
+        При первом чтении данные сохраняются в колоночный кеш рядом с файлом,
+        при последующих - читаются из кеша (пока Excel-файл не изменится). Параметр `use_cache` позволяет
+        отключить кеш и прочитать Excel-файл напрямую.
         Возвращает датафрейм с транзакциями, отсортированный по убыванию даты.
     """
-    df_excel = pd.read_excel(PATH_TO_EXCEL, sheet_name="Отчет по операциям")  # Чтение данных из Excel-файла
+    path = get_dataset_path(dataset_id)
+    if use_cache:
+        df_cached = load_cached_frame(path, SHEET_NAME)  # Чтение данных из кеша (если он актуален)
+        if df_cached is not None:
+            logger.debug(f"Выполнено чтение файла {path} из кеша.")
+            return df_cached
+
+    df_excel = pd.read_excel(path, sheet_name=SHEET_NAME)  # Чтение данных из Excel-файла
     if df_excel.empty:  # Если данных нет, функция возвращает пустой DataFrame
         print("Ошибка. Данные для анализа не обнаружены.")
         return pd.DataFrame()
     df_excel["Номер карты"] = df_excel["Номер карты"].fillna("Карта не указана")  # В ячейки без номера карты
     # записывается "Карта не указана"
-    logger.debug(f"Выполнено чтение файла {PATH_TO_EXCEL}.")
+    df_excel = normalize_transactions(df_excel)  # Приведение столбцов к типам для анализа (один раз при чтении)
+    logger.debug(f"Выполнено чтение файла {path}.")
+
+    if use_cache:
+        save_cached_frame(df_excel, path, SHEET_NAME)  # Сохранение данных в кеш для следующих чтений
 
     return df_excel
 
 
-def get_slice_of_data(start_date: datetime, end_date: datetime) -> pd.DataFrame:
+def parse_operation_dates(dates: pd.Series) -> pd.Series:
+    """
+    Функция преобразования дат операций из строк формата ДД.ММ.ГГГГ ЧЧ:ММ:СС (или ДД.ММ.ГГГГ) в datetime64[ns].
+    Разбор выполняется по явно заданному формату, что значительно быстрее автоматического определения формата.
+    """
+    parsed_dates = pd.to_datetime(dates, format=DATE_TIME_FORMAT, errors="coerce")
+    without_time = parsed_dates.isna() & dates.notna()  # Даты, указанные без времени
+    if without_time.any():
+        parsed_dates[without_time] = pd.to_datetime(dates[without_time], format=DATE_FORMAT)
+    return parsed_dates.astype("datetime64[ns]")
+
+
+def normalize_transactions(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Функция приведения столбцов DataFrame с транзакциями к типам для анализа:
+    "Дата операции" - datetime64[ns], суммы ("Сумма платежа", "Сумма операции с округлением") - float64,
+    "Категория", "Номер карты" и "Статус" - category.
+    Уже приведенные (и отсутствующие) столбцы не изменяются, поэтому повторный вызов почти ничего не стоит.
+    Возвращает новый DataFrame (исходный DataFrame не изменяется).
+    """
+    columns = {}
+    if "Дата операции" in df.columns and df["Дата операции"].dtype != "datetime64[ns]":
+        columns["Дата операции"] = (
+            df["Дата операции"].astype("datetime64[ns]")
+            if pd.api.types.is_datetime64_any_dtype(df["Дата операции"])
+            else parse_operation_dates(df["Дата операции"])
+        )
+    for column in AMOUNT_COLUMNS:
+        if column in df.columns and df[column].dtype != "float64":
+            columns[column] = df[column].astype("float64")
+    for column in CATEGORY_COLUMNS:
+        if column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            columns[column] = df[column].astype("category")
+
+    if not columns:  # Если все столбцы уже приведены к нужным типам, DataFrame возвращается без изменений
+        return df
+    logger.debug(f"Приведены к типам для анализа столбцы: {list(columns)}.")
+    return df.assign(**columns)
+
+
+def get_operation_dates(df: pd.DataFrame) -> pd.Series:
+    """
+    Функция получения столбца "Дата операции" в формате datetime.
+    Если даты уже преобразованы (при чтении файла или в хранилище транзакций), столбец возвращается без изменений,
+    иначе возвращается преобразованная копия столбца (исходный DataFrame не изменяется).
+    """
+    if pd.api.types.is_datetime64_any_dtype(df["Дата операции"]):
+        return df["Дата операции"]
+    return parse_operation_dates(df["Дата операции"])
+
+
+@timed()
+def get_slice_of_data(start_date: datetime, end_date: datetime, df: Optional[pd.DataFrame] = None) -> pd.DataFrame:
     """
-        Функция получения выборки транзакций из Excel-файла для последующего анализа.
-        Принимает даты начала и конца выборки в виде объектов datetime.
+        Функция получения выборки транзакций для последующего анализа.
+        Принимает даты начала и конца выборки в виде объектов datetime и, опционально, данные о транзакциях
+        в формате DataFrame (если данные не переданы, они читаются из Excel-файла или, если задана переменная
+        окружения TRANSACTIONS_DB, выбираются из базы данных транзакций, см. `src.sql_store`).
         Возвращает датафрейм с транзакциями за указанный период, отсортированный по возрастанию даты.
     """
 
-    df = read_data_file()  # Чтение данных из Excel-файла
+    if df is None:
+        from src.sql_store import get_sql_store  # Импорт при вызове (модуль sql_store использует этот модуль)
+
+        sql_store = get_sql_store()
+        if sql_store is not None:  # Выборка SQL-запросом по индексу дат в базе данных транзакций
+            return sql_store.get_slice(start_date, end_date)
+        df = read_data_file()  # Чтение данных из Excel-файла
     if df.empty:  # Если данных нет, функция возвращает пустой DataFrame
         print("Ошибка. Данные для анализа не обнаружены.")
         return pd.DataFrame()
-    df["Дата операции"] = pd.to_datetime(df["Дата операции"], dayfirst=True)  # Преобразование дат в столбце
-    # "Дата операции" в формат datetime для выборки по интервалу дат
-
-    slice_df = df[df["Дата операции"].between(start_date, end_date)]  # Выборка транзакций для заданного
-    # промежутка дат
+    operation_dates = get_operation_dates(df)  # Даты из столбца "Дата операции" в формате datetime для выборки
+    # по интервалу дат
+
+    period_mask = operation_dates.between(start_date, end_date)
+    slice_df = df[period_mask]  # Выборка транзакций для заданного промежутка дат
+    if not pd.api.types.is_datetime64_any_dtype(df["Дата операции"]):  # Если даты преобразовывались, в выборку
+        # записываются преобразованные даты (в копию данных, исходный DataFrame не изменяется)
+        slice_df = slice_df.assign(**{"Дата операции": operation_dates[period_mask]})
     logger.debug(f"Сделана выборка транзакций в диапазоне дат {start_date} - {end_date}.")
 
     return slice_df
@@ -92,6 +218,7 @@ def get_time_for_greeting() -> str:
         return "Доброй ночи!"
 
 
+@timed()
 def get_summary_card_data(df: pd.DataFrame) -> list[dict]:
     """
     Функция получения сводных данных о расходах по всем картам клиента (в т.ч. отдельно для всех неуказанных карт).
@@ -108,24 +235,301 @@ def get_summary_card_data(df: pd.DataFrame) -> list[dict]:
         return []
     spent_df = df[df["Сумма платежа"] < 0]  # DataFrame только с расходами
 
-    card_grouped = spent_df.groupby(by="Номер карты", as_index=False)  # Группировка данных по номерам карт
+    card_grouped = spent_df.groupby(by="Номер карты", as_index=False, observed=True)  # Группировка данных
+    # по номерам карт
     cards_sum = card_grouped["Сумма операции с округлением"].sum()  # Расчет сумм расходов по каждой карте
 
-    result = []
-    # Формирование данных для вывода сводной информации по каждой карте (в т.ч. отдельно для всех неуказанных карт)
-    for index, row in cards_sum.iterrows():
-        result.append(
+    # Формирование данных для вывода сводной информации по каждой карте (в т.ч. отдельно для всех неуказанных
+    # карт). Столбцы обрабатываются целиком, а результат собирается из списков значений (без построчного перебора
+    # DataFrame)
+    result = format_card_summary(
+        cards_sum["Номер карты"].astype(str).tolist(), cards_sum["Сумма операции с округлением"].to_numpy(dtype=float)
+    )
+    logger.debug("Сводная информация по каждой карте успешно получена.")
+
+    return result
+
+
+def format_card_summary(cards: list[str], total_spent: np.ndarray) -> list[dict]:
+    """
+    Функция формирования сводной информации по картам (см. `get_summary_card_data`).
+    Принимает номера карт и суммы расходов по ним.
+    Округление выполняется функцией round() для значений float, как и при построчной обработке.
+    """
+    last_digits = [card.replace("*", "") for card in cards]
+    total_spent = np.asarray(total_spent, dtype=float)
+    return [
+        {"last_digits": digits, "total_spent": round(spent, 2), "cashback": round(cashback, 2)}
+        for digits, spent, cashback in zip(last_digits, total_spent.tolist(), (total_spent * 0.01).tolist())
+    ]
+
+
+def get_window_starts(end_dates: np.ndarray, window: str) -> np.ndarray:
+    """
+    Функция получения начал периодов по их концам.
+    Принимает массив концов периодов и длину периода: "<N>D" - N дней до конца периода (например, "30D",
+    "90D"), CALENDAR_MONTH ("M") - с первого числа месяца конца периода (как в функции `get_date_range`).
+    Возвращает массив начал периодов (datetime64[ns]). Выбрасывает ValueError при неизвестной длине периода.
+    """
+    end_dates = np.asarray(end_dates, dtype="datetime64[ns]")
+    if window == CALENDAR_MONTH:
+        return end_dates.astype("datetime64[M]").astype("datetime64[ns]")
+    match = re.fullmatch(r"(\d+)D", window)
+    if match is None:
+        raise ValueError(f"Неизвестная длина периода: {window}.")
+    return end_dates - np.timedelta64(int(match.group(1)), "D")
+
+
+class CumulativeSpending:
+    """
+    Накопленные суммы расходов (транзакций с отрицательной суммой платежа) по группам транзакций - по умолчанию
+    по парам (карта, категория), или по любому набору столбцов key_columns.
+    Расходы один раз упорядочиваются по группе и дате операции, и для них рассчитывается накопленная сумма
+    столбца "Сумма операции с округлением" (cumsum). Сумма расходов группы за любой период (обе границы
+    включительно) - разность накопленных сумм на границах периода, найденных двоичным поиском, поэтому
+    расчет не зависит от количества транзакций в периоде. Если все суммы - целые копейки, они складываются
+    в копейках (без накопления ошибки округления float).
+    Для данных без транзакций (или без столбцов дат, сумм и групп) групп расходов нет.
+    """
+
+    def __init__(self, df: pd.DataFrame, key_columns: tuple[str, ...] = SPENDING_KEY_COLUMNS) -> None:
+        self.key_columns = tuple(key_columns)
+        if not self._has_spending(df):
+            self.keys = pd.DataFrame({column: pd.Series(dtype=object) for column in self.key_columns})
+            self._dates = np.array([], dtype="datetime64[ns]")
+            self._scale = 100
+            self._cumulative = np.zeros(1, dtype=np.int64)
+            self._bounds = np.zeros(1, dtype=np.int64)
+            return
+        dates = get_operation_dates(df).to_numpy(dtype="datetime64[ns]")
+        is_spent = (df["Сумма платежа"] < 0).to_numpy(dtype=bool, na_value=False) & ~np.isnat(dates)
+
+        # Номер группы каждого расхода: группы упорядочены по значениям столбцов key_columns (как в groupby)
+        key_codes, key_values = [], []
+        for column in self.key_columns:
+            codes, uniques = pd.factorize(df[column], sort=True)
+            key_codes.append(codes)
+            key_values.append(np.asarray(uniques, dtype=object))
+        for codes in key_codes:
+            is_spent &= codes >= 0  # Расходы без значения ключа не входят ни в одну группу
+        positions = np.flatnonzero(is_spent)
+        combined_codes = np.ravel_multi_index(
+            tuple(codes[positions] for codes in key_codes), tuple(len(values) for values in key_values)
+        )
+        group_codes, combined_uniques = pd.factorize(combined_codes, sort=True)
+        # Значения столбцов key_columns для каждой группы
+        self.keys = pd.DataFrame(
             {
-                "last_digits": row["Номер карты"].replace("*", ""),
-                "total_spent": round(row["Сумма операции с округлением"], 2),
-                "cashback": round(row["Сумма операции с округлением"] * 0.01, 2)
+                column: values[codes]
+                for column, values, codes in zip(
+                    self.key_columns, key_values, np.unravel_index(combined_uniques, [len(v) for v in key_values])
+                )
             }
         )
-    logger.debug("Сводная информация по каждой карте успешно получена.")
 
-    return result
+        amounts = np.nan_to_num(df["Сумма операции с округлением"].to_numpy(dtype=float, na_value=np.nan)[positions])
+        dates = dates[positions]
+        order = np.lexsort((dates, group_codes))  # Упорядочивание по группе, внутри группы - по дате
+        self._dates = dates[order]
+        amounts = amounts[order]
+        cents = np.round(amounts * 100)
+        self._scale = 100 if np.array_equal(cents / 100, amounts) else 1
+        self._cumulative = np.concatenate([[0], np.cumsum(cents.astype(np.int64) if self._scale == 100 else amounts)])
+        self._bounds = np.searchsorted(group_codes[order], np.arange(len(self.keys) + 1), side="left")
+
+    def _has_spending(self, df: pd.DataFrame) -> bool:
+        """Проверка, что в данных есть транзакции и столбцы дат, сумм и групп расходов."""
+        return not df.empty and {"Дата операции", "Сумма платежа", "Сумма операции с округлением",
+                                 *self.key_columns} <= set(df.columns)
+
+    def extended(self, df: pd.DataFrame) -> Optional["CumulativeSpending"]:
+        """
+        Метод получения накопленных сумм расходов с учетом новых транзакций df без пересчета по всем транзакциям:
+        расходы новых транзакций вставляются в конец своих групп (новые группы - на свое место в порядке групп),
+        и накопленные суммы дополняются, а не рассчитываются заново (без факторизации и сортировки всех данных).
+        Для столбцов с типом category порядок групп определяется порядком категорий df (категории хранилища).
+        Возвращает None, если новые расходы группы раньше последнего расхода этой группы или суммы новых
+        транзакций - не целые копейки, а накопленные суммы рассчитаны в копейках (тогда их нужно рассчитать
+        заново по всем транзакциям).
+        """
+        if not self._has_spending(df):
+            return self
+        dates = get_operation_dates(df).to_numpy(dtype="datetime64[ns]")
+        is_spent = (df["Сумма платежа"] < 0).to_numpy(dtype=bool, na_value=False) & ~np.isnat(dates)
+        for column in self.key_columns:
+            is_spent &= df[column].notna().to_numpy()
+        positions = np.flatnonzero(is_spent)
+        if len(positions) == 0:
+            return self
+        amounts = np.nan_to_num(df["Сумма операции с округлением"].to_numpy(dtype=float, na_value=np.nan)[positions])
+        cents = np.round(amounts * 100)
+        if self._scale == 100 and not np.array_equal(cents / 100, amounts):
+            return None
+        new_values = cents.astype(np.int64) if self._scale == 100 else amounts
+        dates = dates[positions]
+
+        # Группы новых расходов среди известных групп (-1 - новая группа)
+        new_keys = pd.DataFrame({column: df[column].to_numpy(dtype=object)[positions] for column in self.key_columns})
+        new_key_index = pd.MultiIndex.from_frame(new_keys)
+        old_groups = pd.MultiIndex.from_frame(self.keys).get_indexer(new_key_index) if len(self.keys) \
+            else np.full(len(positions), -1)
+        added_keys = new_keys[old_groups < 0].drop_duplicates(ignore_index=True)
+        keys = pd.concat([self.keys, added_keys], ignore_index=True)
+        # Порядок групп - как при расчете по всем транзакциям (по значениям столбцов key_columns)
+        key_ranks = []
+        for column in self.key_columns:
+            if isinstance(df[column].dtype, pd.CategoricalDtype):
+                values_order = pd.Index(df[column].cat.categories)
+            else:
+                values_order = pd.Index(keys[column].unique()).sort_values()
+            key_ranks.append(values_order.get_indexer(keys[column]))
+        if any((ranks < 0).any() for ranks in key_ranks):  # Значение ключа отсутствует среди категорий df
+            return None
+        group_order = np.lexsort(key_ranks[::-1])
+        new_group_numbers = np.empty(len(keys), dtype=np.int64)
+        new_group_numbers[group_order] = np.arange(len(keys))
+        old_numbers = new_group_numbers[:len(self.keys)]
+        if (np.diff(old_numbers) < 0).any():  # Порядок известных групп изменился
+            return None
+        # Номера групп новых расходов в keys (новые группы дописаны в конец keys)
+        added_groups = len(self.keys) + pd.MultiIndex.from_frame(added_keys).get_indexer(new_key_index)
+        groups = np.where(old_groups >= 0, old_groups, added_groups)
+        known = old_groups >= 0
+        if (dates[known] < self._dates[self._bounds[1:] - 1][old_groups[known]]).any():  # Новые расходы раньше
+            # последнего расхода группы
+            return None
+        # Позиция вставки каждого нового расхода: конец своей группы, для новой группы - начало первой известной
+        # группы, которая идет после нее
+        next_known = np.searchsorted(old_numbers, new_group_numbers[groups], side="right")
+        insert_at = self._bounds[next_known]
+        order = np.lexsort((dates, new_group_numbers[groups]))
+
+        extended = copy.copy(self)
+        extended.keys = keys.iloc[group_order].reset_index(drop=True)
+        extended._dates = np.insert(self._dates, insert_at[order], dates[order])
+        extended._cumulative = np.concatenate(
+            [[0], np.cumsum(np.insert(np.diff(self._cumulative), insert_at[order], new_values[order]))]
+        )
+        sizes = np.zeros(len(keys), dtype=np.int64)
+        sizes[old_numbers] = np.diff(self._bounds)
+        sizes += np.bincount(new_group_numbers[groups], minlength=len(keys))
+        extended._bounds = np.concatenate([[0], np.cumsum(sizes)])
+        return extended
+
+    def get_totals(self, start_dates: np.ndarray, end_dates: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Метод расчета сумм и количества расходов по группам за несколько периодов.
+        Принимает массивы начал и концов периодов (обе границы включительно).
+        Возвращает массивы сумм и количества расходов размером (количество периодов, количество групп);
+        столбцы соответствуют строкам `keys`.
+        """
+        start_dates = np.asarray(start_dates, dtype="datetime64[ns]")
+        end_dates = np.asarray(end_dates, dtype="datetime64[ns]")
+        sums = np.zeros((len(start_dates), len(self.keys)))
+        counts = np.zeros((len(start_dates), len(self.keys)), dtype=np.int64)
+        for group in range(len(self.keys)):
+            group_start, group_end = self._bounds[group], self._bounds[group + 1]
+            group_dates = self._dates[group_start:group_end]
+            start_indices = group_start + np.searchsorted(group_dates, start_dates, side="left")
+            end_indices = group_start + np.searchsorted(group_dates, end_dates, side="right")
+            end_indices = np.maximum(end_indices, start_indices)  # Для периодов, у которых начало позже конца
+            sums[:, group] = (self._cumulative[end_indices] - self._cumulative[start_indices]) / self._scale
+            counts[:, group] = end_indices - start_indices
+        return sums, counts
+
+    def get_window_totals(self, end_dates: np.ndarray, window: str) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Метод расчета сумм и количества расходов по группам за периоды заданной длины ("30D", "90D",
+        CALENDAR_MONTH и т.д., см. `get_window_starts`), заканчивающиеся датами end_dates.
+        """
+        return self.get_totals(get_window_starts(end_dates, window), end_dates)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+def get_ranking_values(df: pd.DataFrame, by: str) -> np.ndarray:
+    """
+    Функция получения значений показателя для выбора ТОП-N транзакций.
+    Принимает данные о транзакциях в формате DataFrame и название показателя из TOP_N_RANKINGS
+    ("amount", "cashback", "abs_payment") или название числового столбца.
+    Возвращает массив значений показателя (float64, пропуски заменены на -inf, т.е. считаются наименьшими).
+    """
+    column = TOP_N_RANKINGS.get(by, by)
+    if column not in df.columns:
+        raise ValueError(f"Неизвестный показатель для выбора транзакций: {by}.")
+    values = df[column].to_numpy(dtype=float, na_value=np.nan)
+    if by == "abs_payment":
+        values = np.abs(values)
+    return np.where(np.isnan(values), -np.inf, values)
+
+
+def get_filter_mask(df: pd.DataFrame, filters: Optional[dict[str, Any]] = None) -> np.ndarray:
+    """
+    Функция получения маски транзакций, удовлетворяющих условиям отбора.
+    Принимает данные о транзакциях в формате DataFrame и словарь условий {столбец: значение или список значений}.
+    Возвращает массив bool (все значения True, если условия не заданы).
+    """
+    mask = np.ones(len(df), dtype=bool)
+    for column, value in (filters or {}).items():
+        if isinstance(value, (list, tuple, set, frozenset)):
+            mask &= df[column].isin(list(value)).to_numpy()
+        else:
+            mask &= (df[column] == value).to_numpy(dtype=bool, na_value=False)
+    return mask
+
+
+def rank_positions(positions: np.ndarray, values: np.ndarray, n: int, dates: Optional[np.ndarray] = None
+                   ) -> np.ndarray:
+    """
+    Функция выбора n позиций с наибольшими значениями показателя за O(len(values)) (np.argpartition находит
+    n-е по величине значение без полной сортировки, затем сортируются только отобранные позиции).
+    Порядок результата: по убыванию значения, при равных значениях - по возрастанию позиции (как при устойчивой
+    сортировке по убыванию). Если переданы даты операций позиций, при равных значениях раньше идет позиция
+    с более поздней датой, а при равных датах - с меньшей позицией (как в выгрузке банка, упорядоченной
+    по убыванию даты, для данных хранилища, упорядоченных по возрастанию даты).
+    """
+    if n <= 0 or len(positions) == 0:
+        return positions[:0]
+    if len(values) > n:
+        threshold = values[np.argpartition(values, len(values) - n)[len(values) - n]]
+        selected = np.flatnonzero(values >= threshold)  # n наибольших значений и значения, равные n-му
+        positions, values = positions[selected], values[selected]
+        dates = dates[selected] if dates is not None else None
+    if dates is None:
+        return positions[np.lexsort((positions, -values))][:n]
+    # ~ (побитовое отрицание) - ключ по убыванию даты без переполнения (NaT - наименьшее значение int64 - в конце)
+    descending_dates = ~np.asarray(dates, dtype="datetime64[ns]").view(np.int64)
+    return positions[np.lexsort((positions, descending_dates, -values))][:n]
+
+
+def top_n_positions(df: pd.DataFrame, n: int, by: str = "amount", filters: Optional[dict[str, Any]] = None,
+                    newest_first: bool = False) -> np.ndarray:
+    """
+    Функция получения позиций (номеров строк) ТОП-N транзакций по показателю `by` (см. `top_n_transactions`).
+    При newest_first=True транзакции с равными значениями показателя упорядочиваются по убыванию даты операции
+    (см. `rank_positions`).
+    """
+    positions = np.flatnonzero(get_filter_mask(df, filters))
+    dates = get_operation_dates(df).to_numpy(dtype="datetime64[ns]")[positions] if newest_first else None
+    return rank_positions(positions, get_ranking_values(df, by)[positions], n, dates)
+
+
+def top_n_transactions(df: pd.DataFrame, n: int = 5, by: str = "amount", filters: Optional[dict[str, Any]] = None
+                       ) -> pd.DataFrame:
+    """
+    Функция получения ТОП-N транзакций по заданному показателю без сортировки всех данных.
+    Принимает данные о транзакциях в формате DataFrame, количество транзакций, название показателя
+    ("amount" - сумма операции, "cashback" - кешбэк, "abs_payment" - модуль суммы платежа, или название
+    числового столбца) и словарь условий отбора {столбец: значение или список значений} (например,
+    {"Статус": "OK"}).
+    Возвращает DataFrame с транзакциями, упорядоченными по убыванию показателя (при равных значениях -
+    в порядке следования в исходных данных).
+    """
+    return df.iloc[top_n_positions(df, n, by, filters)]
 
 
+@timed()
 def top_5_transactions_by_sum(df: pd.DataFrame) -> list[dict]:
     """
     Функция получения ТОП-5 транзакций по величине суммы.
@@ -142,38 +546,34 @@ def top_5_transactions_by_sum(df: pd.DataFrame) -> list[dict]:
         print("Ошибка. Данные для анализа не обнаружены.")
         return []
 
-    # Отбор только успешных транзакций для формирования ТОП-5 по сумме
-    filter_ok_transactions = df[df["Статус"] == "OK"]
-    if filter_ok_transactions.empty:  # Если данных после фильтрации нет, функция возвращает пустой список
+    # Выбор 5 успешных транзакций с наибольшей суммой операции (частичная сортировка, без сортировки всех данных)
+    top_by_sum = top_n_transactions(df, 5, by="amount", filters={"Статус": "OK"})
+    if top_by_sum.empty:  # Если данных после фильтрации нет, функция возвращает пустой список
         print("Ошибка. После фильтрации по статусу операции данные для анализа не обнаружены.")
         return []
 
-    # Сортировка транзакций по убыванию суммы
-    sorted_by_sum_df = filter_ok_transactions.sort_values(by="Сумма операции с округлением", ascending=False)
-    # Выбор первых 5 транзакций по размеру суммы
-    top_by_sum = sorted_by_sum_df.head(5)
-
-    result = []
-    # Формирование данных для вывода сводной информации по ТОП-5 транзакциям по сумме операции
-    for index, row in top_by_sum.iterrows():
-        result.append(
-            {
-                "date": row["Дата операции"].strftime("%d.%m.%Y"),  # Вывод даты (без времени) в формате str
-                "amount": round(row["Сумма операции с округлением"], 2),
-                "category": row["Категория"],
-                "description": row["Описание"]
-            }
+    # Формирование данных для вывода сводной информации по ТОП-5 транзакциям по сумме операции (по столбцам)
+    dates = top_by_sum["Дата операции"].dt.strftime("%d.%m.%Y").tolist()  # Вывод даты (без времени) в формате str
+    amounts = top_by_sum["Сумма операции с округлением"].to_numpy(dtype=float).tolist()
+    result = [
+        {"date": date, "amount": round(amount, 2), "category": category, "description": description}
+        for date, amount, category, description in zip(
+            dates, amounts, top_by_sum["Категория"].tolist(), top_by_sum["Описание"].tolist()
         )
+    ]
     logger.debug("ТОП-5 транзакций по сумме операции успешно получены.")
 
     return result
 
 
-def actual_currencies(base_currency: str = "RUB") -> list[dict]:
+@timed()
+def actual_currencies(base_currency: str = "RUB", user_id: Optional[str] = None) -> list[dict]:
     """
     Функция получения актуальных курсов валют (тикеры загружаются из файла `user_settings.json`).
     Принимает строку с тикером базовой валюты, относительно которой рассчитываются курсы валют из файла
-    `user_settings.json` (по умолчанию - "RUB").
+    `user_settings.json` (по умолчанию - "RUB"), и идентификатор профиля пользователя в файле настроек
+    (по умолчанию - общие настройки).
+    Курсы валют кешируются на CURRENCIES_TTL секунд (см. модуль `market_cache`).
     Возвращает список словарей в формате:
     [{
       "currency": "USD",
@@ -183,30 +583,52 @@ def actual_currencies(base_currency: str = "RUB") -> list[dict]:
     """
 
     try:
-        logger.debug("Чтение данных из JSON-файла...")
-        with open(PATH_TO_USER_SETTINGS_JSON, "r") as file:
-            currencies = json.load(file)["user_currencies"]  # Извлечение из файла `user_settings.json` тикеров валют
-            logger.debug("Данные из JSON-файла успешно получены.")
+        # Тикеры валют из файла `user_settings.json` (файл перечитывается, только если он изменился)
+        currencies = list(get_user_settings(user_id).user_currencies)
+    except FileNotFoundError:
+        print(f"Ошибка! Файл по адресу {PATH_TO_USER_SETTINGS_JSON} не найден.")
+        logger.error(f"Ошибка! Файл по адресу {PATH_TO_USER_SETTINGS_JSON} не найден.")
+        return []
     except json.JSONDecodeError:
         print("Ошибка декодирования файла.")
         logger.error("Произошла ошибка декодирования файла.")
         return []
-    except FileNotFoundError:
-        print(f"Ошибка! Файл по адресу {PATH_TO_USER_SETTINGS_JSON} не найден.")
-        logger.error(f"Ошибка! Файл по адресу {PATH_TO_USER_SETTINGS_JSON} не найден.")
+    except ValueError as error_info:  # Если данные в файле не соответствуют формату...
+        print(f"Ошибка в файле настроек: {error_info}")
+        logger.error(f"Ошибка в файле настроек: {error_info}")
+        return []
+    if not currencies:  # Если тикеры валют не указаны, API-запрос не выполняется
+        logger.warning("В файле настроек не указаны тикеры валют.")
         return []
 
-    url = "https://api.apilayer.com/exchangerates_data/latest"  # URL для API-запроса текущих курсов валют
+    cache_key = make_cache_key(URL_APILAYER, base_currency, currencies)
+    return get_market_data_cache().get_or_fetch(
+        cache_key, CURRENCIES_TTL, lambda: _fetch_currency_rates(currencies, base_currency)
+    )
+
+
+def _fetch_currency_rates(currencies: list[str], base_currency: str) -> list[dict]:
+    """
+    Функция получения курсов валют по API-запросу к Exchange Rates Data.
+    Возвращает список словарей с курсами валют или пустой список, если не удалось получить курс валют.
+    """
     # Ниже - параметры для запроса (базовая валюта (RUB) и список валют для получения курса относительно базовой,
     # перечисленные через запятую)
     payload = {"symbols": ",".join(currencies), "base": base_currency}
 
-    load_dotenv()  # Для загрузки API-ключа из .env-файла
-    api_key = os.getenv("API_KEY_APILAYER")
+    api_key = get_env("API_KEY_APILAYER")  # API-ключ из .env-файла (файл загружается один раз)
 
     headers = {"apikey": api_key}  # Заголовок запроса по API-ключу для авторизации на Exchange Rates Data
 
-    response = requests.get(url, headers=headers, params=payload)  # API-запрос на получение курса валют
+    import requests  # Импорт при первом API-запросе (загрузка модуля requests замедляет запуск программы)
+
+    try:
+        # API-запрос на получение курса валют (через общий HTTP-клиент с повторным использованием соединений)
+        response = get_http_client().get(URL_APILAYER, headers=headers, params=payload)
+    except requests.RequestException as error_info:  # Если сервер не ответил за отведенное время или недоступен...
+        print(f"Неудачная попытка получить курс валют {currencies}. Возможная причина: {error_info}.")
+        logger.error(f"Неудачная попытка получить курсы валют {currencies}. Возможная причина: {error_info}.")
+        return []
     if response.status_code != 200:  # Если запрос неудачный...
         print(f"Неудачная попытка получить курс валют {currencies}. Возможная причина: {response.reason}.")
         logger.error(f"Неудачная попытка получить курсы валют {currencies}. Возможная причина: {response.reason}.")
@@ -228,10 +650,12 @@ def actual_currencies(base_currency: str = "RUB") -> list[dict]:
     return result
 
 
-def actual_stocks() -> list[dict]:
+@timed()
+def actual_stocks(user_id: Optional[str] = None) -> list[dict]:
     """
     Функция получения актуальной стоимости акций (из файла `user_settings.json`).
-    Не имеет параметров.
+    Принимает идентификатор профиля пользователя в файле настроек (по умолчанию - общие настройки).
+    Курсы акций кешируются на STOCKS_TTL секунд (см. модуль `market_cache`).
     Возвращает список словарей в формате:
     [{
       "stock": "AAPL",
@@ -240,30 +664,49 @@ def actual_stocks() -> list[dict]:
     или пустой список, если не удалось получить курс акций.
     """
     try:
-        logger.debug("Чтение данных из JSON-файла...")
-        with open(PATH_TO_USER_SETTINGS_JSON, "r") as file:
-            symbols = json.load(file)["user_stocks"]  # Извлечение из файла `user_settings.json` тикеров акций
-            logger.info("Данные из JSON-файла успешно получены.")
+        # Тикеры акций из файла `user_settings.json` (файл перечитывается, только если он изменился)
+        symbols = list(get_user_settings(user_id).user_stocks)
+    except FileNotFoundError:
+        print(f"Ошибка! Файл по адресу {PATH_TO_USER_SETTINGS_JSON} не найден.")
+        logger.error(f"Ошибка! Файл по адресу {PATH_TO_USER_SETTINGS_JSON} не найден.")
+        return []
     except json.JSONDecodeError:
         print("Ошибка декодирования файла.")
         logger.error("Произошла ошибка декодирования файла.")
         return []
-
-    except FileNotFoundError:
-        print(f"Ошибка! Файл по адресу {PATH_TO_USER_SETTINGS_JSON} не найден.")
-        logger.error(f"Ошибка! Файл по адресу {PATH_TO_USER_SETTINGS_JSON} не найден.")
+    except ValueError as error_info:  # Если данные в файле не соответствуют формату...
+        print(f"Ошибка в файле настроек: {error_info}")
+        logger.error(f"Ошибка в файле настроек: {error_info}")
+        return []
+    if not symbols:  # Если тикеры акций не указаны, API-запрос не выполняется
+        logger.warning("В файле настроек не указаны тикеры акций.")
         return []
 
-    url = "http://api.marketstack.com/v1/eod/latest"  # URL для API-запроса курсов акций (End-of-Day Data)
+    cache_key = make_cache_key(URL_MARKETSTACK, "USD", symbols)
+    return get_market_data_cache().get_or_fetch(cache_key, STOCKS_TTL, lambda: _fetch_stock_prices(symbols))
+
+
+def _fetch_stock_prices(symbols: list[str]) -> list[dict]:
+    """
+    Функция получения курсов акций по API-запросу к Marketstack.
+    Возвращает список словарей с курсами акций или пустой список, если не удалось получить курс акций.
+    """
     # Ниже - параметры для запроса (тикеры акций, перечисленные через запятую)
     payload = {"symbols": ",".join(symbols)}
 
-    load_dotenv()  # Для загрузки API-ключа из .env-файла
-    api_key = os.getenv("API_KEY_MARKETSTACK")
+    api_key = get_env("API_KEY_MARKETSTACK")  # API-ключ из .env-файла (файл загружается один раз)
 
     headers = {"access_key": api_key}  # Заголовок запроса по API-ключу для авторизации на Marketstack
 
-    response = requests.get(url, params=payload, headers=headers)  # API-запрос на получение курса акций
+    import requests  # Импорт при первом API-запросе (загрузка модуля requests замедляет запуск программы)
+
+    try:
+        # API-запрос на получение курса акций (через общий HTTP-клиент с повторным использованием соединений)
+        response = get_http_client().get(URL_MARKETSTACK, params=payload, headers=headers)
+    except requests.RequestException as error_info:  # Если сервер не ответил за отведенное время или недоступен...
+        print(f"Неудачная попытка получить курсы акций {symbols}. Возможная причина: {error_info}.")
+        logger.error(f"Неудачная попытка получить курсы акций {symbols}. Возможная причина: {error_info}.")
+        return []
 
     if response.status_code != 200:  # Если запрос неудачный...
         print(f"Неудачная попытка получить курсы акций {symbols}. Возможная причина: {response.reason}.")
@@ -1,29 +1,33 @@
 import json
-import logging
-import os
-
-from src.utils import (actual_currencies,
-                       actual_stocks,
-                       get_date_range,
-                       get_slice_of_data,
-                       get_summary_card_data,
-                       get_time_for_greeting,
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.logging_config import get_logger
+from src.metrics import measure, timed
+from src.result_cache import RESULT_CACHE_TTL, cached_result
+from src.store import TransactionStore, get_transaction_store
+from src.utils import (CALENDAR_MONTH, actual_currencies, actual_stocks, format_card_summary, get_date_range,
+                       get_filter_mask, get_ranking_values, get_time_for_greeting, rank_positions,
                        top_5_transactions_by_sum)
 
-PATH_TO_LOG_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "logs", "views.log")
+logger = get_logger(__name__, "views.log")
 
-logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-file_handler = logging.FileHandler(PATH_TO_LOG_FILE, "w", encoding="utf-8")
-file_formatter = logging.Formatter("%(asctime)s - %(filename)s - %(funcName)s - %(levelname)s: %(message)s")
-file_handler.setFormatter(file_formatter)
-logger.addHandler(file_handler)
+# Пул потоков для API-запросов (курсы валют и акций запрашиваются параллельно с анализом транзакций)
+market_data_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="market-data")
 
 
-def main_info(date_time: str) -> str:
+@cached_result(ttl=RESULT_CACHE_TTL)  # Приветствие и курсы валют и акций зависят от текущего времени
+@timed()
+def main_info(date_time: str, user_id: Optional[str] = None, dataset_id: Optional[str] = None) -> str:
     """
     Функция, объединяющая логику веб-страницы "Главная".
-    Принимает на вход строку с датой и временем в формате YYYY-MM-DD HH:MM:SS (напр. '2021-04-10 20:30:00').
+    Принимает на вход строку с датой и временем в формате YYYY-MM-DD HH:MM:SS (напр. '2021-04-10 20:30:00'),
+    идентификатор профиля пользователя в файле `user_settings.json` (по умолчанию - общие настройки)
+    и идентификатор набора данных с транзакциями пользователя (по умолчанию - общее хранилище транзакций).
     Возвращает JSON-ответ со следующими данными: 1) приветствие с указанием текущего времени суток;
     2) информацию по каждой карте (последние 4 цифры карты, общая сумма расходов, кешбэк (1 рубль на каждые
     100 рублей); 3) топ-5 транзакций по сумме платежа; 4) курс валют (по умолчанию относительно "RUB");
@@ -32,22 +36,140 @@ def main_info(date_time: str) -> str:
 
     logger.debug("Вызвана функция 'main_info' страницы 'Главная'.")
 
+    # Запуск API-запросов курсов валют и акций в отдельных потоках (ответы ожидаются после анализа транзакций,
+    # поэтому время работы функции определяется самой долгой из операций, а не их суммой)
+    currency_rates_future = market_data_executor.submit(actual_currencies, user_id=user_id)
+    stock_prices_future = market_data_executor.submit(actual_stocks, user_id=user_id)
+
     # Получение интервала дат для анализа транзакций
     start_date, end_date = get_date_range(date_time)
     logger.info("Определен период времени для выборки транзакций.")
 
-    # Получение выборки данных за указанный период
-    df = get_slice_of_data(start_date, end_date)
+    # Получение выборки данных за указанный период (из хранилища транзакций, без повторного чтения файла)
+    store = get_transaction_store(dataset_id)
+    # ТОП-5 успешных транзакций по сумме операции за период (из заранее отобранных ТОП-N транзакций по месяцам)
+    with measure("main_info.top_n") as info:
+        top_df = store.get_top_n(start_date, end_date, 5, by="amount", filters={"Статус": "OK"})
+        info["rows"] = len(top_df)
     logger.info(f"Сделана выборка транзакций в диапазоне дат {start_date} - {end_date}.")
 
+    with measure("main_info.cards") as info:
+        # Сводная информации по каждой карте (по накопленным суммам расходов с начала месяца)
+        cards = _month_to_date_card_summaries(store, np.array([end_date], dtype="datetime64[ns]"))[0]
+        info["rows"] = len(cards)
+    top_transactions = top_5_transactions_by_sum(top_df)  # Сводная информации по ТОП-5 транзакциям
+    # Ожидание ответов API (время, на которое API-запросы дольше анализа транзакций)
+    with measure("main_info.market_data_wait"):
+        currency_rates = currency_rates_future.result()  # Информация по текущим курсам валют
+        stock_prices = stock_prices_future.result()  # Информация по курсам (End-of-Day Data) акций
+
     data = {
         "greeting": get_time_for_greeting(),  # Приветствие в зависимости от текущего времени суток
-        "cards": get_summary_card_data(df),  # Сводная информации по каждой карте
-        "top_transactions": top_5_transactions_by_sum(df),  # Сводная информации по ТОП-5 транзакциям по сумме операции
-        "currency_rates": actual_currencies(),  # Информация по текущим курсам валют (из `user_settings.json`)
-        "stock_prices": actual_stocks()  # Информация по курсам (End-of-Day Data) акций (из `user_settings.json`)
+        "cards": cards,
+        "top_transactions": top_transactions,
+        "currency_rates": currency_rates,
+        "stock_prices": stock_prices
     }
     logger.info(f"Получена обобщенная информация по финансовым операциям в диапазоне дат {start_date} - {end_date}.")
 
     json_data = json.dumps(data, ensure_ascii=False, indent=4)
     return json_data
+
+
+def _month_to_date_card_summaries(store: TransactionStore, end_dates: np.ndarray) -> list[list[dict]]:
+    """
+    Функция расчета сводной информации по картам с начала месяца до каждой из дат end_dates.
+    Суммы расходов по картам рассчитываются по накопленным суммам расходов хранилища (`CumulativeSpending`),
+    поэтому расчет для каждой даты - два двоичных поиска на карту, независимо от количества транзакций.
+    Возвращает для каждой даты список словарей в формате функции `get_summary_card_data`.
+    """
+    spending = store.get_cumulative_spending(("Номер карты",))
+    sums, counts = spending.get_window_totals(end_dates, CALENDAR_MONTH)
+    cards = spending.keys["Номер карты"].astype(str).tolist()
+    return [
+        format_card_summary([cards[group] for group in np.flatnonzero(date_counts > 0)], date_sums[date_counts > 0])
+        for date_sums, date_counts in zip(sums, counts)
+    ]
+
+
+def _month_to_date_top_5(month_df: pd.DataFrame, end_indices: np.ndarray) -> list[list[dict]]:
+    """
+    Функция получения ТОП-5 транзакций нарастающим итогом (для нескольких дат одного месяца).
+    Принимает транзакции месяца, отсортированные по дате операции, и неубывающие позиции конца периода.
+    При переходе к следующей дате просматриваются только транзакции, добавившиеся к периоду, вместе
+    с ТОП-5 предыдущего периода, поэтому все даты месяца обрабатываются за один проход по транзакциям.
+    Возвращает для каждой даты список словарей в формате функции `top_5_transactions_by_sum`.
+    """
+    if month_df.empty:  # Транзакций за месяц нет (в том числе в пустом хранилище)
+        return [top_5_transactions_by_sum(month_df) for _ in end_indices]
+    is_ok = get_filter_mask(month_df, {"Статус": "OK"})
+    values = get_ranking_values(month_df, "amount")
+    dates = month_df["Дата операции"].to_numpy(dtype="datetime64[ns]")
+    top_positions = np.array([], dtype=np.int64)
+    previous_end = 0
+    result = []
+    for end_index in end_indices:
+        new_positions = np.flatnonzero(is_ok[previous_end:end_index]) + previous_end
+        candidates = np.concatenate([top_positions, new_positions])
+        top_positions = rank_positions(candidates, values[candidates], 5, dates[candidates])
+        previous_end = max(previous_end, int(end_index))
+        result.append(top_5_transactions_by_sum(month_df.iloc[top_positions]))
+    return result
+
+
+def main_info_batch(date_times: list[str], user_id: Optional[str] = None, dataset_id: Optional[str] = None) -> str:
+    """
+    Функция формирования данных веб-страницы "Главная" сразу для нескольких дат (например, для каждого дня
+    месяца). Результат для каждой даты совпадает с результатом функции `main_info`.
+    Принимает список строк с датой и временем в формате YYYY-MM-DD HH:MM:SS, идентификатор профиля
+    пользователя в файле `user_settings.json` и идентификатор набора данных (см. `main_info`).
+    Сводная информация по картам для всех дат рассчитывается по накопленным суммам расходов хранилища,
+    ТОП-5 транзакций - за один проход по транзакциям каждого месяца, а курсы валют и акций
+    запрашиваются один раз для всех дат. Время работы зависит от количества дат и транзакций в их месяцах,
+    а не от произведения количества дат на объем всех данных.
+    Возвращает JSON-ответ: словарь {дата и время: данные в формате `main_info`} в порядке следования дат.
+    """
+
+    logger.debug(f"Вызвана функция 'main_info_batch' страницы 'Главная' для {len(date_times)} дат.")
+
+    currency_rates_future = market_data_executor.submit(actual_currencies, user_id=user_id)
+    stock_prices_future = market_data_executor.submit(actual_stocks, user_id=user_id)
+
+    # Группировка дат по месяцам (начало периода каждой даты - первое число ее месяца)
+    dates_by_month: dict[datetime, list[tuple[datetime, str]]] = {}
+    end_dates = []
+    for date_time in date_times:
+        start_date, end_date = get_date_range(date_time)
+        dates_by_month.setdefault(start_date, []).append((end_date, date_time))
+        end_dates.append(end_date)
+
+    store = get_transaction_store(dataset_id)
+    cards = dict(zip(date_times, _month_to_date_card_summaries(store, np.array(end_dates, dtype="datetime64[ns]"))))
+    top_transactions: dict[str, list[dict]] = {}
+    for start_date, month_dates in dates_by_month.items():
+        month_dates.sort()
+        month_df = store.get_slice(start_date, month_dates[-1][0])  # Транзакции от начала месяца до последней даты
+        month_end_dates = np.array([end_date for end_date, _ in month_dates], dtype="datetime64[ns]")
+        month_dates_index = month_df["Дата операции"].to_numpy(dtype="datetime64[ns]") if not month_df.empty \
+            else np.array([], dtype="datetime64[ns]")
+        end_indices = np.searchsorted(month_dates_index, month_end_dates, side="right")
+        for (_, date_time), date_top in zip(month_dates, _month_to_date_top_5(month_df, end_indices)):
+            top_transactions[date_time] = date_top
+    logger.info(f"Рассчитана информация по транзакциям для {len(cards)} дат ({len(dates_by_month)} месяцев).")
+
+    greeting = get_time_for_greeting()
+    currency_rates = currency_rates_future.result()
+    stock_prices = stock_prices_future.result()
+    data = {
+        date_time: {
+            "greeting": greeting,
+            "cards": cards[date_time],
+            "top_transactions": top_transactions[date_time],
+            "currency_rates": currency_rates,
+            "stock_prices": stock_prices,
+        }
+        for date_time in date_times
+    }
+
+    json_data = json.dumps(data, ensure_ascii=False, indent=4)
+    return json_data
@@ -1,8 +1,94 @@
+import json
+import threading
+import time
 from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
 
+import numpy as np
 import pandas as pd
 import pytest
 
+from src.http_client import HttpClient, set_http_client
+from src.market_cache import MarketDataCache, MemoryBackend, set_market_data_cache
+from src.metrics import MetricsRegistry, set_metrics_registry
+from src.result_cache import ResultCache, set_result_cache
+from src.result_writer import ResultWriter, set_result_writer
+from src.settings import set_settings_loader
+from src.sql_store import set_sql_store
+from src.store import set_store_pool, set_transaction_store
+
+
+@pytest.fixture(autouse=True)
+def tmp_data_cache_dir(tmp_path, monkeypatch):
+    """Фикстура, перенаправляющая кеш данных во временную папку (чтобы тесты не затрагивали кеш в папке `data`)"""
+    monkeypatch.setattr("src.data_cache.PATH_TO_CACHE_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture(autouse=True)
+def reset_transaction_store():
+    """
+    Фикстура, сбрасывающая общее хранилище транзакций, пул хранилищ наборов данных и хранилище транзакций
+    в SQLite после каждого теста
+    """
+    yield
+    set_transaction_store(None)
+    set_store_pool(None)
+    set_sql_store(None)
+
+
+@pytest.fixture(autouse=True)
+def reset_settings_loader():
+    """Фикстура, сбрасывающая загруженные настройки пользователя после теста"""
+    yield
+    set_settings_loader(None)
+
+
+@pytest.fixture(autouse=True)
+def empty_market_data_cache():
+    """Фикстура с пустым кешем данных API (только в памяти) для каждого теста"""
+    cache = MarketDataCache([MemoryBackend()])
+    set_market_data_cache(cache)
+    yield cache
+    set_market_data_cache(None)
+
+
+@pytest.fixture(autouse=True)
+def http_client():
+    """Фикстура с новым HTTP-клиентом (без задержки между повторами запросов) для каждого теста"""
+    client = HttpClient(backoff_factor=0)
+    set_http_client(client)
+    yield client
+    set_http_client(None)
+
+
+@pytest.fixture(autouse=True)
+def result_writer():
+    """Фикстура с новым объектом фоновой записи результатов для каждого теста (поток записи завершается после теста)"""
+    writer = ResultWriter()
+    set_result_writer(writer)
+    yield writer
+    set_result_writer(None)
+
+
+@pytest.fixture(autouse=True)
+def result_cache():
+    """Фикстура с пустым кешем результатов функций страниц для каждого теста"""
+    cache = ResultCache(max_entries=100)
+    set_result_cache(cache)
+    yield cache
+    set_result_cache(None)
+
+
+@pytest.fixture(autouse=True)
+def metrics_registry():
+    """Фикстура с новым реестром показателей этапов обработки для каждого теста (без профилирования)"""
+    registry = MetricsRegistry(profile_mode="")
+    set_metrics_registry(registry)
+    yield registry
+    set_metrics_registry(None)
+
 
 @pytest.fixture
 def sample_dataframe():
@@ -72,6 +158,49 @@ def sample_data_for_top_5_transactions_failed_status():
     )
 
 
+@pytest.fixture
+def make_random_transactions():
+    """
+    Фикстура с функцией генерации случайных транзакций со столбцами выгрузки банка (одинаковый seed - одинаковые
+    транзакции). Транзакции - за days дней от start_date, даты с точностью до unit ("D" - много транзакций
+    с одинаковой датой, "h" или "s"). Суммы - целые рубли меньше max_amount (много одинаковых сумм) или суммы
+    с копейками (kopecks=True), доля поступлений - income_share. Около 10% транзакций со статусом FAILED,
+    в номерах карт, категориях, датах платежа, MCC и кешбэке есть пропуски. Если descending=True, транзакции
+    упорядочены по убыванию даты операции (как в выгрузке банка).
+    """
+
+    def make(n_rows: int = 2000, seed: int = 1, start_date: str = "2021-01-01", days: int = 120, unit: str = "D",
+             max_amount: int = 300, kopecks: bool = False, income_share: float = 0.0,
+             descending: bool = False) -> pd.DataFrame:
+        rng = np.random.default_rng(seed)
+        offsets = rng.integers(0, days * {"D": 1, "h": 24, "s": 86_400}[unit], size=n_rows)
+        dates = pd.Timestamp(start_date) + pd.to_timedelta(np.sort(offsets)[::-1] if descending else offsets,
+                                                           unit=unit)
+        if kopecks:
+            amounts = rng.integers(1, max_amount * 100, size=n_rows) / 100
+        else:
+            amounts = rng.integers(1, max_amount, size=n_rows).astype(float)
+        return pd.DataFrame(
+            {
+                "Дата операции": dates,
+                "Дата платежа": np.where(rng.random(n_rows) < 0.1, None, dates.strftime("%d.%m.%Y")),
+                "Номер карты": rng.choice(np.array(["*7197", "*4556", "*5091", None], dtype=object), size=n_rows,
+                                          p=[0.5, 0.3, 0.1, 0.1]),
+                "Статус": np.where(rng.random(n_rows) < 0.1, "FAILED", "OK"),
+                "Сумма платежа": np.where(rng.random(n_rows) < income_share, amounts, -amounts),
+                "Кэшбэк": np.where(rng.random(n_rows) < 0.5, amounts // 100, np.nan),
+                "Категория": rng.choice(np.array(["Супермаркеты", "Переводы", "Аптеки", "Фастфуд", None],
+                                                 dtype=object), size=n_rows, p=[0.4, 0.2, 0.2, 0.15, 0.05]),
+                "MCC": np.where(rng.random(n_rows) < 0.3, np.nan, 5411.0),
+                "Описание": rng.choice(["Магнит", "Перевод", "Аптека", "Вкусно и точка"], size=n_rows),
+                "Бонусы (включая кэшбэк)": (amounts // 100).astype(np.int64),
+                "Сумма операции с округлением": amounts,
+            }
+        )
+
+    return make
+
+
 @pytest.fixture
 def mock_user_settings_for_currencies():
     """Фикстура с тестовыми настройками пользователя для запроса курсов валют"""
@@ -100,3 +229,50 @@ def mock_api_response_for_stocks():
             {"symbol": "MSFT", "adj_close": 305.67},
         ]
     }
+
+
+class StubApiHandler(BaseHTTPRequestHandler):
+    """Обработчик запросов тестового HTTP-сервера, заменяющего внешние API курсов валют и акций"""
+
+    protocol_version = "HTTP/1.1"  # Соединения сохраняются между запросами (keep-alive), как у внешних API
+
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        time.sleep(self.server.delay)  # Имитация задержки ответа внешнего API
+        body = json.dumps(self.server.responses.get(urlparse(self.path).path, {})).encode("utf-8")
+        status = self.server.status
+        if self.server.failures > 0:  # Имитация временной ошибки внешнего API
+            self.server.failures -= 1
+            status = 503
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if self.server.retry_after is not None and status != 200:
+            self.send_header("Retry-After", self.server.retry_after)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_api_server(monkeypatch, mock_api_response_for_currencies, mock_api_response_for_stocks):
+    """Фикстура с локальным HTTP-сервером, на который перенаправляются API-запросы курсов валют и акций"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubApiHandler)
+    server.responses = {"/currencies": mock_api_response_for_currencies, "/stocks": mock_api_response_for_stocks}
+    server.requests = []
+    server.delay = 0
+    server.status = 200
+    server.failures = 0  # Количество первых запросов, на которые сервер отвечает статусом 503
+    server.retry_after = None  # Значение заголовка Retry-After в ответах с ошибкой
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    monkeypatch.setattr("src.utils.URL_APILAYER", f"{base_url}/currencies")
+    monkeypatch.setattr("src.utils.URL_MARKETSTACK", f"{base_url}/stocks")
+    yield server
+
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,100 @@
+import json
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.aggregates import MonthlyAggregates
+from src.services import calculate_cashback_by_category, get_high_cashback_categories
+from src.store import TransactionStore, get_transaction_store, set_transaction_store
+from src.utils import format_card_summary, get_month_range, get_summary_card_data, normalize_transactions
+
+
+@pytest.fixture
+def transactions_with_cards():
+    return normalize_transactions(
+        pd.DataFrame(
+            {
+                "Дата операции": ["01.01.2025 10:00:00", "15.01.2025 12:00:00", "20.01.2025 09:30:00",
+                                  "01.02.2025 11:00:00", "15.02.2025 18:00:00", "22.02.2025 20:00:00"],
+                "Номер карты": ["*5678", "*2222", "*5678", "*5678", "*2222", "*2222"],
+                "Статус": ["OK", "OK", "FAILED", "OK", "OK", "OK"],
+                "Сумма платежа": [-1000.0, -2000.0, -300.0, -1500.0, -500.0, 10000.0],
+                "Категория": ["Супермаркеты", "АЗС", "Супермаркеты", "Супермаркеты", "Рестораны", "Аванс"],
+                "Сумма операции с округлением": [1000.0, 2000.0, 300.0, 1500.0, 500.0, 10000.0],
+            }
+        )
+    )
+
+
+def test_monthly_aggregates_get_month(transactions_with_cards):
+    """Тест расчета сумм и количества транзакций за месяц"""
+    aggregates = MonthlyAggregates(transactions_with_cards)
+
+    result = aggregates.get_month(2025, 1)
+
+    assert len(aggregates) == 2
+    assert result["Сумма операции с округлением"].sum() == 3300.0
+    assert result["Количество"].sum() == 3
+    assert aggregates.get_month(2024, 12).empty
+
+
+def test_monthly_aggregates_add(transactions_with_cards):
+    """Тест, что добавление транзакций дает те же агрегаты, что и полный пересчет"""
+    aggregates = MonthlyAggregates(transactions_with_cards.iloc[:4])
+    aggregates.add(transactions_with_cards.iloc[4:])
+
+    expected = MonthlyAggregates(transactions_with_cards)
+
+    for month in [1, 2]:
+        pd.testing.assert_frame_equal(aggregates.get_month(2025, month), expected.get_month(2025, month))
+
+
+def test_transaction_store_append(transactions_with_cards):
+    """Тест обновления данных и версии данных хранилища при добавлении транзакций"""
+    store = TransactionStore(transactions_with_cards)
+    new_rows = pd.DataFrame(
+        {
+            "Дата операции": ["25.02.2025 10:00:00", "01.03.2025 10:00:00"],
+            "Номер карты": ["*9999", "*5678"],
+            "Статус": ["OK", "OK"],
+            "Сумма платежа": [-700.0, -100.0],
+            "Категория": ["Аптеки", "Аптеки"],
+            "Сумма операции с округлением": [700.0, 100.0],
+        }
+    )
+
+    store.append(new_rows)
+
+    assert store.version == 1
+    assert len(store) == 8
+    assert get_summary_card_data(store.get_slice(datetime(2025, 2, 1), datetime(2025, 2, 28))) == [
+        {"last_digits": "2222", "total_spent": 500.0, "cashback": 5.0},
+        {"last_digits": "5678", "total_spent": 1500.0, "cashback": 15.0},
+        {"last_digits": "9999", "total_spent": 700.0, "cashback": 7.0},
+    ]
+    assert len(store.get_month("2025", "3")) == 1
+
+
+def test_store_month_totals_same_as_monthly_aggregates(transactions_with_cards):
+    """
+    Тест, что суммы по картам и кешбэк за месяц по накопленным суммам расходов хранилища совпадают
+    с расчетом по агрегатам месяца (в том числе после добавления транзакций)
+    """
+    set_transaction_store(TransactionStore(transactions_with_cards.iloc[:4]))
+    get_high_cashback_categories.__wrapped__(None, "2025", "2")  # Накопленные суммы рассчитаны до добавления
+    get_transaction_store().append(transactions_with_cards.iloc[4:])
+    aggregates = MonthlyAggregates(transactions_with_cards)
+
+    for month in [1, 2]:
+        start_date, end_date = get_month_range("2025", str(month))
+        month_aggregates = aggregates.get_month(2025, month)
+        spending = get_transaction_store().get_cumulative_spending(("Номер карты",))
+        sums, counts = spending.get_totals(np.array([start_date], dtype="datetime64[ns]"),
+                                           np.array([end_date], dtype="datetime64[ns]"))
+        cards = spending.keys["Номер карты"].astype(str).to_numpy()[counts[0] > 0].tolist()
+
+        assert format_card_summary(cards, sums[0][counts[0] > 0]) == get_summary_card_data(month_aggregates)
+        assert json.loads(get_high_cashback_categories.__wrapped__(None, "2025", str(month))) == \
+            calculate_cashback_by_category(month_aggregates)
@@ -0,0 +1,70 @@
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_cache import get_cache_dir, load_cached_frame, save_cached_frame
+
+
+@pytest.fixture
+def source_file(tmp_path):
+    """Фикстура с исходным файлом, для которого создается кеш"""
+    path_to_file = tmp_path / "operations.xlsx"
+    path_to_file.write_bytes(b"test data")
+    return str(path_to_file)
+
+
+@pytest.fixture
+def frame_for_cache():
+    return pd.DataFrame(
+        {
+            "Дата операции": pd.to_datetime([datetime(2023, 1, 1, 12, 30), datetime(2023, 1, 2)]),
+            "Номер карты": ["*5456", np.nan],
+            "Статус": pd.Categorical(["OK", "FAILED"]),
+            "Сумма платежа": [-1000.5, 2000.0],
+            "Бонусы (включая кэшбэк)": [10, 0],
+        }
+    )
+
+
+def test_save_and_load_cached_frame(source_file, frame_for_cache):
+    """Тест записи и чтения кеша без потери данных и типов"""
+    assert save_cached_frame(frame_for_cache, source_file, "Лист") is True
+
+    result = load_cached_frame(source_file, "Лист")
+
+    pd.testing.assert_frame_equal(result, frame_for_cache)
+
+
+def test_load_cached_frame_without_cache(source_file):
+    """Тест чтения несуществующего кеша"""
+    assert load_cached_frame(source_file, "Лист") is None
+
+
+def test_load_cached_frame_after_source_changed(source_file, frame_for_cache):
+    """Тест, что кеш не используется после изменения исходного файла"""
+    save_cached_frame(frame_for_cache, source_file, "Лист")
+
+    with open(source_file, "ab") as file:
+        file.write(b" new rows")
+
+    assert load_cached_frame(source_file, "Лист") is None
+
+
+def test_load_cached_frame_memory_mapped(source_file, frame_for_cache):
+    """Тест, что числовые столбцы читаются из кеша без копирования (только для чтения)"""
+    save_cached_frame(frame_for_cache, source_file, "Лист")
+
+    result = load_cached_frame(source_file, "Лист")
+
+    assert not result["Сумма платежа"].to_numpy().flags.writeable
+
+
+def test_save_cached_frame_unsupported_values(source_file):
+    """Тест с данными, которые нельзя сохранить в кеш"""
+    df = pd.DataFrame({"Описание": [datetime(2023, 1, 1), "Перевод"]})
+
+    assert save_cached_frame(df, source_file, "Лист") is False
+    assert not os.path.exists(get_cache_dir(source_file, "Лист"))
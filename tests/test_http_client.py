@@ -0,0 +1,78 @@
+import time
+
+import pytest
+import requests
+
+from src.http_client import HttpClient, get_http_client, set_http_client
+from src.utils import actual_currencies, actual_stocks
+
+
+def test_http_client_reuses_connections(stub_api_server, http_client):
+    """Тест, что повторные запросы к серверу выполняются через уже открытое соединение"""
+    actual_currencies()
+    actual_stocks()
+
+    stats = http_client.get_stats()
+    assert stats["requests"] == 2
+    assert stats["connections_opened"] == 1
+    assert stats["connections_reused"] == 1
+    assert stats["errors"] == 0
+    assert stats["latency_max"] >= stats["latency_avg"] > 0
+
+
+def test_http_client_retries_server_errors(stub_api_server, http_client):
+    """Тест повтора запроса после временной ошибки сервера"""
+    stub_api_server.failures = 2
+
+    assert len(actual_stocks()) == 3
+
+    stats = http_client.get_stats()
+    assert len(stub_api_server.requests) == 3
+    assert stats["requests"] == 1
+    assert stats["retries"] == 2
+    assert stats["errors"] == 0
+
+
+def test_http_client_returns_error_after_retries(stub_api_server):
+    """Тест, что после исчерпания повторов возвращается ответ сервера с ошибкой"""
+    stub_api_server.status = 503
+    client = HttpClient(retries=1, backoff_factor=0)
+
+    response = client.get(f"http://127.0.0.1:{stub_api_server.server_port}/stocks")
+
+    assert response.status_code == 503
+    assert len(stub_api_server.requests) == 2
+    assert client.get_stats()["errors"] == 1
+
+
+def test_http_client_retry_after_capped(stub_api_server):
+    """Тест, что задержка перед повтором по заголовку Retry-After не больше max_retry_after секунд"""
+    stub_api_server.status = 429
+    stub_api_server.retry_after = "3600"
+    client = HttpClient(retries=2, backoff_factor=0, max_retry_after=0.1)
+
+    start = time.perf_counter()
+    response = client.get(f"http://127.0.0.1:{stub_api_server.server_port}/stocks")
+
+    assert response.status_code == 429
+    assert len(stub_api_server.requests) == 3
+    assert 0.2 <= time.perf_counter() - start < 2
+
+
+def test_http_client_connection_error():
+    """Тест случая, когда сервер недоступен"""
+    client = HttpClient(retries=0, timeout=(0.1, 0.1))
+
+    with pytest.raises(requests.RequestException):
+        client.get("http://127.0.0.1:9/")
+    assert client.get_stats()["errors"] == 1
+
+
+def test_get_http_client_singleton():
+    """Тест, что общий HTTP-клиент создается один раз и пересоздается после сброса"""
+    set_http_client(None)
+    client = get_http_client()
+
+    assert get_http_client() is client
+    set_http_client(None)
+    assert get_http_client() is not client
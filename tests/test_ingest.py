@@ -0,0 +1,173 @@
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+import src.ingest
+from src.data_cache import load_cached_frame
+from src.ingest import fingerprint_rows, get_new_rows, ingest_new_rows
+from src.store import TransactionStore
+from src.streaming import iter_excel_chunks, normalize_chunks
+from src.utils import SHEET_NAME, get_summary_card_data, read_data_file, top_n_transactions
+
+
+def make_transactions(dates, amounts, descriptions):
+    """Функция формирования транзакций в формате выгрузки банка (по убыванию даты операции)"""
+    return pd.DataFrame(
+        {
+            "Дата операции": dates,
+            "Номер карты": ["*5678"] * len(dates),
+            "Статус": ["OK"] * len(dates),
+            "Сумма платежа": [-amount for amount in amounts],
+            "Кэшбэк": [None] * len(dates),
+            "Категория": ["Супермаркеты"] * len(dates),
+            "Описание": descriptions,
+            "Сумма операции с округлением": amounts,
+        }
+    )
+
+
+# 6 транзакций с одинаковой (последней) датой операции, в т.ч. повторяющиеся
+OLD_ROWS = make_transactions(
+    ["10.02.2025 12:00:00"] * 6 + ["05.02.2025 10:00:00"] * 3 + ["20.01.2025 09:00:00"] * 3,
+    [100.0, 200.0] * 3 + [300.0] * 3 + [400.0] * 3,
+    ["Магнит", "Лента"] * 3 + ["Пятерочка"] * 3 + ["Перекресток"] * 3,
+)
+NEW_ROWS = make_transactions(
+    ["01.03.2025 08:00:00", "15.02.2025 18:30:00", "10.02.2025 12:00:00"],
+    [700.0, 600.0, 500.0],
+    ["Колхоз", "Ozon.ru", "Аптека"],
+)
+
+
+def read_excel_file(path):
+    """Функция чтения Excel-файла (как при загрузке хранилища)"""
+    return pd.concat(list(normalize_chunks(iter_excel_chunks(str(path)))), ignore_index=True)
+
+
+@pytest.fixture
+def export_files(tmp_path):
+    """Фикстура с выгрузкой банка и следующей выгрузкой с новыми транзакциями в начале листа"""
+    old_path, new_path = tmp_path / "old.xlsx", tmp_path / "new.xlsx"
+    OLD_ROWS.to_excel(old_path, sheet_name=SHEET_NAME, index=False)
+    pd.concat([NEW_ROWS, OLD_ROWS]).to_excel(new_path, sheet_name=SHEET_NAME, index=False)
+    return old_path, new_path
+
+
+def test_fingerprint_rows_ignores_dtypes():
+    """Тест, что отпечатки транзакций не зависят от типов столбцов"""
+    df = make_transactions(["01.03.2025 08:00:00"], [700.0], ["Колхоз"])
+    normalized = next(normalize_chunks([df.astype({"Сумма операции с округлением": "int64"})]))
+
+    assert (fingerprint_rows(df) == fingerprint_rows(normalized.assign(**{"Дата операции": "01.03.2025 08:00:00"}))
+            ).all()
+
+
+def test_get_new_rows(export_files):
+    """Тест поиска новых транзакций (в т.ч. с той же датой операции, что и последняя загруженная)"""
+    old_path, new_path = export_files
+    store = TransactionStore(read_excel_file(old_path))
+
+    new_rows = get_new_rows(store, str(new_path))
+
+    assert new_rows["Описание"].tolist() == ["Колхоз", "Ozon.ru", "Аптека"]
+    assert new_rows["Кэшбэк"].dtype == store.transactions["Кэшбэк"].dtype
+    assert get_new_rows(store, str(old_path)).empty
+
+
+def test_get_new_rows_stops_at_loaded_rows(export_files, monkeypatch):
+    """Тест, что файл читается только до уже загруженных транзакций"""
+    old_path, new_path = export_files
+    store = TransactionStore(read_excel_file(old_path))
+    read_chunks = []
+
+    def counting_iter_excel_chunks(*args, **kwargs):
+        for chunk in iter_excel_chunks(*args, **kwargs):
+            read_chunks.append(chunk)
+            yield chunk
+
+    monkeypatch.setattr(src.ingest, "iter_excel_chunks", counting_iter_excel_chunks)
+    get_new_rows(store, str(new_path), chunk_size=2)
+
+    assert len(read_chunks) == 5  # Из 8 частей файла прочитаны 5 (до первой транзакции раньше 10.02.2025)
+
+
+def test_ingest_new_rows_same_as_full_reload(export_files):
+    """Тест, что после добавления новых транзакций результаты совпадают с полной загрузкой файла"""
+    old_path, new_path = export_files
+    store = TransactionStore(read_excel_file(old_path))
+    store.get_top_n(datetime(2025, 1, 1), datetime(2025, 3, 31), 3)  # Отбор ТОП-N транзакций по месяцам
+
+    assert ingest_new_rows(store, str(new_path)) == 3
+    assert ingest_new_rows(store, str(new_path)) == 0
+
+    reloaded_store = TransactionStore(read_excel_file(new_path))
+    assert len(store) == len(reloaded_store) == 15
+    for start_date, end_date in [(datetime(2025, 2, 1), datetime(2025, 2, 28)),
+                                 (datetime(2025, 1, 1), datetime(2025, 3, 31))]:
+        assert get_summary_card_data(store.get_slice(start_date, end_date)) == get_summary_card_data(
+            reloaded_store.get_slice(start_date, end_date)
+        )
+        pd.testing.assert_frame_equal(
+            store.get_top_n(start_date, end_date, 3).reset_index(drop=True),
+            top_n_transactions(reloaded_store.get_slice(start_date, end_date), 3).reset_index(drop=True),
+            check_categorical=False,
+        )
+
+
+def test_ingest_new_rows_updates_data_cache(export_files, monkeypatch):
+    """Тест, что новые транзакции дописываются в кеш данных, и следующее чтение файла берет данные из кеша"""
+    old_path, new_path = export_files
+    path = old_path.parent / "operations.xlsx"
+    monkeypatch.setattr("src.utils.PATH_TO_EXCEL", str(path))
+    shutil.copy(old_path, path)
+    store = TransactionStore(read_data_file())  # Первое чтение файла записывает кеш
+    shutil.copy(new_path, path)
+
+    assert ingest_new_rows(store) == 3
+
+    cached = load_cached_frame(str(path), SHEET_NAME)
+    assert cached is not None
+    pd.testing.assert_frame_equal(cached, read_data_file(use_cache=False))
+
+
+@pytest.mark.parametrize("chunk_size", [1_000, 4])
+@pytest.mark.parametrize(
+    "changed_old_rows",
+    [
+        # Транзакция с более ранней датой, добавленная банком позже
+        pd.concat([OLD_ROWS, make_transactions(["01.02.2025 10:00:00"], [800.0], ["Аптека"])], ignore_index=True),
+        OLD_ROWS.assign(**{"Описание": OLD_ROWS["Описание"].replace({"Перекресток": "ВкусВилл"})}),  # Исправление
+    ],
+    ids=["late_posted_row", "edited_row"],
+)
+def test_ingest_new_rows_stale_data_cache(export_files, monkeypatch, chunk_size, changed_old_rows):
+    """
+    Тест, что кеш данных не дополняется, если кроме новых транзакций в файле изменились другие транзакции
+    (кеш устаревает, и следующее чтение файла берет данные из Excel-файла)
+    """
+    old_path, _ = export_files
+    path = old_path.parent / "operations.xlsx"
+    monkeypatch.setattr("src.utils.PATH_TO_EXCEL", str(path))
+    shutil.copy(old_path, path)
+    store = TransactionStore(read_data_file())
+    pd.concat([NEW_ROWS, changed_old_rows]).to_excel(path, sheet_name=SHEET_NAME, index=False)
+
+    assert ingest_new_rows(store, chunk_size=chunk_size) == 3
+
+    assert load_cached_frame(str(path), SHEET_NAME) is None
+    assert len(read_data_file()) == len(NEW_ROWS) + len(changed_old_rows)
+
+
+def test_ingest_new_rows_concurrent(export_files):
+    """Тест, что одновременные загрузки одного файла добавляют новые транзакции один раз"""
+    old_path, new_path = export_files
+    store = TransactionStore(read_excel_file(old_path))
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        added = list(executor.map(lambda _: ingest_new_rows(store, str(new_path)), range(4)))
+
+    assert sorted(added) == [0, 0, 0, 3]
+    assert len(store) == 15
@@ -0,0 +1,83 @@
+import logging
+import os
+import subprocess
+import sys
+from unittest.mock import patch
+
+from src.logging_config import get_logger, stop_logging
+
+
+def test_log_file_opened_on_first_record(tmp_path, monkeypatch):
+    """Тест, что файл журнала открывается при первой записи (а не при получении логгера)"""
+    monkeypatch.setattr("src.logging_config.LOGS_DIR", str(tmp_path / "logs"))
+    stop_logging()  # Файлы журналов, открытые в других тестах, закрываются
+    logger = get_logger("tests.lazy_logger", "lazy.log")
+
+    assert not (tmp_path / "logs").exists()
+
+    logger.info("Первая запись")
+    stop_logging()  # Ожидание записи всех записей журнала
+
+    lines = (tmp_path / "logs" / "lazy.log").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 1
+    assert lines[0].endswith("test_logging_config.py - test_log_file_opened_on_first_record - INFO: Первая запись")
+
+
+def test_log_file_appended(tmp_path, monkeypatch):
+    """Тест, что записи добавляются в файл журнала (файл не перезаписывается при повторном открытии)"""
+    monkeypatch.setattr("src.logging_config.LOGS_DIR", str(tmp_path))
+    stop_logging()
+    logger = get_logger("tests.append_logger", "append.log")
+
+    logger.debug("Первая запись")
+    stop_logging()
+    logger.error("Вторая запись")
+    stop_logging()
+
+    assert len((tmp_path / "append.log").read_text(encoding="utf-8").splitlines()) == 2
+    assert logger.level == logging.DEBUG
+
+
+def test_log_file_rotated(tmp_path, monkeypatch):
+    """Тест, что размер файла журнала ограничен (заполненный файл переименовывается в архивный)"""
+    monkeypatch.setattr("src.logging_config.LOGS_DIR", str(tmp_path))
+    monkeypatch.setattr("src.logging_config.LOG_MAX_BYTES", 1000)
+    monkeypatch.setattr("src.logging_config.LOG_BACKUP_COUNT", 2)
+    stop_logging()
+    logger = get_logger("tests.rotated_logger", "rotated.log")
+
+    for index in range(100):
+        logger.info(f"Запись {index}")
+    stop_logging()
+
+    assert sorted(os.listdir(tmp_path)) == ["rotated.log", "rotated.log.1", "rotated.log.2"]
+    assert all(os.path.getsize(tmp_path / name) <= 1000 for name in os.listdir(tmp_path))
+    assert (tmp_path / "rotated.log").read_text(encoding="utf-8").splitlines()[-1].endswith("Запись 99")
+
+
+def test_log_file_opened_while_open_is_patched(tmp_path, monkeypatch):
+    """Тест, что замена встроенной функции open (например, в тестах) не влияет на запись журналов"""
+    monkeypatch.setattr("src.logging_config.LOGS_DIR", str(tmp_path))
+    stop_logging()
+    logger = get_logger("tests.patched_open_logger", "patched_open.log")
+
+    with patch("builtins.open", side_effect=FileNotFoundError):
+        logger.info("Запись")
+        stop_logging()
+
+    assert (tmp_path / "patched_open.log").read_text(encoding="utf-8").endswith("Запись\n")
+
+
+def test_import_does_not_open_log_files_or_load_requests(tmp_path):
+    """Тест, что импорт модулей не открывает файлы журналов и не загружает модули requests и dotenv"""
+    code = (
+        "import sys, src.logging_config as logging_config\n"
+        f"logging_config.LOGS_DIR = {str(tmp_path)!r}\n"
+        "import src.views, src.reports, src.services\n"
+        "print([name for name in ('requests', 'dotenv', 'sqlite3') if name in sys.modules])\n"
+    )
+    root = os.path.dirname(os.path.dirname(__file__))
+    result = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == "[]"
+    assert os.listdir(tmp_path) == []
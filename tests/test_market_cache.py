@@ -0,0 +1,150 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock
+
+import pytest
+
+from src.market_cache import MarketDataCache, MemoryBackend, SqliteBackend, make_cache_key
+from src.utils import actual_currencies, actual_stocks
+
+RATES = [{"currency": "USD", "rate": 76.92}]
+
+
+def wait_for_refresh(cache, key, timeout=2.0):
+    """Функция ожидания окончания фонового обновления значения кеша"""
+    deadline = time.time() + timeout
+    while key in cache._refreshing and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def test_get_or_fetch_uses_fresh_value():
+    """Тест, что актуальное значение берется из кеша без API-запроса"""
+    cache = MarketDataCache([MemoryBackend()])
+    fetch = Mock(return_value=RATES)
+
+    assert cache.get_or_fetch("key", 60, fetch) == RATES
+    assert cache.get_or_fetch("key", 60, fetch) == RATES
+    fetch.assert_called_once()
+
+
+def test_get_or_fetch_returns_stale_value_and_refreshes():
+    """Тест, что устаревшее значение возвращается сразу, а обновление выполняется в фоне"""
+    backend = MemoryBackend()
+    backend.set("key", RATES, time.time() - 120)
+    cache = MarketDataCache([backend])
+    new_rates = [{"currency": "USD", "rate": 80.0}]
+    fetch = Mock(return_value=new_rates)
+
+    assert cache.get_or_fetch("key", 60, fetch) == RATES
+    wait_for_refresh(cache, "key")
+
+    fetch.assert_called_once()
+    assert cache.get_or_fetch("key", 60, fetch) == new_rates
+
+
+def test_get_or_fetch_too_stale_value():
+    """Тест, что слишком старое значение не выдается, а запрашивается заново"""
+    backend = MemoryBackend()
+    backend.set("key", RATES, time.time() - 1000)
+    cache = MarketDataCache([backend], max_stale=100)
+    new_rates = [{"currency": "USD", "rate": 80.0}]
+
+    assert cache.get_or_fetch("key", 60, Mock(return_value=new_rates)) == new_rates
+
+
+def test_get_or_fetch_does_not_cache_errors():
+    """Тест, что пустой ответ (ошибка API) не сохраняется в кеш"""
+    cache = MarketDataCache([MemoryBackend()])
+    fetch = Mock(side_effect=[[], RATES])
+
+    assert cache.get_or_fetch("key", 60, fetch) == []
+    assert cache.get_or_fetch("key", 60, fetch) == RATES
+
+
+@pytest.mark.parametrize("response", [RATES, []])
+def test_get_or_fetch_single_request_for_concurrent_misses(response):
+    """
+    Тест, что при одновременных запросах значения, которого нет в кеше, API-запрос выполняется один раз
+    (остальные потоки получают его результат, в т.ч. пустой ответ)
+    """
+    cache = MarketDataCache([MemoryBackend()])
+    started = threading.Barrier(8)
+
+    def fetch():
+        time.sleep(0.2)  # Остальные потоки обращаются к кешу во время API-запроса
+        return response
+
+    fetch_mock = Mock(side_effect=fetch)
+
+    def get_value(_):
+        started.wait()
+        return cache.get_or_fetch("key", 60, fetch_mock)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(get_value, range(8)))
+
+    assert results == [response] * 8
+    fetch_mock.assert_called_once()
+    assert not cache._fetching and not cache._refreshing
+
+
+def test_get_or_fetch_returns_copies():
+    """Тест, что изменение полученного значения не затрагивает значение в кеше"""
+    cache = MarketDataCache([MemoryBackend()])
+    fetch = Mock(return_value=[{"currency": "USD", "rate": 76.92}])
+
+    for _ in range(2):
+        value = cache.get_or_fetch("key", 60, fetch)
+        value[0]["rate"] = 0
+        value.append({"currency": "EUR", "rate": 0})
+
+    assert cache.get_or_fetch("key", 60, fetch) == RATES
+    fetch.assert_called_once()
+
+
+def test_memory_backend_max_entries():
+    """Тест, что в памяти хранится не больше max_entries значений (удаляются давно не использованные)"""
+    backend = MemoryBackend(max_entries=2)
+    backend.set("first", RATES, 1.0)
+    backend.set("second", RATES, 2.0)
+    backend.get("first")
+
+    backend.set("third", RATES, 3.0)
+
+    assert len(backend) == 2
+    assert backend.get("second") is None
+    assert backend.get("first") == (RATES, 1.0)
+    assert backend.get("third") == (RATES, 3.0)
+
+
+def test_sqlite_backend_shared_between_caches(tmp_path):
+    """Тест, что данные в SQLite доступны другому кешу (например, в другом процессе)"""
+    path_to_db = str(tmp_path / "market_cache.sqlite3")
+    first_cache = MarketDataCache([MemoryBackend(), SqliteBackend(path_to_db)])
+    second_cache = MarketDataCache([MemoryBackend(), SqliteBackend(path_to_db)])
+    fetch = Mock(return_value=RATES)
+
+    first_cache.get_or_fetch("key", 60, fetch)
+    assert second_cache.get_or_fetch("key", 60, fetch) == RATES
+    fetch.assert_called_once()
+
+
+@pytest.mark.parametrize(
+    "first_key, second_key, same",
+    [
+        (make_cache_key("url", "RUB", ["USD", "EUR"]), make_cache_key("url", "RUB", ["EUR", "USD"]), True),
+        (make_cache_key("url", "RUB", ["USD"]), make_cache_key("url", "USD", ["USD"]), False),
+    ],
+)
+def test_make_cache_key(first_key, second_key, same):
+    """Тест формирования ключа кеша (порядок тикеров не важен)"""
+    assert (first_key == second_key) is same
+
+
+def test_actual_currencies_and_stocks_cached(stub_api_server):
+    """Тест, что повторные вызовы функций не выполняют API-запросы"""
+    assert actual_currencies() == actual_currencies()
+    assert actual_stocks() == actual_stocks()
+
+    assert len(stub_api_server.requests) == 2
@@ -0,0 +1,139 @@
+import json
+import os
+import pstats
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from src.metrics import MetricsRegistry, count_rows, get_memory_usage, measure, set_metrics_registry, timed
+from src.utils import get_slice_of_data, get_summary_card_data
+
+
+def test_timed_records_calls_and_rows(metrics_registry):
+    """Тест записи количества вызовов, времени и количества строк результата функции"""
+
+    @timed("stage")
+    def make_frame(n):
+        return pd.DataFrame({"x": range(n)})
+
+    make_frame(3)
+    make_frame(5)
+
+    stage = metrics_registry.get_stage("stage")
+    assert stage["calls"] == 2
+    assert stage["rows_total"] == 8
+    assert stage["rows_last"] == 5
+    assert stage["errors"] == 0
+    assert 0 < stage["seconds_max"] <= stage["seconds_total"]
+
+
+def test_timed_records_errors(metrics_registry):
+    """Тест записи показателей вызова, завершившегося ошибкой"""
+
+    @timed()
+    def fail():
+        raise ValueError("Ошибка")
+
+    with pytest.raises(ValueError):
+        fail()
+
+    assert metrics_registry.get_stage("fail")["errors"] == 1
+
+
+def test_measure_memory_delta(metrics_registry):
+    """Тест записи изменения памяти за время этапа (если включен замер памяти)"""
+    metrics_registry.track_memory = True
+    with measure("allocate") as info:
+        data = bytearray(50_000_000)
+        info["rows"] = 1
+
+    if get_memory_usage() == 0:  # Объем памяти процесса недоступен на этой системе
+        pytest.skip("Объем памяти процесса недоступен")
+    assert metrics_registry.get_stage("allocate")["memory_delta_last"] >= 40_000_000
+    del data
+
+
+@pytest.mark.parametrize("value, track_memory", [(None, False), ("", False), ("0", False), ("1", True),
+                                                 ("true", True)])
+def test_memory_not_measured_by_default(monkeypatch, value, track_memory):
+    """Тест, что объем памяти процесса не читается при каждом вызове этапа, если замер памяти не включен"""
+    if value is None:
+        monkeypatch.delenv("METRICS_MEMORY", raising=False)
+    else:
+        monkeypatch.setenv("METRICS_MEMORY", value)
+    memory_reads = []
+
+    def get_memory_usage():
+        memory_reads.append(1)
+        return 1000 * len(memory_reads)
+
+    monkeypatch.setattr("src.metrics.get_memory_usage", get_memory_usage)
+    registry = MetricsRegistry(profile_mode="")
+    set_metrics_registry(registry)
+
+    timed("stage")(lambda: None)()
+
+    assert registry.track_memory is track_memory
+    assert len(memory_reads) == (2 if track_memory else 0)
+    assert registry.get_stage("stage")["memory_delta_last"] == (1000 if track_memory else 0)
+
+
+@pytest.mark.parametrize("result, expected", [(pd.DataFrame({"x": [1, 2]}), 2), ([1, 2, 3], 3), ("abc", None),
+                                              (1.5, None)])
+def test_count_rows(result, expected):
+    """Тест получения количества строк результата"""
+    assert count_rows(result) == expected
+
+
+def test_hot_path_functions_are_instrumented(metrics_registry, sample_data_for_top_5_transactions,
+                                             sample_data_with_cards):
+    """Тест записи показателей функций анализа транзакций"""
+    df = get_slice_of_data(datetime(2023, 1, 1), datetime(2023, 1, 3), sample_data_for_top_5_transactions)
+    get_summary_card_data(sample_data_with_cards)
+
+    assert metrics_registry.get_stage("get_slice_of_data")["rows_last"] == len(df)
+    assert metrics_registry.get_stage("get_summary_card_data")["calls"] == 1
+
+
+def test_export_json_and_prometheus(tmp_path, metrics_registry):
+    """Тест записи показателей в файлы JSON и Prometheus"""
+    metrics_registry.record("read_data_file", 0.5, rows=10)
+    json_path = str(tmp_path / "metrics.json")
+    prom_path = str(tmp_path / "metrics.prom")
+
+    metrics_registry.export(json_path)
+    metrics_registry.export(prom_path)
+
+    with open(json_path, encoding="utf-8") as file:
+        assert json.load(file)["read_data_file"]["rows_total"] == 10
+    with open(prom_path, encoding="utf-8") as file:
+        text = file.read()
+    assert "# TYPE financial_assistant_stage_seconds_total counter" in text
+    assert 'financial_assistant_stage_seconds_total{stage="read_data_file"} 0.5' in text
+    assert 'financial_assistant_stage_calls_total{stage="read_data_file"} 1' in text
+
+
+def test_cprofile_mode_profiles_outer_stage(tmp_path, monkeypatch):
+    """Тест профилирования внешнего этапа (вложенные этапы не профилируются отдельно)"""
+    monkeypatch.setattr("src.metrics.LOGS_DIR", str(tmp_path))
+    set_metrics_registry(MetricsRegistry(profile_mode="cprofile"))
+
+    @timed("inner")
+    def inner():
+        return sum(range(1000))
+
+    @timed("outer")
+    def outer():
+        return inner()
+
+    outer()
+
+    assert os.listdir(tmp_path) == ["profile_outer.prof"]
+    stats = pstats.Stats(str(tmp_path / "profile_outer.prof"))
+    assert any(function_name == "inner" for _, _, function_name in stats.stats)
+
+
+def test_unknown_profile_mode_disables_profiling():
+    """Тест отключения профилирования при неизвестном режиме"""
+    assert MetricsRegistry(profile_mode="unknown").profile_mode == ""
@@ -3,7 +3,8 @@ from datetime import datetime
 import pandas as pd
 import pytest
 
-from src.reports import spending_by_category, write_result_to_file
+from src.reports import spending_by_categories, spending_by_category, write_result_to_file
+from src.store import TransactionStore, set_transaction_store
 
 
 # Тесты для декоратора write_result_to_file
@@ -71,3 +72,52 @@ def test_spending_by_category_success(transactions, category, start_date, expect
     """Тест базовой функциональности"""
     result = spending_by_category(transactions, category, start_date)
     assert result.to_dict(orient="list") == expected
+
+
+# Тесты для функции spending_by_categories
+def test_spending_by_categories_tidy_result():
+    """Тест формата результата: строка для каждой категории и даты отчета (в т.ч. без трат)"""
+    result = spending_by_categories(transactions, ["Супермаркеты", "Аванс"], ["25.01.2025", "15.02.2025"])
+
+    assert result.to_dict(orient="list") == {
+        "Категория": ["Супермаркеты", "Супермаркеты", "Аванс", "Аванс"],
+        "Дата отчета": [datetime(2025, 1, 25), datetime(2025, 2, 15), datetime(2025, 1, 25), datetime(2025, 2, 15)],
+        "Начало периода": [datetime(2024, 10, 27), datetime(2024, 11, 17), datetime(2024, 10, 27),
+                           datetime(2024, 11, 17)],
+        "Сумма расходов": [1000.0, 2500.0, 0.0, 0.0],
+        "Количество операций": [1, 2, 0, 0],
+    }
+
+
+@pytest.fixture
+def random_transactions(make_random_transactions):
+    """Фикстура со случайными транзакциями за год (даты - строки, как в Excel-файле)"""
+    df = make_random_transactions(3000, seed=3, start_date="2024-01-01", days=365, unit="h", max_amount=3000,
+                                  kopecks=True, income_share=0.2)
+    return df.assign(**{"Дата операции": df["Дата операции"].dt.strftime("%d.%m.%Y %H:%M:%S")})
+
+
+@pytest.mark.parametrize("use_store", [False, True])
+def test_spending_by_categories_same_as_spending_by_category(random_transactions, use_store):
+    """Тест, что суммы и количество трат совпадают с выборкой функции spending_by_category"""
+    if use_store:
+        set_transaction_store(TransactionStore(random_transactions))
+    df = None if use_store else random_transactions
+    categories = ["Супермаркеты", "АЗС", "Переводы", "Аптеки"]
+    report_dates = ["01.02.2024", "15.05.2024", "30.09.2024", "31.12.2024", "10.03.2025"]
+
+    result = spending_by_categories(df, categories, report_dates)
+
+    assert len(result) == len(categories) * len(report_dates)
+    for row in result.itertuples(index=False):
+        expected = spending_by_category(df, row[0], row[1].strftime("%d.%m.%Y"))
+        assert row[4] == len(expected)
+        assert row[3] == pytest.approx(expected["Сумма операции с округлением"].sum())
+
+
+def test_spending_by_categories_window_days():
+    """Тест расчета трат за период заданной длины"""
+    result = spending_by_categories(transactions, ["Супермаркеты"], [datetime(2025, 2, 15)], window_days=30)
+
+    assert result["Начало периода"].tolist() == [datetime(2025, 1, 16)]
+    assert result["Сумма расходов"].tolist() == [1500.0]
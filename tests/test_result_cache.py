@@ -0,0 +1,146 @@
+import json
+
+import pandas as pd
+import pytest
+
+from src.ingest import ingest_new_rows
+from src.reports import spending_by_category
+from src.result_cache import ResultCache, cached_result, set_result_cache
+from src.services import get_high_cashback_categories
+from src.store import TransactionStore, get_transaction_store, set_transaction_store
+from src.utils import SHEET_NAME
+
+
+@pytest.fixture
+def transactions():
+    """Фикстура с расходами за январь 2023 года"""
+    return pd.DataFrame(
+        {
+            "Дата операции": pd.to_datetime(["2023-01-05", "2023-01-10", "2023-01-20", "2023-01-25"]),
+            "Номер карты": ["*5678"] * 4,
+            "Статус": ["OK"] * 4,
+            "Сумма платежа": [-1000.0, -2000.0, -500.0, -300.0],
+            "Категория": ["Супермаркеты", "Аптеки", "Супермаркеты", "Переводы"],
+            "Описание": ["Магнит", "Аптека", "Лента", "Перевод"],
+            "Сумма операции с округлением": [1000.0, 2000.0, 500.0, 300.0],
+        }
+    )
+
+
+def test_result_cache_lru_eviction():
+    """Тест удаления давно использованных результатов при превышении размера кеша"""
+    cache = ResultCache(max_entries=2)
+    cache.set(("a",), 1)
+    cache.set(("b",), 2)
+    cache.get(("a",))
+    cache.set(("c",), 3)
+
+    assert cache.get(("a",)) == (True, 1)
+    assert cache.get(("b",)) == (False, None)
+    assert cache.stats() == {"hits": 2, "misses": 1, "hit_rate": 0.6667, "evictions": 1, "entries": 2,
+                             "max_entries": 2}
+
+
+def test_result_cache_ttl(monkeypatch):
+    """Тест устаревания результатов с ограниченным временем актуальности"""
+    cache = ResultCache()
+    now = 1000.0
+    monkeypatch.setattr("src.result_cache.time.monotonic", lambda: now)
+    cache.set(("a",), 1, ttl=60)
+
+    assert cache.get(("a",)) == (True, 1)
+    now = 1061.0
+    assert cache.get(("a",)) == (False, None)
+    assert len(cache) == 0
+
+
+def test_cached_result_by_store_version(result_cache, transactions):
+    """Тест, что результаты по данным хранилища кешируются, а по переданному DataFrame - рассчитываются заново"""
+    set_transaction_store(TransactionStore(transactions))
+    first = get_high_cashback_categories(None, "2023", "1")
+    second = get_high_cashback_categories(None, "2023", "1")
+    frame_result = get_high_cashback_categories(transactions, "2023", "1")
+    get_high_cashback_categories(transactions, "2023", "1")
+
+    assert first == second == frame_result
+    assert json.loads(first) == {"Аптеки": 20.0, "Супермаркеты": 15.0}
+    assert (result_cache.hits, result_cache.misses, len(result_cache)) == (1, 1, 1)
+
+
+def test_cached_result_new_version_after_append(result_cache, transactions):
+    """Тест расчета нового результата после добавления транзакций в хранилище (новая версия данных)"""
+    store = TransactionStore(transactions)
+    set_transaction_store(store)
+    assert json.loads(get_high_cashback_categories(None, "2023", "1"))["Супермаркеты"] == 15.0
+
+    store.append(transactions.iloc[[0]].assign(**{"Дата операции": pd.Timestamp("2023-01-30")}))
+
+    assert json.loads(get_high_cashback_categories(None, "2023", "1"))["Супермаркеты"] == 25.0
+    assert result_cache.hits == 0
+
+
+def test_store_views_handled_as_caller_frames(result_cache, transactions):
+    """
+    Тест, что DataFrame, полученный из хранилища, обрабатывается как переданные данные: результат
+    рассчитывается по его содержимому, даже если столбцы заменены или данные хранилища дополнены позже
+    """
+    store = TransactionStore(transactions)
+    set_transaction_store(store)
+    view_before_append = store.transactions
+    changed_view = store.transactions
+    changed_view["Категория"] = "Аптеки"
+    store.append(transactions.iloc[[0]].assign(**{"Дата операции": pd.Timestamp("2023-01-30")}))
+
+    assert json.loads(get_high_cashback_categories(view_before_append, "2023", "1"))["Супермаркеты"] == 15.0
+    assert json.loads(get_high_cashback_categories(changed_view, "2023", "1")) == {"Аптеки": 38.0}
+    assert json.loads(get_high_cashback_categories(None, "2023", "1"))["Супермаркеты"] == 25.0
+
+
+def test_cached_result_frame_changed_in_place(result_cache, transactions):
+    """Тест, что для DataFrame, измененного "на месте", результат рассчитывается по новым данным"""
+    get_high_cashback_categories(transactions, "2023", "1")
+    transactions["Категория"] = "Аптеки"
+
+    assert json.loads(get_high_cashback_categories(transactions, "2023", "1")) == {"Аптеки": 38.0}
+    assert len(result_cache) == 0
+
+
+def test_ingest_invalidates_cached_results(result_cache, transactions, tmp_path):
+    """Тест удаления из кеша результатов по прежней версии данных при загрузке новых транзакций"""
+    store = TransactionStore(transactions.iloc[::-1].iloc[1:])  # Без последней транзакции
+    set_transaction_store(store)
+    get_high_cashback_categories(None, "2023", "1")
+    path = tmp_path / "operations.xlsx"
+    transactions.iloc[::-1].to_excel(path, sheet_name=SHEET_NAME, index=False)
+
+    assert ingest_new_rows(path=str(path)) == 1
+    assert len(result_cache) == 0
+
+
+def test_cached_dataframe_copy_for_each_call(transactions):
+    """Тест, что каждый вызов получает свою копию результата DataFrame: ее изменение не затрагивает кеш"""
+    set_transaction_store(TransactionStore(transactions))
+
+    result = spending_by_category.__wrapped__(None, "Супермаркеты", "31.01.2023")
+    result.loc[result.index[0], "Сумма платежа"] = 0.0
+    result["Описание"] = "Изменено"
+
+    cached = spending_by_category.__wrapped__(None, "Супермаркеты", "31.01.2023")
+    assert cached is not result
+    assert cached["Описание"].tolist() == ["Магнит", "Лента"]
+    assert cached["Сумма платежа"].tolist() == [-1000.0, -500.0]
+
+
+def test_cached_result_disabled(transactions):
+    """Тест отключенного кеша (размер 0)"""
+    set_transaction_store(TransactionStore(transactions))
+    set_result_cache(ResultCache(max_entries=0))
+    calls = []
+
+    @cached_result(data_arg="df")
+    def count_rows(df, year):
+        calls.append(year)
+        return len(get_transaction_store())
+
+    assert count_rows(None, "2023") == count_rows(None, "2023") == 4
+    assert calls == ["2023", "2023"]
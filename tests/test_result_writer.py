@@ -0,0 +1,139 @@
+import threading
+
+import pandas as pd
+import pytest
+
+from src.reports import write_result_to_file
+from src.result_writer import MAX_TEXT_ROWS, ResultWriter, get_result_path, write_result
+
+
+@pytest.fixture
+def result_df():
+    return pd.DataFrame({"Категория": ["Супермаркеты"] * 200, "Сумма платежа": [-float(i) for i in range(200)]})
+
+
+def test_write_result_text_truncated(tmp_path, result_df):
+    """Тест записи DataFrame в текстовый файл (не больше MAX_TEXT_ROWS строк)"""
+    path = str(tmp_path / "result.txt")
+
+    write_result(path, "Заголовок", result_df)
+
+    with open(path, encoding="utf-8") as file:
+        lines = file.read().splitlines()
+    assert lines[0] == "Заголовок"
+    assert len(lines) <= MAX_TEXT_ROWS + 5  # Заголовки, строки DataFrame, "..." и размер DataFrame
+    assert "-199.0" in lines[-3]  # Последние строки DataFrame выводятся
+    assert lines[-1] == "[200 rows x 2 columns]"
+
+
+def test_write_result_csv(tmp_path, result_df):
+    """Тест записи DataFrame в файл CSV"""
+    path = get_result_path(str(tmp_path / "result.txt"), "csv")
+
+    write_result(path, "Заголовок", result_df, "csv")
+
+    assert path.endswith("result.csv")
+    pd.testing.assert_frame_equal(pd.read_csv(path), result_df)
+
+
+def test_write_result_parquet(tmp_path, result_df):
+    """Тест записи DataFrame в файл Parquet"""
+    pytest.importorskip("pyarrow")
+    path = str(tmp_path / "result.parquet")
+
+    write_result(path, "Заголовок", result_df, "parquet")
+
+    pd.testing.assert_frame_equal(pd.read_parquet(path), result_df)
+
+
+def test_result_writer_error(tmp_path, result_writer):
+    """Тест, что ошибка записи не прерывает работу потока записи"""
+    result_writer.submit(str(tmp_path / "no_dir" / "result.txt"), "Заголовок", "Результат")
+    result_writer.submit(str(tmp_path / "result.txt"), "Заголовок", "Результат")
+    result_writer.flush()
+
+    assert (result_writer.errors, result_writer.written) == (1, 1)
+    assert (tmp_path / "result.txt").read_text(encoding="utf-8") == "Заголовок\nРезультат\n"
+
+
+def test_write_result_to_file_does_not_wait_for_writing(tmp_path, monkeypatch, result_writer):
+    """Тест, что декорируемая функция возвращает результат, не ожидая записи файла"""
+    release = threading.Event()
+    written = []
+
+    def slow_write_result(path, header, result, file_format="text"):
+        release.wait(5)
+        written.append((header, result, file_format))
+
+    monkeypatch.setattr("src.result_writer.write_result", slow_write_result)
+
+    @write_result_to_file("report_from_some_function.txt", file_format="csv")
+    def some_function():
+        return "Какой-то результат"
+
+    assert some_function() == "Какой-то результат"
+    assert written == []  # Запись еще не выполнена
+
+    release.set()
+    result_writer.flush()
+    assert written == [("Вызвана функция 'some_function' (успешно). \nРезультат: ", "Какой-то результат", "csv")]
+
+
+def test_write_result_to_file_unknown_format():
+    """Тест случая, когда формат файла неизвестен"""
+    with pytest.raises(ValueError):
+        write_result_to_file(file_format="xlsx")
+
+
+def test_result_writer_close_writes_remaining(tmp_path):
+    """Тест, что при завершении работы записываются все результаты из очереди"""
+    writer = ResultWriter(queue_size=2)
+    for index in range(5):
+        writer.submit(str(tmp_path / f"result_{index}.txt"), "Заголовок", index)
+
+    writer.close()
+
+    assert writer.written == 5
+
+
+def test_result_writer_writes_result_at_submit_time(tmp_path, result_writer, monkeypatch, result_df):
+    """Тест, что записывается результат на момент добавления в очередь, даже если вызывающий код изменил его"""
+    release = threading.Event()
+    monkeypatch.setattr("src.result_writer.write_result",
+                        lambda *args: release.wait(5) and write_result(*args))
+    path = str(tmp_path / "result.csv")
+    result = {"rows": [1, 2]}
+
+    result_writer.submit(path, "Заголовок", result_df, "csv")
+    result_writer.submit(str(tmp_path / "result.txt"), "Заголовок", result)
+    result_df["Сумма платежа"] = 0.0
+    result_df.loc[0, "Категория"] = "Аптеки"
+    result["rows"].append(3)
+    release.set()
+    result_writer.flush()
+
+    written = pd.read_csv(path)
+    assert written["Категория"].tolist() == ["Супермаркеты"] * 200
+    assert written["Сумма платежа"].tolist() == [-float(i) for i in range(200)]
+    assert (tmp_path / "result.txt").read_text(encoding="utf-8") == "Заголовок\n{'rows': [1, 2]}\n"
+
+
+def test_result_writer_drop_when_queue_full(tmp_path, monkeypatch):
+    """Тест, что при on_full="drop" добавление в заполненную очередь не ожидает записи"""
+    release = threading.Event()
+    monkeypatch.setattr("src.result_writer.write_result", lambda *args: release.wait(5))
+    writer = ResultWriter(queue_size=1, on_full="drop")
+
+    for index in range(4):  # Не больше одного результата записывается и одного - в очереди
+        writer.submit(str(tmp_path / f"result_{index}.txt"), "Заголовок", index)
+    release.set()
+    writer.close()
+
+    assert writer.dropped >= 2
+    assert writer.written + writer.dropped == 4
+
+
+def test_result_writer_unknown_queue_full_policy():
+    """Тест случая, когда действие при заполненной очереди неизвестно"""
+    with pytest.raises(ValueError):
+        ResultWriter(on_full="block")
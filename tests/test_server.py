@@ -0,0 +1,187 @@
+import http.client
+import json
+import socket
+import threading
+import time
+
+import pytest
+
+import src.server
+from src.server import TransactionsServer, create_server
+from src.store import TransactionStore, set_transaction_store
+
+
+@pytest.fixture
+def transactions_store(sample_data_for_top_5_transactions):
+    """Фикстура с общим хранилищем транзакций (расходы за январь 2023 года)"""
+    amounts = sample_data_for_top_5_transactions["Сумма операции с округлением"]
+    df = sample_data_for_top_5_transactions.assign(**{"Номер карты": "*5678", "Сумма платежа": -amounts})
+    store = TransactionStore(df)
+    set_transaction_store(store)
+    return store
+
+
+@pytest.fixture
+def api_server(stub_api_server, transactions_store):
+    """Фикстура с запущенным HTTP-сервером страниц (любой свободный порт, данные загружены при запуске)"""
+    server = create_server(port=0, max_workers=2, preload_data=True)
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def get(server, path):
+    """Функция GET-запроса к серверу. Возвращает статус и тело ответа."""
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=5)
+    try:
+        connection.request("GET", path)
+        response = connection.getresponse()
+        return response.status, response.read().decode("utf-8")
+    finally:
+        connection.close()
+
+
+def test_health(api_server):
+    """Тест проверки работоспособности сервера"""
+    status, body = get(api_server, "/health")
+
+    assert status == 200
+    assert json.loads(body)["status"] == "ok"
+    assert json.loads(body)["preloaded"] is True
+
+
+def test_main_info_endpoint(api_server, stub_api_server):
+    """Тест запроса страницы "Главная" (курсы валют и акций загружены в кеш при запуске сервера)"""
+    requests_before = len(stub_api_server.requests)
+
+    status, body = get(api_server, "/views/main_info?date_time=2023-01-31%2023:59:59")
+
+    result = json.loads(body)
+    assert status == 200
+    assert result["cards"] == [{"last_digits": "5678", "total_spent": 21000.0, "cashback": 210.0}]
+    assert result["currency_rates"][0] == {"currency": "USD", "rate": 76.92}
+    assert len(stub_api_server.requests) == requests_before
+
+
+def test_spending_by_category_endpoint(api_server):
+    """Тест запроса страницы "Отчеты" (транзакции - списком объектов JSON)"""
+    status, body = get(api_server, "/reports/spending_by_category?category=%D0%90%D0%BF%D1%82%D0%B5%D0%BA%D0%B8"
+                                   "&date=31.01.2023")
+
+    result = json.loads(body)
+    assert status == 200
+    assert [transaction["Описание"] for transaction in result] == ["Описание2"]
+    assert result[0]["Дата операции"] == "2023-01-02T00:00:00.000"
+
+
+def test_high_cashback_categories_endpoint(api_server):
+    """Тест запроса страницы "Сервисы\""""
+    status, body = get(api_server, "/services/high_cashback_categories?year=2023&month=1")
+
+    assert status == 200
+    assert json.loads(body)["Каршеринг"] == 60.0
+
+
+def test_keep_alive_connection(api_server):
+    """Тест нескольких запросов по одному соединению (HTTP/1.1 keep-alive)"""
+    connection = http.client.HTTPConnection("127.0.0.1", api_server.server_port, timeout=5)
+    try:
+        for _ in range(3):
+            connection.request("GET", "/health")
+            response = connection.getresponse()
+            response.read()
+            assert response.status == 200
+    finally:
+        connection.close()
+
+
+@pytest.mark.parametrize("path, status", [("/services/high_cashback_categories?year=2023", 400),
+                                          ("/services/high_cashback_categories?year=2023&month=13", 400),
+                                          ("/services/high_cashback_categories?year=2023&month=%C2%B2", 400),
+                                          ("/services/high_cashback_categories?year=3000&month=1", 400),
+                                          ("/views/main_info?date_time=31.01.2023", 400),
+                                          ("/views/main_info?date_time=3000-01-31%2000:00:00", 400),
+                                          ("/reports/spending_by_category?category=x&date=2023-01-31", 400),
+                                          ("/views/main_info?date_time=2023-01-31%2000:00:00&dataset_id=..%2Fx", 400),
+                                          ("/views/main_info?date_time=2023-01-31%2000:00:00&dataset_id=unknown", 404),
+                                          ("/unknown", 404)])
+def test_request_errors(api_server, path, status):
+    """Тест ответов на запросы с ошибками в параметрах и к неизвестным адресам"""
+    response_status, body = get(api_server, path)
+
+    assert response_status == status
+    assert "error" in json.loads(body)
+
+
+def test_internal_value_error(api_server, monkeypatch):
+    """Тест, что ошибка ValueError при обработке запроса (не в параметрах) - внутренняя ошибка сервера"""
+    def failing_handler(params):
+        raise ValueError("Ошибка в данных")
+
+    monkeypatch.setitem(src.server.ROUTES, "/services/high_cashback_categories", failing_handler)
+
+    status, body = get(api_server, "/services/high_cashback_categories?year=2023&month=1")
+
+    assert status == 500
+    assert "Ошибка в данных" not in body
+
+
+def test_idle_connections_do_not_hold_workers(api_server):
+    """Тест, что неактивные сохраняемые соединения не занимают потоки обработки запросов (в пуле 2 потока)"""
+    connections = [http.client.HTTPConnection("127.0.0.1", api_server.server_port, timeout=1) for _ in range(4)]
+    try:
+        for _ in range(2):
+            for connection in connections:
+                connection.request("GET", "/health")
+                response = connection.getresponse()
+                response.read()
+                assert response.status == 200
+        assert json.loads(get(api_server, "/health")[1])["idle_connections"] == 4
+    finally:
+        for connection in connections:
+            connection.close()
+
+
+def test_pipelined_requests(api_server):
+    """Тест нескольких запросов, отправленных подряд без ожидания ответов"""
+    requests = [b"GET /health HTTP/1.1\r\nHost: localhost\r\n\r\n"] * 2
+    requests.append(b"GET /unknown HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n")
+    with socket.create_connection(("127.0.0.1", api_server.server_port), timeout=5) as client:
+        client.sendall(b"".join(requests))
+        data = b""
+        while chunk := client.recv(65536):
+            data += chunk
+
+    assert data.count(b"HTTP/1.1 200") == 2
+    assert data.count(b"HTTP/1.1 404") == 1
+
+
+def test_idle_connection_closed_after_timeout(transactions_store):
+    """Тест закрытия соединения без запросов через keep_alive_timeout секунд"""
+    server = TransactionsServer(("127.0.0.1", 0), max_workers=1, keep_alive_timeout=0.1)
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=5)
+    try:
+        connection.request("GET", "/health")
+        connection.getresponse().read()
+        time.sleep(src.server.IDLE_CHECK_INTERVAL + 0.3)
+
+        assert connection.sock.recv(1) == b""  # Соединение закрыто сервером
+        assert len(server._idle_connections) == 0
+    finally:
+        connection.close()
+        server.shutdown()
+        server.server_close()
+
+
+def test_metrics_endpoint(api_server):
+    """Тест получения показателей этапов обработки в формате Prometheus"""
+    get(api_server, "/services/high_cashback_categories?year=2023&month=1")
+
+    status, body = get(api_server, "/metrics")
+
+    assert status == 200
+    assert 'financial_assistant_stage_calls_total{stage="get_high_cashback_categories"} 1' in body
@@ -1,9 +1,11 @@
 import json
+from unittest.mock import patch
 
 import pandas as pd
 import pytest
 
 from src.services import get_high_cashback_categories
+from src.store import TransactionStore, set_transaction_store
 
 
 @pytest.mark.parametrize(
@@ -24,3 +26,16 @@ def test_get_high_cashback_categories_with_empty_dataframe():
     empty_df = pd.DataFrame()
     result = get_high_cashback_categories(empty_df, "2025", "01")
     assert result == ""
+
+
+def test_get_high_cashback_categories_store_and_frame(sample_dataframe):
+    """
+    Тест, что для переданного DataFrame кешбэк рассчитывается по выборке за месяц (без накопленных сумм
+    по всей истории), а результат совпадает с расчетом по накопленным суммам хранилища
+    """
+    set_transaction_store(TransactionStore(sample_dataframe))
+
+    with patch("src.store.CumulativeSpending", side_effect=AssertionError("накопленные суммы")):
+        frame_result = get_high_cashback_categories(sample_dataframe, "2025", "02")
+
+    assert frame_result == get_high_cashback_categories(None, "2025", "02")
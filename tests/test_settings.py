@@ -0,0 +1,92 @@
+import json
+import os
+
+import pytest
+
+from src.settings import SettingsLoader, UserSettings, get_user_settings, parse_user_settings, set_settings_loader
+from src.utils import actual_stocks
+
+
+@pytest.fixture
+def settings_file(tmp_path):
+    """Фикстура с файлом настроек пользователей (общие настройки и профиль пользователя user_1)"""
+    path = tmp_path / "user_settings.json"
+    path.write_text(
+        json.dumps(
+            {
+                "user_currencies": ["USD", "EUR"],
+                "user_stocks": ["AAPL", "MSFT"],
+                "profiles": {"user_1": {"user_stocks": ["TSLA"]}},
+            }
+        ),
+        encoding="utf-8",
+    )
+    return path
+
+
+def test_parse_user_settings_profiles():
+    """Тест, что поля профиля, которые не указаны, берутся из общих настроек без копирования"""
+    profiles = parse_user_settings(
+        {"user_currencies": ["USD"], "user_stocks": ["AAPL"], "profiles": {"user_1": {"user_stocks": ["TSLA"]}}}
+    )
+
+    assert profiles[None] == UserSettings(("USD",), ("AAPL",))
+    assert profiles["user_1"] == UserSettings(("USD",), ("TSLA",))
+    assert profiles["user_1"].user_currencies is profiles[None].user_currencies
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        [],
+        {"user_currencies": "USD", "user_stocks": ["AAPL"]},
+        {"user_currencies": ["USD"], "user_stocks": ["AAPL"], "profiles": {"user_1": {"user_stocks": [1]}}},
+    ],
+)
+def test_parse_user_settings_invalid(data):
+    """Тест проверки некорректных настроек"""
+    with pytest.raises(ValueError):
+        parse_user_settings(data)
+
+
+def test_settings_loader_reads_file_once(settings_file, monkeypatch):
+    """Тест, что неизмененный файл настроек не читается повторно"""
+    loader = SettingsLoader(str(settings_file))
+    assert loader.get().user_stocks == ("AAPL", "MSFT")
+
+    monkeypatch.setattr("builtins.open", None)  # Повторное открытие файла вызвало бы ошибку
+    assert loader.get("user_1").user_stocks == ("TSLA",)
+    assert loader.get("unknown_user") is loader.get()
+
+
+def test_settings_loader_reloads_changed_file(settings_file):
+    """Тест повторной загрузки настроек после изменения файла"""
+    loader = SettingsLoader(str(settings_file))
+    loader.get()
+
+    settings_file.write_text(json.dumps({"user_currencies": ["CNY"], "user_stocks": []}), encoding="utf-8")
+    file_stat = os.stat(settings_file)
+    os.utime(settings_file, ns=(file_stat.st_atime_ns, file_stat.st_mtime_ns + 1_000_000_000))
+
+    assert loader.get() == UserSettings(("CNY",), ())
+
+
+def test_actual_stocks_for_user_profile(settings_file, stub_api_server):
+    """Тест получения курсов акций по тикерам из профиля пользователя"""
+    set_settings_loader(SettingsLoader(str(settings_file)))
+
+    actual_stocks(user_id="user_1")
+
+    assert get_user_settings("user_1").user_stocks == ("TSLA",)
+    assert "symbols=TSLA" in stub_api_server.requests[0]
+
+
+@pytest.mark.parametrize("data", [{"user_currencies": ["USD"]}, {"user_stocks": "AAPL"}])
+def test_actual_stocks_without_tickers(tmp_path, stub_api_server, data):
+    """Тест случаев, когда в файле настроек нет тикеров акций или они указаны неверно"""
+    path = tmp_path / "user_settings.json"
+    path.write_text(json.dumps(data), encoding="utf-8")
+    set_settings_loader(SettingsLoader(str(path)))
+
+    assert actual_stocks() == []
+    assert stub_api_server.requests == []
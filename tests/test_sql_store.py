@@ -0,0 +1,118 @@
+import json
+import os
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from src.reports import spending_by_category
+from src.services import get_high_cashback_categories
+from src.sql_store import SqliteTransactionStore, get_sql_store, set_sql_store
+from src.utils import SHEET_NAME, get_slice_of_data, read_data_file
+
+
+@pytest.fixture
+def operations_file(make_random_transactions, tmp_path, monkeypatch):
+    """
+    Фикстура с Excel-файлом транзакций (строки по убыванию даты, с пропусками категорий, дат платежа и MCC)
+    вместо файла `operations.xlsx`
+    """
+    df = make_random_transactions(600, seed=3, days=150, unit="s", max_amount=3000, kopecks=True, income_share=0.2,
+                                  descending=True)
+    df.assign(**{"Дата операции": df["Дата операции"].dt.strftime("%d.%m.%Y %H:%M:%S")}).to_excel(
+        tmp_path / "operations.xlsx", sheet_name=SHEET_NAME, index=False)
+    monkeypatch.setattr("src.utils.PATH_TO_EXCEL", str(tmp_path / "operations.xlsx"))
+    return tmp_path / "operations.xlsx"
+
+
+@pytest.fixture
+def sql_store(operations_file, tmp_path, monkeypatch):
+    """Фикстура с хранилищем транзакций в SQLite (переменная окружения TRANSACTIONS_DB)"""
+    monkeypatch.setenv("TRANSACTIONS_DB", str(tmp_path / "transactions.db"))
+    yield get_sql_store()
+    get_sql_store().close()
+
+
+@pytest.mark.parametrize("start_date, end_date", [(datetime(2021, 2, 1), datetime(2021, 3, 15, 12)),
+                                                  (datetime(2021, 1, 1), datetime(2021, 12, 31)),
+                                                  (datetime(2020, 1, 1), datetime(2020, 2, 1))])
+def test_get_slice_same_as_pandas(sql_store, start_date, end_date):
+    """Тест совпадения выборки за период из базы данных с выборкой по DataFrame из Excel-файла"""
+    expected = get_slice_of_data(start_date, end_date, read_data_file())
+
+    result = get_slice_of_data(start_date, end_date)
+
+    pd.testing.assert_frame_equal(result, expected)
+    assert sql_store.imports == 1
+
+
+@pytest.mark.parametrize("category, report_date", [("Супермаркеты", "15.04.2021"), ("Переводы", "01.03.2021"),
+                                                   ("Такси", "15.04.2021")])
+def test_spending_by_category_same_as_pandas(sql_store, category, report_date):
+    """Тест совпадения трат по категории из базы данных с расчетом по DataFrame из Excel-файла"""
+    expected = spending_by_category.__wrapped__(read_data_file(), category, report_date)
+
+    result = spending_by_category.__wrapped__(None, category, report_date)
+
+    pd.testing.assert_frame_equal(result, expected)
+
+
+@pytest.mark.parametrize("year, month", [("2021", "02"), ("2021", "05"), ("2020", "12")])
+def test_high_cashback_categories_same_as_pandas(sql_store, year, month):
+    """Тест совпадения кешбэка по категориям, рассчитанного SQL-запросом, с расчетом по DataFrame"""
+    expected = get_high_cashback_categories(read_data_file(), year, month)
+
+    result = get_high_cashback_categories(None, year, month)
+
+    assert result == expected
+    assert "Переводы" not in json.loads(result)
+
+
+def test_sql_store_reimports_changed_file(sql_store, operations_file):
+    """Тест повторного импорта данных при изменении Excel-файла (и только при изменении)"""
+    get_slice_of_data(datetime(2021, 2, 1), datetime(2021, 3, 1))
+    get_slice_of_data(datetime(2021, 2, 1), datetime(2021, 3, 1))
+    assert sql_store.imports == 1
+
+    df = pd.read_excel(operations_file, sheet_name=SHEET_NAME).head(10)
+    df.to_excel(operations_file, sheet_name=SHEET_NAME, index=False)
+    os.utime(operations_file, ns=(0, 10**18))  # Время изменения отличается от времени первой записи
+
+    result = get_slice_of_data(datetime(2021, 1, 1), datetime(2021, 12, 31))
+
+    assert sql_store.imports == 2
+    assert len(result) == 10
+
+
+def test_sql_store_uses_existing_database(sql_store, tmp_path):
+    """Тест использования импортированных данных новым хранилищем (без повторного импорта)"""
+    expected = sql_store.get_slice(datetime(2021, 2, 1), datetime(2021, 3, 1))
+
+    store = SqliteTransactionStore(str(tmp_path / "transactions.db"))
+    result = store.get_slice(datetime(2021, 2, 1), datetime(2021, 3, 1))
+
+    assert store.imports == 0
+    pd.testing.assert_frame_equal(result, expected)
+    store.close()
+
+
+def test_sql_store_indexes(sql_store):
+    """Тест создания индексов по (дата), (карта, дата), (категория, дата) и их использования в запросах"""
+    sql_store.refresh()
+
+    indexes = {row[0] for row in sql_store._execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    plan = sql_store._execute(
+        'EXPLAIN QUERY PLAN SELECT * FROM transactions WHERE "Категория" = ? AND "Дата операции" BETWEEN ? AND ?',
+        ("Аптеки", 0, 1),
+    )
+
+    assert {"idx_date", "idx_card_date", "idx_category_date"} <= indexes
+    assert "idx_category_date" in plan[0][-1]
+
+
+def test_get_sql_store_without_setting(monkeypatch):
+    """Тест отключенного хранилища в SQLite (переменная окружения TRANSACTIONS_DB не задана)"""
+    monkeypatch.delenv("TRANSACTIONS_DB", raising=False)
+    set_sql_store(None)
+
+    assert get_sql_store() is None
@@ -0,0 +1,395 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.reports import spending_by_category
+from src.services import get_high_cashback_categories
+from src.store import (TransactionStore, TransactionStorePool, get_store_pool, get_transaction_store, set_store_pool,
+                       set_transaction_store, slice_by_date)
+from src.utils import CumulativeSpending, top_n_transactions
+
+
+def test_transaction_store_converts_dates(sample_dataframe):
+    """Тест преобразования дат при создании хранилища"""
+    store = TransactionStore(sample_dataframe)
+
+    assert len(store) == 6
+    assert store.transactions["Дата операции"].iloc[0] == datetime(2025, 1, 1)
+    # Переданный DataFrame не изменяется
+    assert sample_dataframe["Дата операции"].iloc[0] == "01.01.2025"
+
+
+def test_transaction_store_read_only(sample_dataframe):
+    """Тест, что данные хранилища нельзя изменить через выданное представление"""
+    store = TransactionStore(sample_dataframe)
+    transactions = store.transactions
+
+    with pytest.raises(ValueError):
+        transactions["Сумма платежа"].to_numpy()[0] = 0.0
+
+    transactions["Сумма платежа"] = 0.0  # Замена столбца в представлении не затрагивает хранилище
+    assert store.transactions["Сумма платежа"].iloc[0] == -1000.0
+
+
+def test_get_transaction_store_reads_file_once(sample_dataframe):
+    """Тест, что файл читается один раз для всех обращений к хранилищу"""
+    with patch("src.store.read_data_file", return_value=sample_dataframe) as mock_read:
+        first_store = get_transaction_store()
+        second_store = get_transaction_store()
+
+        mock_read.assert_called_once()
+        assert first_store is second_store
+
+
+def test_functions_use_transaction_store(sample_dataframe):
+    """Тест, что при передаче None функции используют данные общего хранилища"""
+    set_transaction_store(TransactionStore(sample_dataframe))
+
+    result_reports = spending_by_category(None, "АЗС", "25.01.2025")
+    result_services = get_high_cashback_categories(None, "2025", "01")
+
+    assert result_reports["Сумма платежа"].tolist() == [-2000.0]
+    assert json.loads(result_services) == {"АЗС": 20.0, "Супермаркеты": 10.0}
+
+
+def test_spending_by_category_does_not_change_transactions(sample_dataframe):
+    """Тест, что функция не изменяет переданный DataFrame"""
+    original = sample_dataframe.copy()
+
+    spending_by_category(sample_dataframe, "АЗС", "25.01.2025")
+
+    pd.testing.assert_frame_equal(sample_dataframe, original)
+
+
+def test_transaction_store_sorted_by_date(sample_dataframe):
+    """Тест сортировки транзакций хранилища по возрастанию даты"""
+    store = TransactionStore(sample_dataframe.iloc[::-1])
+
+    assert store.transactions["Дата операции"].is_monotonic_increasing
+
+
+@pytest.mark.parametrize(
+    "start_date, end_date, expected_payments",
+    [
+        (datetime(2025, 1, 1), datetime(2025, 1, 31), [-1000.0, -2000.0]),
+        (datetime(2025, 1, 15), datetime(2025, 2, 15), [-2000.0, -1500.0, -500.0]),
+        (datetime(2025, 10, 1), datetime(2025, 12, 31), []),
+    ],
+)
+def test_transaction_store_get_slice(sample_dataframe, start_date, end_date, expected_payments):
+    """Тест выборки транзакций за период (обе границы включительно)"""
+    store = TransactionStore(sample_dataframe)
+
+    result = store.get_slice(start_date, end_date)
+
+    assert result["Сумма платежа"].tolist() == expected_payments
+
+
+def test_transaction_store_get_month(sample_dataframe):
+    """Тест выборки транзакций за месяц"""
+    store = TransactionStore(sample_dataframe)
+
+    result = store.get_month("2025", "02")
+
+    assert result["Сумма платежа"].tolist() == [-1500.0, -500.0, -1200.0, 10000.0]
+
+
+def test_slice_by_date_for_store_and_other_frames(sample_dataframe):
+    """Тест, что выборка по индексу хранилища и полным просмотром дает одинаковый результат"""
+    store = TransactionStore(sample_dataframe)
+    set_transaction_store(store)
+    start_date, end_date = datetime(2025, 1, 10), datetime(2025, 2, 20)
+
+    store_result = slice_by_date(None, start_date, end_date)
+    frame_result = slice_by_date(sample_dataframe, start_date, end_date)
+    view_result = slice_by_date(store.transactions, start_date, end_date)
+
+    assert store_result["Сумма платежа"].tolist() == frame_result["Сумма платежа"].tolist()
+    assert view_result["Сумма платежа"].tolist() == frame_result["Сумма платежа"].tolist()
+
+
+@pytest.fixture
+def random_transactions(make_random_transactions):
+    """Фикстура со случайными расходами за несколько месяцев (в т.ч. с одинаковыми суммами и датами)"""
+    return make_random_transactions()
+
+
+def newest_first(df):
+    """Функция упорядочивания транзакций по убыванию даты операции (как в выгрузке банка)"""
+    return df.sort_values("Дата операции", ascending=False, kind="stable")
+
+
+@pytest.mark.parametrize("n", [1, 5, 60])
+@pytest.mark.parametrize("by", ["amount", "cashback", "abs_payment"])
+@pytest.mark.parametrize(
+    "start_date, end_date",
+    [
+        (datetime(2021, 2, 1), datetime(2021, 2, 28, 23, 59, 59)),  # Полный месяц
+        (datetime(2021, 3, 1), datetime(2021, 3, 1, 23, 59, 59)),  # Один день
+        (datetime(2021, 1, 15), datetime(2021, 4, 10)),  # Неполные и полные месяцы
+    ],
+)
+def test_get_top_n_same_as_top_n_transactions(random_transactions, start_date, end_date, by, n):
+    """
+    Тест, что ТОП-N транзакций хранилища совпадают с выбором по всем транзакциям периода в порядке выгрузки банка
+    """
+    store = TransactionStore(random_transactions)
+
+    result = store.get_top_n(start_date, end_date, n, by=by, filters={"Статус": "OK"})
+
+    expected = top_n_transactions(newest_first(store.get_slice(start_date, end_date)), n, by=by,
+                                  filters={"Статус": "OK"})
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_get_top_n_equal_amounts_newest_first():
+    """
+    Тест, что из транзакций с равными суммами раньше идет более поздняя (как при сортировке выгрузки банка,
+    упорядоченной по убыванию даты), а при равных датах - следующая раньше в выгрузке
+    """
+    export = pd.DataFrame(
+        {
+            "Дата операции": pd.to_datetime(["2021-12-31", "2021-12-30", "2021-12-30", "2021-12-23", "2021-12-01"]),
+            "Статус": ["OK"] * 5,
+            "Описание": ["Магнит", "Перевод 1", "Перевод 2", "Перевод 3", "Аптека"],
+            "Сумма платежа": [-100.0, -20000.0, -20000.0, -20000.0, -300.0],
+            "Сумма операции с округлением": [100.0, 20000.0, 20000.0, 20000.0, 300.0],
+        }
+    )
+    store = TransactionStore(export)
+
+    result = store.get_top_n(datetime(2021, 12, 1), datetime(2021, 12, 31), 4, filters={"Статус": "OK"})
+
+    assert result["Описание"].tolist() == ["Перевод 1", "Перевод 2", "Перевод 3", "Аптека"]
+    expected = export.sort_values("Сумма операции с округлением", ascending=False, kind="stable").head(4)
+    assert result["Описание"].tolist() == expected["Описание"].tolist()
+
+
+def test_get_top_n_after_append(random_transactions):
+    """Тест обновления ТОП-N транзакций по месяцам при добавлении транзакций"""
+    store = TransactionStore(random_transactions.iloc[:1500])
+    store.get_top_n(datetime(2021, 1, 1), datetime(2021, 4, 30), 5)  # Отбор ТОП-N транзакций по месяцам
+
+    store.append(random_transactions.iloc[1500:].assign(**{"Сумма операции с округлением": 300.0}))
+
+    result = store.get_top_n(datetime(2021, 2, 1), datetime(2021, 2, 20), 5)
+    expected = top_n_transactions(newest_first(store.get_slice(datetime(2021, 2, 1), datetime(2021, 2, 20))), 5)
+    pd.testing.assert_frame_equal(result, expected)
+    assert (result["Сумма операции с округлением"] == 300.0).all()
+
+
+def test_get_cumulative_spending_recalculated_after_append(random_transactions):
+    """Тест, что накопленные суммы расходов рассчитываются один раз и обновляются после добавления транзакций"""
+    df = random_transactions.assign(**{"Категория": "Супермаркеты"})
+    store = TransactionStore(df.iloc[:1500])
+    spending = store.get_cumulative_spending(("Категория",))
+    assert store.get_cumulative_spending(("Категория",)) is spending
+
+    store.append(df.iloc[1500:])
+
+    sums, counts = store.get_cumulative_spending(("Категория",)).get_totals(
+        np.array(["2021-01-01"], dtype="datetime64[ns]"), np.array(["2021-12-31"], dtype="datetime64[ns]")
+    )
+    assert counts.tolist() == [[2000]]
+    assert sums[0, 0] == df["Сумма операции с округлением"].sum()
+
+
+@pytest.mark.parametrize("key_columns", [("Номер карты",), ("Категория",), ("Номер карты", "Категория")])
+@pytest.mark.parametrize("split_date", ["2021-03-15", "2021-02-01"])
+def test_cumulative_spending_extended_on_append(random_transactions, key_columns, split_date):
+    """
+    Тест дополнения накопленных сумм расходов при добавлении транзакций (в т.ч. с новыми картами и категориями)
+    без пересчета по всем транзакциям: результат совпадает с расчетом по всем транзакциям
+    """
+    rng = np.random.default_rng(2)
+    df = random_transactions
+    is_old = df["Дата операции"] < pd.Timestamp(split_date)
+    new_rows = df[~is_old].sort_values("Дата операции").assign(
+        **{
+            "Номер карты": lambda rows: np.where(rng.random(len(rows)) < 0.2, "*0001", rows["Номер карты"]),
+            "Категория": lambda rows: np.where(rng.random(len(rows)) < 0.2, "Аванс", rows["Категория"]),
+        }
+    )
+    store = TransactionStore(df[is_old])
+    spending = store.get_cumulative_spending(key_columns)
+
+    with patch("src.store.CumulativeSpending", side_effect=AssertionError("пересчет по всем транзакциям")):
+        store.append(new_rows.iloc[:300])
+        store.append(new_rows.iloc[300:])
+        result = store.get_cumulative_spending(key_columns)
+
+    expected = CumulativeSpending(store.transactions, key_columns)
+    assert result is not spending
+    pd.testing.assert_frame_equal(result.keys, expected.keys)
+    month_starts = pd.date_range("2021-01-01", periods=5, freq="MS").to_numpy()
+    month_ends = pd.date_range("2021-02-01", periods=5, freq="MS").to_numpy() - np.timedelta64(1, "ns")
+    for actual, expected_values in zip(result.get_totals(month_starts, month_ends),
+                                       expected.get_totals(month_starts, month_ends)):
+        np.testing.assert_array_equal(actual, expected_values)
+
+
+def test_cumulative_spending_recalculated_after_earlier_transactions(random_transactions):
+    """Тест, что накопленные суммы рассчитываются заново, если новые расходы группы раньше последнего расхода"""
+    df = random_transactions.assign(**{"Категория": "Супермаркеты"}).sort_values("Дата операции")
+    store = TransactionStore(df.iloc[:1500])
+    spending = store.get_cumulative_spending(("Категория",))
+
+    assert spending.extended(store.transactions.iloc[:10]) is None
+    store.append(df.iloc[:10])
+
+    sums, counts = store.get_cumulative_spending(("Категория",)).get_totals(
+        np.array(["2021-01-01"], dtype="datetime64[ns]"), np.array(["2021-12-31"], dtype="datetime64[ns]")
+    )
+    assert counts.tolist() == [[1510]]
+    assert sums[0, 0] == df["Сумма операции с округлением"].iloc[:1500].sum() + df[
+        "Сумма операции с округлением"].iloc[:10].sum()
+
+
+def make_dataset(n_rows):
+    """Функция формирования набора данных пользователя из n_rows транзакций"""
+    return pd.DataFrame(
+        {
+            "Дата операции": pd.date_range("2025-01-01", periods=n_rows, freq="h"),
+            "Сумма платежа": -np.arange(1, n_rows + 1, dtype=float),
+            "Категория": "АЗС",
+            "Сумма операции с округлением": np.arange(1, n_rows + 1, dtype=float),
+        }
+    )
+
+
+def test_store_pool_loads_dataset_once():
+    """Тест, что хранилище набора данных загружается один раз и используется для следующих запросов"""
+    loaded = []
+
+    def loader(dataset_id):
+        loaded.append(dataset_id)
+        return TransactionStore(make_dataset(10))
+
+    pool = TransactionStorePool(loader=loader)
+
+    first_store = pool.get("user_1")
+    second_store = pool.get("user_1")
+
+    assert first_store is second_store
+    assert loaded == ["user_1"]
+
+
+def test_store_pool_evicts_least_recently_used():
+    """Тест удаления из пула хранилищ, к которым дольше всего не обращались (ограничение количества хранилищ)"""
+    pool = TransactionStorePool(max_stores=2, loader=lambda dataset_id: TransactionStore(make_dataset(10)))
+
+    pool.get("user_1")
+    pool.get("user_2")
+    pool.get("user_1")  # user_2 - самое давнее обращение
+    pool.get("user_3")
+
+    assert "user_1" in pool and "user_3" in pool and "user_2" not in pool
+    assert pool.evictions == 1
+
+
+def test_store_pool_evicts_by_memory():
+    """Тест удаления хранилищ из пула при превышении ограничения памяти (последнее хранилище остается)"""
+    store_memory = TransactionStore(make_dataset(1000)).memory_usage()
+    pool = TransactionStorePool(max_memory=int(store_memory * 2.5),
+                                loader=lambda dataset_id: TransactionStore(make_dataset(1000)))
+
+    for user_number in range(5):
+        pool.get(f"user_{user_number}")
+
+    assert len(pool) == 2
+    assert pool.memory_usage() <= pool.max_memory
+    pool.max_memory = 0
+    pool.get("user_5")
+    assert len(pool) == 1 and "user_5" in pool
+
+
+def test_store_pool_concurrent_requests_load_once():
+    """Тест, что одновременные запросы одного набора данных ожидают одной загрузки"""
+    loaded = []
+
+    def slow_loader(dataset_id):
+        loaded.append(dataset_id)
+        time.sleep(0.05)
+        return TransactionStore(make_dataset(10))
+
+    pool = TransactionStorePool(loader=slow_loader)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        stores = list(executor.map(lambda _: pool.get("user_1"), range(8)))
+
+    assert loaded == ["user_1"]
+    assert all(store is stores[0] for store in stores)
+
+
+def test_store_pool_loading_lock_removed_with_store_insert():
+    """
+    Тест, что блокировка загрузки удаляется в одной критической секции с добавлением хранилища в пул:
+    после загрузки набор данных всегда есть либо в пуле, либо среди загружаемых (иначе следующий запрос
+    загрузил бы его повторно)
+    """
+    pool = TransactionStorePool(loader=lambda dataset_id: TransactionStore(make_dataset(10)))
+    lock = pool._lock
+    released_states = []
+
+    class CheckedLock:
+        def __enter__(self):
+            lock.acquire()
+
+        def __exit__(self, *exc_info):
+            released_states.append("user_1" in pool._stores or "user_1" in pool._loading_locks)
+            lock.release()
+
+    pool._lock = CheckedLock()  # type: ignore[assignment]
+    pool.get("user_1")
+
+    assert all(released_states)
+    assert pool._loading_locks == {}
+
+
+def test_store_pool_loading_lock_removed_on_failure():
+    """Тест удаления блокировки загрузки при ошибке загрузки (следующий запрос загружает набор данных снова)"""
+    attempts = []
+
+    def failing_loader(dataset_id):
+        attempts.append(dataset_id)
+        if len(attempts) == 1:
+            raise FileNotFoundError(dataset_id)
+        return TransactionStore(make_dataset(10))
+
+    pool = TransactionStorePool(loader=failing_loader)
+    with pytest.raises(FileNotFoundError):
+        pool.get("user_1")
+
+    assert pool._loading_locks == {}
+    assert len(pool.get("user_1")) == 10
+    assert attempts == ["user_1", "user_1"]
+
+
+def test_functions_use_dataset_store(sample_dataframe):
+    """Тест, что функции страниц используют хранилище набора данных пользователя"""
+    set_transaction_store(TransactionStore(make_dataset(10)))  # Общее хранилище - другие данные
+    set_store_pool(TransactionStorePool(loader=lambda dataset_id: TransactionStore(sample_dataframe)))
+
+    result_reports = spending_by_category(None, "АЗС", "25.01.2025", dataset_id="user_1")
+    result_services = get_high_cashback_categories(None, "2025", "01", dataset_id="user_1")
+
+    assert result_reports["Сумма платежа"].tolist() == [-2000.0]
+    assert json.loads(result_services) == {"АЗС": 20.0, "Супермаркеты": 10.0}
+    # None и dataset_id - выборка по индексу дат хранилища набора данных
+    assert slice_by_date(None, datetime(2025, 1, 1), datetime(2025, 1, 31), dataset_id="user_1")[
+        "Сумма платежа"].tolist() == [-1000.0, -2000.0]
+
+
+def test_dataset_store_reads_dataset_file(sample_dataframe):
+    """Тест загрузки хранилища набора данных из файла пользователя"""
+    with patch("src.store.read_data_file", return_value=sample_dataframe) as mock_read:
+        store = get_transaction_store("user_1")
+
+    mock_read.assert_called_once_with(dataset_id="user_1")
+    assert get_store_pool().get("user_1") is store
+    assert len(store) == len(sample_dataframe)
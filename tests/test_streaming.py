@@ -0,0 +1,106 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+import src.streaming
+from src.services import get_high_cashback_categories
+from src.streaming import (CardSummaryAccumulator, TopTransactionsAccumulator, consume_chunks, filter_chunks,
+                           iter_excel_chunks, normalize_chunks, stream_report)
+from src.utils import SHEET_NAME, get_slice_of_data, get_summary_card_data, read_data_file, top_5_transactions_by_sum
+
+
+@pytest.fixture
+def excel_file(tmp_path):
+    """Фикстура с Excel-файлом транзакций (в т.ч. с пустыми номерами карт и одинаковыми суммами)"""
+    path = tmp_path / "operations.xlsx"
+    pd.DataFrame(
+        {
+            "Дата операции": ["20.01.2025 09:30:00", "15.01.2025 12:00:00", "10.01.2025 10:00:00",
+                              "05.01.2025 11:00:00", "31.12.2024 18:00:00", "01.12.2024 20:00:00"],
+            "Номер карты": ["*5678", None, "*5678", "*2222", "*2222", "*5678"],
+            "Статус": ["OK", "OK", "FAILED", "OK", "OK", "OK"],
+            "Сумма платежа": [-1000.0, -2000.0, -300.0, -1000.0, -500.0, 10000.0],
+            "Категория": ["Супермаркеты", "АЗС", "Супермаркеты", "Переводы", "Рестораны", "Пополнения"],
+            "Описание": ["Магнит", "Лукойл", "Магнит", "Перевод", "Кафе", "Пополнение"],
+            "Сумма операции с округлением": [1000.0, 2000.0, 300.0, 1000.0, 500.0, 10000.0],
+        }
+    ).to_excel(path, sheet_name=SHEET_NAME, index=False)
+    return str(path)
+
+
+def test_iter_excel_chunks(excel_file):
+    """Тест чтения Excel-файла частями"""
+    chunks = list(iter_excel_chunks(excel_file, chunk_size=4))
+
+    assert [len(chunk) for chunk in chunks] == [4, 2]
+    assert chunks[1]["Описание"].tolist() == ["Кафе", "Пополнение"]
+
+
+@pytest.mark.parametrize("private_api", ["WorkSheetParser", "_date_formats"])
+def test_iter_excel_chunks_read_only_fallback(excel_file, monkeypatch, private_api):
+    """Тест, что без закрытых классов и атрибутов openpyxl файл читается в режиме "только чтение" так же"""
+    path = excel_file.replace("operations.xlsx", "dates.xlsx")
+    pd.DataFrame({"Дата платежа": [datetime(2025, 1, 20), None], "Сумма": [1.5, None], "Пусто": [None, None]}
+                 ).to_excel(path, sheet_name=SHEET_NAME, index=False)
+    expected = [list(iter_excel_chunks(file, chunk_size=4)) for file in (excel_file, path)]
+
+    if private_api == "WorkSheetParser":
+        monkeypatch.setattr(src.streaming, "WorkSheetParser", None)
+    else:
+        original_apply_stylesheet = src.streaming.apply_stylesheet
+
+        def apply_stylesheet(archive, wb):  # Книга без закрытого атрибута форматов дат
+            original_apply_stylesheet(archive, wb)
+            del wb._date_formats
+
+        monkeypatch.setattr(src.streaming, "apply_stylesheet", apply_stylesheet)
+    result = [list(iter_excel_chunks(file, chunk_size=4)) for file in (excel_file, path)]
+
+    for expected_chunks, chunks in zip(expected, result):
+        assert len(chunks) == len(expected_chunks)
+        for expected_chunk, chunk in zip(expected_chunks, chunks):
+            pd.testing.assert_frame_equal(chunk, expected_chunk)
+    assert result[1][0]["Дата платежа"].iloc[0] == datetime(2025, 1, 20)
+
+
+def test_filter_chunks(excel_file):
+    """Тест отбора транзакций за период (части без транзакций за период пропускаются)"""
+    chunks = filter_chunks(normalize_chunks(iter_excel_chunks(excel_file, chunk_size=2)),
+                           datetime(2025, 1, 1), datetime(2025, 1, 31))
+
+    assert [len(chunk) for chunk in chunks] == [2, 2]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 100])
+def test_accumulators_same_as_in_memory(excel_file, chunk_size):
+    """Тест, что расчеты по частям совпадают с расчетами по всем транзакциям"""
+    start_date, end_date = datetime(2024, 12, 15), datetime(2025, 1, 31)
+    cards = CardSummaryAccumulator(start_date, end_date)
+    top_transactions = TopTransactionsAccumulator(start_date, end_date, 3, filters={"Статус": "OK"})
+
+    consume_chunks(normalize_chunks(iter_excel_chunks(excel_file, chunk_size=chunk_size)), [cards, top_transactions])
+
+    df = next(normalize_chunks(iter_excel_chunks(excel_file)))
+    df_slice = get_slice_of_data(start_date, end_date, df)
+    assert cards.result() == get_summary_card_data(df_slice)
+    assert cards.result()[-1] == {"last_digits": "Карта не указана", "total_spent": 2000.0, "cashback": 20.0}
+    assert top_transactions.result()["Описание"].tolist() == ["Лукойл", "Магнит", "Перевод"]
+
+
+@pytest.mark.parametrize(
+    "start_date, end_date, year, month",
+    [
+        (datetime(2021, 4, 1), datetime(2021, 4, 10, 20, 30), "2020", "2"),
+        (datetime(2018, 1, 1), datetime(2021, 12, 31, 23, 59, 59), "2021", "12"),
+    ],
+)
+def test_stream_report_same_as_read_data_file(start_date, end_date, year, month):
+    """Тест, что результаты по файлу с транзакциями совпадают с результатами по прочитанным в память данным"""
+    result = stream_report(start_date, end_date, year, month, chunk_size=1000)
+
+    df = read_data_file(use_cache=False)
+    df_slice = get_slice_of_data(start_date, end_date, df)
+    assert result["cards"] == get_summary_card_data(df_slice)
+    assert result["top_transactions"] == top_5_transactions_by_sum(df_slice)
+    assert result["cashback"] == get_high_cashback_categories(df, year, month)
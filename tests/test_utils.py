@@ -2,18 +2,27 @@ import json
 from datetime import datetime
 from unittest.mock import mock_open, patch
 
+import numpy as np
 import pandas as pd
 import pytest
 
 from src.utils import (
+    PATH_TO_DATASETS_DIR,
+    PATH_TO_EXCEL,
+    CumulativeSpending,
     actual_currencies,
     actual_stocks,
+    get_dataset_path,
     get_date_range,
     get_slice_of_data,
     get_summary_card_data,
     get_time_for_greeting,
+    get_window_starts,
+    normalize_transactions,
+    parse_operation_dates,
     read_data_file,
     top_5_transactions_by_sum,
+    top_n_transactions,
 )
 
 
@@ -48,7 +57,7 @@ def test_read_data_file_success():
 
         # Проверяем вызовы
         mock_read.assert_called_once_with(
-            "C:\\Users\\17\\Desktop\\Projects\\Financial_assistant\\data\\operations.xlsx",
+            PATH_TO_EXCEL,
             sheet_name="Отчет по операциям",
         )
 
@@ -71,6 +80,91 @@ def test_read_data_file_empty():
         assert result.empty
 
 
+def test_read_data_file_uses_cache():
+    """Тест повторного чтения файла из кеша (без повторного вызова pd.read_excel)"""
+    mock_df = pd.DataFrame(
+        {
+            "Номер карты": ["*5456", None],
+            "Дата операции": ["01.01.2023", "15.01.2023"],
+            "Сумма платежа": [-1000.0, -2000.0],
+        }
+    )
+
+    with patch("pandas.read_excel", return_value=mock_df) as mock_read:
+        first_result = read_data_file()
+        second_result = read_data_file()
+
+        mock_read.assert_called_once()
+        pd.testing.assert_frame_equal(first_result, second_result)
+
+
+def test_read_data_file_for_dataset():
+    """Тест чтения файла набора данных пользователя"""
+    mock_df = pd.DataFrame({"Номер карты": ["*5456"], "Дата операции": ["01.01.2023"], "Сумма платежа": [-1000.0]})
+
+    with patch("pandas.read_excel", return_value=mock_df) as mock_read:
+        read_data_file(use_cache=False, dataset_id="user_1")
+
+    mock_read.assert_called_once_with(f"{PATH_TO_DATASETS_DIR}/user_1.xlsx", sheet_name="Отчет по операциям")
+
+
+@pytest.mark.parametrize("dataset_id", ["../operations", "user/1", "", "user 1"])
+def test_get_dataset_path_invalid_id(dataset_id):
+    """Тест проверки идентификатора набора данных (путь к файлу не может выходить за папку наборов данных)"""
+    with pytest.raises(ValueError):
+        get_dataset_path(dataset_id)
+
+
+def test_get_dataset_path_default():
+    """Тест пути к общему файлу транзакций (набор данных не указан)"""
+    assert get_dataset_path() == PATH_TO_EXCEL
+
+
+def test_read_data_file_without_cache():
+    """Тест чтения файла с отключенным кешем"""
+    mock_df = pd.DataFrame({"Номер карты": ["*5456"], "Сумма платежа": [-1000.0]})
+
+    with patch("pandas.read_excel", return_value=mock_df) as mock_read:
+        read_data_file(use_cache=False)
+        read_data_file(use_cache=False)
+
+        assert mock_read.call_count == 2
+
+
+##################################################################################################
+def test_parse_operation_dates():
+    """Тест преобразования дат с временем и без времени"""
+    dates = pd.Series(["31.12.2021 16:44:00", "01.02.2020"])
+
+    result = parse_operation_dates(dates)
+
+    assert result.dtype == "datetime64[ns]"
+    assert result.tolist() == [datetime(2021, 12, 31, 16, 44), datetime(2020, 2, 1)]
+
+
+def test_normalize_transactions(sample_dataframe):
+    """Тест приведения столбцов к типам для анализа"""
+    sample_dataframe["Номер карты"] = ["*5678", "*2222", "*5678", "*5678", "*2222", "*2222"]
+    sample_dataframe["Статус"] = "OK"
+
+    result = normalize_transactions(sample_dataframe)
+
+    assert result["Дата операции"].dtype == "datetime64[ns]"
+    assert result["Сумма платежа"].dtype == "float64"
+    assert result["Сумма операции с округлением"].dtype == "float64"
+    for column in ["Категория", "Номер карты", "Статус"]:
+        assert isinstance(result[column].dtype, pd.CategoricalDtype)
+    # Исходный DataFrame не изменяется
+    assert sample_dataframe["Дата операции"].dtype == object
+
+
+def test_normalize_transactions_already_normalized(sample_dataframe):
+    """Тест, что уже приведенный DataFrame возвращается без изменений"""
+    normalized_df = normalize_transactions(sample_dataframe)
+
+    assert normalize_transactions(normalized_df) is normalized_df
+
+
 ##################################################################################################
 def test_get_slice_of_data_success(sample_dataframe):
     """Тест на успешную работу функции"""
@@ -181,6 +275,126 @@ def test_top_5_transactions_by_sum_with_failed_status(sample_data_for_top_5_tran
     assert top_5_transactions_by_sum(sample_data_for_top_5_transactions_failed_status) == []
 
 
+@pytest.fixture
+def transactions_for_top_n():
+    return pd.DataFrame(
+        {
+            "Дата операции": pd.date_range("2023-01-01", periods=6, freq="D"),
+            "Статус": ["OK", "OK", "FAILED", "OK", "OK", "OK"],
+            "Сумма платежа": [-100.0, -300.0, -900.0, 500.0, -300.0, -50.0],
+            "Сумма операции с округлением": [100.0, 300.0, 900.0, 500.0, 300.0, 50.0],
+            "Кэшбэк": [1.0, None, 9.0, None, 3.0, 0.5],
+            "Категория": ["Аптеки", "АЗС", "АЗС", "Пополнения", "Аптеки", "Фастфуд"],
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "n, by, filters, expected_index",
+    [
+        (3, "amount", None, [2, 3, 1]),
+        (3, "amount", {"Статус": "OK"}, [3, 1, 4]),  # При равных суммах - в порядке следования транзакций
+        (2, "cashback", {"Статус": "OK"}, [4, 0]),
+        (6, "cashback", {"Статус": "OK"}, [4, 0, 5, 1, 3]),  # Транзакции без кешбэка - в конце
+        (2, "abs_payment", {"Категория": ["Аптеки", "Пополнения"]}, [3, 4]),
+        (0, "amount", None, []),
+    ],
+)
+def test_top_n_transactions(transactions_for_top_n, n, by, filters, expected_index):
+    """Тест выбора ТОП-N транзакций по разным показателям и условиям отбора"""
+    result = top_n_transactions(transactions_for_top_n, n, by=by, filters=filters)
+
+    assert result.index.tolist() == expected_index
+
+
+def test_top_n_transactions_same_as_sorting():
+    """Тест, что результат совпадает с устойчивой сортировкой всех транзакций по убыванию суммы"""
+    amounts = pd.Series([float(value % 7) for value in range(100)])
+    df = pd.DataFrame({"Сумма операции с округлением": amounts, "Статус": "OK"})
+
+    expected = df.sort_values(by="Сумма операции с округлением", ascending=False, kind="stable").head(10)
+
+    pd.testing.assert_frame_equal(top_n_transactions(df, 10), expected)
+
+
+def test_top_n_transactions_unknown_ranking(transactions_for_top_n):
+    """Тест случая, когда показатель для выбора транзакций неизвестен"""
+    with pytest.raises(ValueError):
+        top_n_transactions(transactions_for_top_n, 5, by="unknown")
+
+
+@pytest.mark.parametrize(
+    "window, expected",
+    [
+        ("30D", datetime(2021, 3, 2, 20, 30)),
+        ("90D", datetime(2021, 1, 1, 20, 30)),
+        ("M", datetime(2021, 4, 1)),
+    ],
+)
+def test_get_window_starts(window, expected):
+    """Тест получения начала периода заданной длины"""
+    result = get_window_starts(np.array([datetime(2021, 4, 1, 20, 30)], dtype="datetime64[ns]"), window)
+
+    assert result.tolist() == [pd.Timestamp(expected).value]
+
+
+def test_get_window_starts_unknown_window():
+    """Тест случая, когда длина периода неизвестна"""
+    with pytest.raises(ValueError):
+        get_window_starts(np.array([datetime(2021, 4, 1)], dtype="datetime64[ns]"), "1W")
+
+
+@pytest.fixture
+def random_spending(make_random_transactions):
+    """Фикстура со случайными транзакциями по картам и категориям (суммы с копейками, в т.ч. без номера карты)"""
+    df = make_random_transactions(seed=4, days=200, unit="h", max_amount=10_000, kopecks=True, income_share=0.2)
+    return df.astype({"Номер карты": "category"})
+
+
+@pytest.mark.parametrize("window", ["30D", "90D", "M"])
+def test_cumulative_spending_same_as_groupby(random_spending, window):
+    """Тест, что суммы расходов по накопленным суммам совпадают с группировкой транзакций за период"""
+    spending = CumulativeSpending(random_spending)
+    end_dates = np.array(["2021-01-01", "2021-02-28T23:59:59", "2021-05-15T12:00", "2021-12-31"],
+                         dtype="datetime64[ns]")
+
+    sums, counts = spending.get_window_totals(end_dates, window)
+
+    assert spending.keys.columns.tolist() == ["Номер карты", "Категория"]
+    start_dates = get_window_starts(end_dates, window)
+    for start_date, end_date, date_sums, date_counts in zip(start_dates, end_dates, sums, counts):
+        period = random_spending["Дата операции"].between(start_date, end_date)
+        grouped = random_spending[period & (random_spending["Сумма платежа"] < 0)].groupby(
+            ["Номер карты", "Категория"], observed=True)["Сумма операции с округлением"].agg(["sum", "count"])
+        expected = grouped.reindex(pd.MultiIndex.from_frame(spending.keys), fill_value=0)
+        assert date_counts.tolist() == expected["count"].tolist()
+        assert date_sums == pytest.approx(expected["sum"].to_numpy())
+
+
+def test_cumulative_spending_without_expenses(random_spending):
+    """Тест случая, когда в данных нет расходов"""
+    spending = CumulativeSpending(random_spending[random_spending["Сумма платежа"] > 0], ("Категория",))
+
+    sums, counts = spending.get_window_totals(np.array(["2021-03-01"], dtype="datetime64[ns]"), "M")
+
+    assert len(spending) == 0
+    assert sums.shape == counts.shape == (1, 0)
+
+
+def test_cumulative_spending_empty_dataframe(random_spending):
+    """Тест пустого DataFrame без столбцов (групп расходов нет, новые расходы добавляются)"""
+    spending = CumulativeSpending(pd.DataFrame(), ("Категория",))
+    extended = spending.extended(random_spending)
+
+    sums, counts = spending.get_window_totals(np.array(["2021-03-01"], dtype="datetime64[ns]"), "M")
+
+    assert len(spending) == 0
+    assert sums.shape == counts.shape == (1, 0)
+    assert extended is not None
+    assert extended.keys["Категория"].tolist() == CumulativeSpending(random_spending, ("Категория",)).keys[
+        "Категория"].tolist()
+
+
 ###############################################################################################
 
 
@@ -189,7 +403,7 @@ def test_actual_currencies_successful(mock_user_settings_for_currencies, mock_ap
     # Мокаем файл с настройками
     with patch("builtins.open", mock_open(read_data=json.dumps(mock_user_settings_for_currencies))):
         # Мокаем API-запрос
-        with patch("requests.get") as mock_get:
+        with patch("src.http_client.HttpClient.get") as mock_get:
             # Настраиваем мок ответа
             mock_response = mock_get.return_value
             mock_response.status_code = 200
@@ -230,7 +444,7 @@ def test_actual_stocks_successful(mock_user_settings_for_stocks, mock_api_respon
     # Мокаем файл с настройками
     with patch("builtins.open", mock_open(read_data=json.dumps(mock_user_settings_for_stocks))):
         # Мокаем API-запрос
-        with patch("requests.get") as mock_get:
+        with patch("src.http_client.HttpClient.get") as mock_get:
             # Настраиваем мок ответа
             mock_response = mock_get.return_value
             mock_response.status_code = 200
@@ -0,0 +1,123 @@
+import json
+import time
+
+import pandas as pd
+import pytest
+
+from src.http_client import HttpClient, set_http_client
+from src.store import TransactionStore, get_transaction_store, set_transaction_store
+from src.utils import actual_currencies, actual_stocks, get_date_range, get_summary_card_data, normalize_transactions
+from src.views import main_info, main_info_batch
+
+
+@pytest.fixture
+def transactions_store(sample_data_for_top_5_transactions):
+    """Фикстура с общим хранилищем транзакций для страницы "Главная\""""
+    amounts = sample_data_for_top_5_transactions["Сумма операции с округлением"]
+    df = sample_data_for_top_5_transactions.assign(**{"Номер карты": "*5678", "Сумма платежа": -amounts})
+    set_transaction_store(TransactionStore(df))
+
+
+def test_actual_currencies_from_stub_server(stub_api_server):
+    """Тест получения курсов валют по API-запросу к локальному серверу"""
+    result = actual_currencies()
+
+    assert result == [{"currency": "USD", "rate": 76.92}, {"currency": "EUR", "rate": 90.91},
+                      {"currency": "GBP", "rate": 105.26}]
+    assert "base=RUB" in stub_api_server.requests[0]
+
+
+def test_actual_stocks_from_stub_server(stub_api_server):
+    """Тест получения курсов акций по API-запросу к локальному серверу"""
+    result = actual_stocks()
+
+    assert result == [{"stock": "AAPL", "price": 150.12}, {"stock": "GOOGL", "price": 2750.45},
+                      {"stock": "MSFT", "price": 305.67}]
+
+
+def test_actual_currencies_timeout(stub_api_server):
+    """Тест случая, когда API не отвечает за отведенное время"""
+    stub_api_server.delay = 0.5
+
+    set_http_client(HttpClient(retries=0, timeout=(0.1, 0.1)))
+
+    assert actual_currencies() == []
+    assert actual_stocks() == []
+
+
+def test_actual_stocks_server_error(stub_api_server):
+    """Тест случая, когда API возвращает ошибку"""
+    stub_api_server.status = 500
+
+    assert actual_stocks() == []
+
+
+def test_main_info(stub_api_server, transactions_store):
+    """Тест формирования JSON-ответа страницы "Главная\""""
+    result = json.loads(main_info("2023-01-31 23:59:59"))
+
+    assert result["cards"] == [{"last_digits": "5678", "total_spent": 21000.0, "cashback": 210.0}]
+    assert [transaction["amount"] for transaction in result["top_transactions"]] == [6000, 5000, 4000, 2000, 1000]
+    assert len(result["currency_rates"]) == 3
+    assert len(result["stock_prices"]) == 3
+
+
+def test_main_info_requests_are_concurrent(stub_api_server, transactions_store):
+    """Тест, что API-запросы курсов валют и акций выполняются параллельно"""
+    stub_api_server.delay = 0.5
+
+    start = time.perf_counter()
+    result = json.loads(main_info("2023-01-31 23:59:59"))
+    elapsed = time.perf_counter() - start
+
+    assert len(result["currency_rates"]) == 3
+    assert len(result["stock_prices"]) == 3
+    assert elapsed < 0.9  # При последовательных запросах время было бы не меньше 1 секунды
+
+
+@pytest.fixture
+def random_transactions_store(make_random_transactions):
+    """Фикстура с общим хранилищем случайных транзакций по нескольким картам за несколько месяцев"""
+    df = make_random_transactions(3000, seed=2, days=90, unit="h", max_amount=5000, kopecks=True, income_share=0.2)
+    df["Дата операции"] = df["Дата операции"].dt.strftime("%d.%m.%Y %H:%M:%S")  # Даты - строки, как в Excel-файле
+    df["Номер карты"] = df["Номер карты"].fillna("Карта не указана")
+    set_transaction_store(TransactionStore(normalize_transactions(df)))
+
+
+def test_main_info_batch_same_as_main_info(stub_api_server, random_transactions_store):
+    """Тест, что данные для каждой даты совпадают с результатом функции main_info"""
+    date_times = ["2021-02-15 12:00:00", "2021-01-01 00:00:00", "2021-01-31 23:59:59", "2021-02-01 08:30:00",
+                  "2021-03-10 20:00:00", "2021-02-28 23:59:59", "2021-01-20 10:00:00", "2020-12-31 12:00:00"]
+
+    result = json.loads(main_info_batch(date_times))
+
+    assert list(result) == date_times
+    store = get_transaction_store()
+    for date_time in date_times:
+        assert result[date_time] == json.loads(main_info(date_time))
+        # Суммы по картам совпадают с расчетом по транзакциям с начала месяца
+        assert result[date_time]["cards"] == get_summary_card_data(store.get_slice(*get_date_range(date_time)))
+    assert result["2020-12-31 12:00:00"]["cards"] == []
+
+
+def test_main_info_batch_requests_market_data_once(stub_api_server, random_transactions_store):
+    """Тест, что курсы валют и акций запрашиваются один раз для всех дат"""
+    date_times = [f"2021-01-{day:02d} 23:59:59" for day in range(1, 32)]
+
+    result = json.loads(main_info_batch(date_times))
+
+    assert len(result) == 31
+    assert len(stub_api_server.requests) == 2
+    assert all(len(data["currency_rates"]) == 3 for data in result.values())
+
+
+def test_main_info_empty_store(stub_api_server):
+    """Тест страницы "Главная" для пустого хранилища (файл с транзакциями не найден или не прочитан)"""
+    set_transaction_store(TransactionStore(pd.DataFrame()))
+
+    result = json.loads(main_info("2021-12-31 23:59:59"))
+    batch_result = json.loads(main_info_batch(["2021-12-31 23:59:59", "2021-12-15 12:00:00"]))
+
+    assert (result["cards"], result["top_transactions"]) == ([], [])
+    assert len(result["currency_rates"]) == 3
+    assert all((data["cards"], data["top_transactions"]) == ([], []) for data in batch_result.values())